@@ -18,11 +18,17 @@ from builtins import object, range
 import os
 import sys
 import re
+import copy
 import string
 import types
 import json
 import codecs
 import operator
+import time
+import multiprocessing
+import struct
+import mmap
+import zlib
 
 from io import open
 
@@ -34,6 +40,12 @@ from itertools import chain
 from collections import defaultdict
 from math import log, sqrt
 
+try:
+    from collections.abc import KeysView, ValuesView, ItemsView
+except ImportError:
+    from collections import KeysView, ValuesView, ItemsView
+from bisect import bisect_left
+
 try:
     MODULE = os.path.dirname(os.path.realpath(__file__))
 except:
@@ -355,6 +367,12 @@ def pprint(string, token=[WORD, POS, CHUNK, PNP], column=4):
 
 class lazydict(dict):
 
+    # A lazydict.load() can also open a compiled, memory-mapped table (see lazydict.compile()).
+    # Lookups are then passed to the table, which is shared read-only between processes.
+    # When the dictionary is modified, the table is copied into the dictionary.
+    _table = None
+    _codec = "j"
+
     def load(self):
         # Must be overridden in a subclass.
         # Must load data with dict.__setitem__(self, k, v) instead of lazydict[k] = v.
@@ -364,11 +382,61 @@ class lazydict(dict):
         """ If the dictionary is empty, calls lazydict.load().
             Replaces lazydict.method() with dict.method() and calls it.
         """
+        if self._table is not None:
+            if method not in _MUTATORS:
+                if not method.startswith("__"):
+                    setattr(self, method, getattr(self._table, method))
+                return getattr(self._table, method)(*args)
+            self._untable()
         if dict.__len__(self) == 0:
             self.load()
+            if self._table is not None:
+                return self._lazy(method, *args)
             setattr(self, method, types.MethodType(getattr(dict, method), self))
         return getattr(dict, method)(self, *args)
 
+    def _load_table(self, path):
+        """ Returns True if a compiled table for the given path (e.g., en-lexicon.txt)
+            exists and is up-to-date, in which case it is used instead of the dictionary.
+        """
+        tables = _tables(path)
+        if tables is None:
+            return False
+        self._table = tables[""]
+        return True
+
+    def _untable(self):
+        """ Copies the compiled table into the dictionary (before it is modified).
+        """
+        table, self._table = self._table, None
+        for method in ("get", "items", "keys", "values"):
+            self.__dict__.pop(method, None)
+        dict.update(self, table.items())
+
+    def _tables(self):
+        """ Returns a list of (name, codec, dict)-tuples to compile.
+        """
+        return [("", self._codec, self)]
+
+    def compile(self, path=None):
+        """ Saves the dictionary as a binary file that is memory-mapped when loaded.
+            By default, the file is saved next to the dictionary file (e.g., en-lexicon.bin).
+        """
+        path = path or _table_path(self._path)
+        _write_tables(path, [(name, codec, dict(v.items())) for name, codec, v in self._tables()], self._path)
+        return path
+
+    def __reduce__(self):
+        # The dictionary is pickled with its attributes and items (or its compiled table),
+        # without calling lazydict.__setitem__() when unpickled, which would load() it.
+        # Methods that were replaced by lazydict._lazy() are replaced again when called.
+        d = dict((k, v) for k, v in self.__dict__.items() if not isinstance(v, types.MethodType))
+        return (_lazydict, (self.__class__,), (d, list(dict.items(self))))
+
+    def __setstate__(self, state):
+        self.__dict__.update(state[0])
+        dict.update(self, state[1])
+
     def __repr__(self):
         return self._lazy("__repr__")
 
@@ -414,6 +482,10 @@ class lazydict(dict):
     def popitem(self, *args):
         return self._lazy("popitem", *args)
 
+
+def _lazydict(cls):
+    return dict.__new__(cls)
+
 #--- LAZY LIST -------------------------------------------------------------------------------------
 
 
@@ -433,6 +505,15 @@ class lazylist(list):
             setattr(self, method, types.MethodType(getattr(list, method), self))
         return getattr(list, method)(self, *args)
 
+    def __reduce__(self):
+        # See lazydict.__reduce__().
+        d = dict((k, v) for k, v in self.__dict__.items() if not isinstance(v, types.MethodType))
+        return (_lazylist, (self.__class__,), (d, list(list.__iter__(self))))
+
+    def __setstate__(self, state):
+        self.__dict__.update(state[0])
+        list.extend(self, state[1])
+
     def __repr__(self):
         return self._lazy("__repr__")
 
@@ -475,6 +556,10 @@ class lazylist(list):
     def count(self, *args):
         return self._lazy("count", *args)
 
+
+def _lazylist(cls):
+    return list.__new__(cls)
+
 #--- LAZY SET --------------------------------------------------------------------------------------
 
 
@@ -573,6 +658,296 @@ class lazyset(set):
     def difference(self, *args):
         return self._lazy("difference", *args)
 
+#--- COMPILED TABLE --------------------------------------------------------------------------------
+# Loading a lexicon from a text file is slow, and each process holds its own copy.
+# A lazydict can be compiled to a binary file with a hash table of (key, value)-items,
+# which is memory-mapped read-only when loaded and shared between processes.
+# The file has a header with a table directory, followed by the tables:
+# - header: 8 bytes magic number, 8 bytes source file size, 4 bytes source file CRC-32,
+#           4 bytes number of tables,
+# - directory: per table: 16 bytes name, 4 bytes codec, 8 bytes offset,
+# - table: 4 bytes number of items (n), 4 bytes number of slots (m),
+#          m x 4 bytes slot => item + 1 (0 = empty slot, linear probing),
+#          n x 16 bytes item => offset and length of key and value,
+#          followed by the UTF-8 encoded keys and values.
+# Items are sorted by key. All integers are unsigned little-endian.
+# Compiled tables are built with: python -m pattern.text compile en nl ...
+# or with compile_tables("en").
+
+TABLE = ".bin"
+TABLE_MAGIC = b"PATTERN2"
+
+_MUTATORS = set(("__setitem__", "__delitem__", "setdefault", "update", "pop", "popitem"))
+
+_UINT32 = struct.Struct("<I")
+_UINT32x2 = struct.Struct("<II")
+_UINT32x4 = struct.Struct("<IIII")
+_DIRECTORY = struct.Struct("<16s4sQ")
+_HEADER = struct.Struct("<8sQII")
+
+
+def _json_encode(v):
+    """ Returns the given value as a JSON string, where tuples are stored as {"()": [...]},
+        so that they are decoded as tuples instead of lists.
+    """
+    def _encode(v):
+        if isinstance(v, tuple):
+            return {"()": [_encode(x) for x in v]}
+        if isinstance(v, list):
+            return [_encode(x) for x in v]
+        if isinstance(v, dict):
+            return dict((k, _encode(x)) for k, x in v.items())
+        return v
+    return json.dumps(_encode(v))
+
+
+def _json_decode(s):
+    return json.loads(s, object_hook=lambda d: tuple(d["()"]) if len(d) == 1 and "()" in d else d)
+
+# Codecs encode values to strings and decode strings to values.
+_CODECS = {
+    "s": (lambda v: v, lambda v: v),
+    "i": (lambda v: str(v), int),
+    "f": (lambda v: repr(float(v)), float),
+    "j": (_json_encode, _json_decode),
+    # Sentiment {pos: [polarity, subjectivity, intensity]} with pos=None:
+    "p": (lambda v: _json_encode([[k, x] for k, x in v.items()]), lambda v: dict(_json_decode(v)))
+}
+
+
+def _table_hash(key):
+    return zlib.crc32(key) & 0xffffffff
+
+
+class StringTable(object):
+
+    def __init__(self, buffer, offset=0, codec="s", path=None, name=""):
+        """ A read-only dictionary of (string, value)-items in a compiled table,
+            stored in the given buffer (e.g., a memory-mapped file) at the given offset.
+            The path is the file path the table was compiled from (see _tables()),
+            so that the table can be pickled (e.g., for parse_many() in other processes).
+        """
+        self._path = path
+        self._name = name
+        self._buffer = buffer
+        self._decode = _CODECS[codec][1]
+        self._n, self._m = _UINT32x2.unpack_from(buffer, offset)
+        self._slots = offset + 8
+        self._items = self._slots + self._m * 4
+        self._blob = self._items + self._n * 16
+
+    def _item(self, i):
+        k, kn, v, vn = _UINT32x4.unpack_from(self._buffer, self._items + i * 16)
+        return k, kn, v, vn
+
+    def _find(self, key):
+        """ Returns the value offset and length for the given key, or None.
+        """
+        if not isinstance(key, str):
+            return None
+        b, k = self._buffer, key.encode("utf-8")
+        h = _table_hash(k)
+        m = self._m - 1 # number of slots is a power of 2
+        while True:
+            i = _UINT32.unpack_from(b, self._slots + (h & m) * 4)[0]
+            if i == 0:
+                return None
+            x, xn, v, vn = self._item(i - 1)
+            if xn == len(k) and b[self._blob + x:self._blob + x + xn] == k:
+                return v, vn
+            h += 1
+
+    def _value(self, v, vn):
+        return self._decode(self._buffer[self._blob + v:self._blob + v + vn].decode("utf-8"))
+
+    def _key(self, k, kn):
+        return self._buffer[self._blob + k:self._blob + k + kn].decode("utf-8")
+
+    def __len__(self):
+        return self._n
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __getitem__(self, key):
+        v = self._find(key)
+        if v is None:
+            raise KeyError(key)
+        return self._value(*v)
+
+    def get(self, key, default=None):
+        v = self._find(key)
+        if v is None:
+            return default
+        return self._value(*v)
+
+    def __iter__(self):
+        for i in range(self._n):
+            k, kn, v, vn = self._item(i)
+            yield self._key(k, kn)
+
+    def keys(self):
+        return KeysView(self)
+
+    def values(self):
+        return _StringTableValues(self)
+
+    def items(self):
+        return _StringTableItems(self)
+
+    def __repr__(self):
+        return "StringTable(%s)" % repr(dict(self.items()))
+
+    def __reduce__(self):
+        # A memory-mapped buffer can't be pickled.
+        # The table is pickled as its file path and CRC-32, and opened again when unpickled.
+        if self._path is None:
+            raise TypeError("can't pickle StringTable without a file path")
+        return (_string_table, (self._path, self._name, _HEADER.unpack_from(self._buffer, 0)[1:3]))
+
+# Dictionary views (len(), in, repeated iteration) of a StringTable,
+# where values and items are read in order instead of looked up by key.
+
+
+class _StringTableValues(ValuesView):
+
+    def __iter__(self):
+        t = self._mapping
+        for i in range(t._n):
+            k, kn, v, vn = t._item(i)
+            yield t._value(v, vn)
+
+
+class _StringTableItems(ItemsView):
+
+    def __iter__(self):
+        t = self._mapping
+        for i in range(t._n):
+            k, kn, v, vn = t._item(i)
+            yield t._key(k, kn), t._value(v, vn)
+
+
+def _string_table(path, name, source):
+    """ Returns the compiled StringTable with the given name for the given file path,
+        if the file still has the given (size, CRC-32) (see StringTable.__reduce__()).
+    """
+    tables = _tables(path)
+    if tables is None or tuple(_HEADER.unpack_from(tables[name]._buffer, 0)[1:3]) != tuple(source):
+        raise IOError("compiled table for %s has changed" % path)
+    return tables[name]
+
+
+def _table_path(path):
+    """ Returns the path of the compiled table for the given file path,
+        e.g., en-lexicon.txt => en-lexicon.bin.
+    """
+    return os.path.splitext(path)[0] + TABLE
+
+# Memory-mapped tables are cached by path, so that they are opened only once per process.
+_TABLES = {}
+
+
+def _table_source(path):
+    """ Returns a (size, CRC-32)-tuple for the file at the given path, or (0, 0).
+    """
+    if not isinstance(path, str) or not os.path.isfile(path):
+        return (0, 0)
+    with open(path, "rb") as f:
+        b = f.read()
+    return (len(b), zlib.crc32(b) & 0xffffffff)
+
+
+def _tables(path):
+    """ Returns a dictionary of (name, StringTable)-items for the given file path,
+        or None if there is no up-to-date compiled table for the given file.
+    """
+    if not isinstance(path, str) or not os.path.exists(path):
+        return None
+    p = _table_path(path)
+    if p == path or not os.path.exists(p):
+        return None
+    # The compiled table is up-to-date if the header has the size and CRC-32 of the file.
+    # Modification times are not reliable (e.g., after a checkout or a copy).
+    t = (os.path.getmtime(p), _table_source(path))
+    if p in _TABLES and _TABLES[p][0] == t:
+        return _TABLES[p][1]
+    f = open(p, "rb")
+    try:
+        b = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        f.close()
+    if b[:7] != TABLE_MAGIC[:7]:
+        raise ValueError("%s is not a compiled table" % p)
+    if b[:8] != TABLE_MAGIC or len(b) < _HEADER.size:
+        return None # Older version.
+    magic, size, crc, n = _HEADER.unpack_from(b, 0)
+    if (size, crc) != t[1]:
+        return None
+    tables = {}
+    for i in range(n):
+        name, codec, offset = _DIRECTORY.unpack_from(b, _HEADER.size + i * _DIRECTORY.size)
+        name = name.rstrip(b"\0").decode("utf-8")
+        codec = codec.rstrip(b"\0").decode("utf-8")
+        tables[name] = StringTable(b, offset, codec, path, name)
+    _TABLES[p] = (t, tables)
+    return tables
+
+
+def _write_tables(path, tables, source=None):
+    """ Writes the given list of (name, codec, dict)-tuples as a compiled table file
+        for the given source file path.
+    """
+    header = _HEADER.pack(TABLE_MAGIC, *(_table_source(source) + (len(tables),)))
+    offset = len(header) + len(tables) * _DIRECTORY.size
+    directory, data = [], []
+    for name, codec, d in tables:
+        encode = _CODECS[codec][0]
+        items = sorted((k.encode("utf-8"), encode(v).encode("utf-8")) for k, v in d.items())
+        n = len(items)
+        m = 1
+        while m < n * 2:
+            m *= 2
+        slots = [0] * m
+        index, blob, i = [], [], 0
+        for j, (k, v) in enumerate(items):
+            h = _table_hash(k)
+            while slots[h & (m - 1)] != 0:
+                h += 1
+            slots[h & (m - 1)] = j + 1
+            index.append(_UINT32x4.pack(i, len(k), i + len(k), len(v)))
+            blob.append(k)
+            blob.append(v)
+            i += len(k) + len(v)
+        t = b"".join([_UINT32x2.pack(n, m), struct.pack("<%sI" % m, *slots)] + index + blob)
+        directory.append(_DIRECTORY.pack(name.encode("utf-8"), codec.encode("utf-8"), offset))
+        data.append(t)
+        offset += len(t)
+    # Write to a new file, so that processes that have the old file memory-mapped are unaffected.
+    f = open(path + ".tmp", "wb")
+    f.write(header + b"".join(directory) + b"".join(data))
+    f.close()
+    if os.path.exists(path) and not hasattr(os, "replace"):
+        os.remove(path)
+    getattr(os, "replace", os.rename)(path + ".tmp", path)
+
+
+def compile_tables(module):
+    """ Compiles the lexicon, frequency, entities, sentiment and spelling dictionaries
+        of the given language module (e.g., "en") to memory-mapped tables.
+        Returns a list of file paths.
+    """
+    m = _module(module) if isinstance(module, str) else module
+    a = []
+    for v in (
+      getattr(m.parser, "lexicon", None),
+      getattr(m.parser, "frequency", None),
+      getattr(m.parser, "entities", None),
+      getattr(m, "sentiment", None),
+      getattr(m, "spelling", None)):
+        if isinstance(v, lazydict) and isinstance(v.path, str) and os.path.exists(v.path):
+            a.append(v.compile())
+    return a
+
 #### PARSER ########################################################################################
 # Pattern's text parsers are based on Brill's algorithm, or optionally on a trained language model.
 # Brill's algorithm automatically acquires a lexicon of known words (aka tag dictionary),
@@ -606,11 +981,12 @@ def _read(path, encoding="utf-8", comment=";;;"):
             if not line or (comment and line.startswith(comment)):
                 continue
             yield line
-    raise StopIteration
 
 
 class Lexicon(lazydict):
 
+    _codec = "s"
+
     def __init__(self, path=""):
         """ A dictionary of known words and their part-of-speech tags.
         """
@@ -622,6 +998,8 @@ class Lexicon(lazydict):
 
     def load(self):
         # Arnold NNP x
+        if self._load_table(self._path):
+            return
         dict.update(self, (x.split(" ")[:2] for x in _read(self._path) if len(x.split(" ")) > 1))
 
 #--- FREQUENCY -------------------------------------------------------------------------------------
@@ -629,6 +1007,8 @@ class Lexicon(lazydict):
 
 class Frequency(lazydict):
 
+    _codec = "f"
+
     def __init__(self, path=""):
         """ A dictionary of words and their relative document frequency.
         """
@@ -640,6 +1020,8 @@ class Frequency(lazydict):
 
     def load(self):
         # and 0.4805
+        if self._load_table(self._path):
+            return
         for x in _read(self.path):
             x = x.split()
             dict.__setitem__(self, x[0], float(x[1]))
@@ -742,13 +1124,72 @@ class Model(object):
 #     ly hassuf 2 RB x => unknown words ending in -ly change to RB.
 
 
-class Morphology(lazylist):
+def _trie_insert(trie, s, value):
+    """ Appends the given value to the node for string s in the given trie (nested dicts).
+        The values of a node are stored in the node under the empty string key.
+    """
+    node = trie
+    for ch in s:
+        node = node.setdefault(ch, {})
+    node.setdefault("", []).append(value)
+
+
+def _trie_search(trie, s):
+    """ Returns an iterator over the values of all nodes in the trie that are a prefix of s.
+    """
+    node = trie
+    for ch in s:
+        for v in node.get("", ()):
+            yield v
+        node = node.get(ch)
+        if node is None:
+            return
+    for v in node.get("", ()):
+        yield v
+
+# Morphology and Context rules are compiled to an index the first time they are applied.
+# The compiled index is discarded each time the list of rules is modified.
+
+
+class _CompiledRules(lazylist):
+
+    _compiled = None
+
+    def _modify(self, method, *args, **kwargs):
+        len(self) # lazylist.load()
+        self._compiled = None
+        return getattr(list, method)(self, *args, **kwargs)
+
+    def __setitem__(self, *args):
+        return self._modify("__setitem__", *args)
+
+    def __delitem__(self, *args):
+        return self._modify("__delitem__", *args)
+
+    def __iadd__(self, *args):
+        return self._modify("__iadd__", *args)
+
+    def remove(self, *args):
+        return self._modify("remove", *args)
+
+    def pop(self, *args):
+        return self._modify("pop", *args)
+
+    def sort(self, *args, **kwargs):
+        return self._modify("sort", *args, **kwargs)
+
+    def reverse(self):
+        return self._modify("reverse")
+
+
+class Morphology(_CompiledRules):
 
     def __init__(self, path="", known={}):
         """ A list of rules based on word morphology (prefix, suffix).
         """
         self.known = known
         self._path = path
+        self._compiled = None
         self._cmd = set((
                 "word", # Word is x.
                 "char", # Word contains x.
@@ -771,25 +1212,60 @@ class Morphology(lazylist):
         # ["NN", "s", "fhassuf", "1", "NNS", "x"]
         list.extend(self, (x.split() for x in _read(self._path)))
 
+    def _compile(self):
+        """ Returns a (rules, index)-tuple, where rules is a list of
+            (tagged, x, tag, cmd)-tuples and index is a (word, prefix, suffix, other)-tuple.
+            The word dict and the prefix and suffix tries map a word to the rules
+            that can fire on it, the other list contains all other rules.
+        """
+        if self._compiled is not None:
+            return self._compiled
+        rules = []
+        word, prefix, suffix, other = {}, {}, {}, []
+        for i, r in enumerate(self):
+            if len(r) > 2 and r[2] in self._cmd: # Rule = NN s fhassuf 1 NNS x
+                f, x, pos, cmd = r[0], r[1], r[-2], r[2].lower().lstrip("f")
+            elif len(r) > 1 and r[1] in self._cmd: # Rule = ly hassuf 2 RB x
+                f, x, pos, cmd = None, r[0], r[-2], r[1].lower()
+            else:
+                continue
+            rules.append((f, x, pos, cmd))
+            i = len(rules) - 1
+            if cmd == "word":
+                word.setdefault(x, []).append(i)
+            elif cmd in ("haspref", "deletepref"):
+                _trie_insert(prefix, x, i)
+            elif cmd in ("hassuf", "deletesuf"):
+                _trie_insert(suffix, x[::-1], i)
+            else:
+                other.append(i)
+        self._compiled = (rules, (word, prefix, suffix, other))
+        return self._compiled
+
     def apply(self, token, previous=(None, None), next=(None, None)):
         """ Applies lexical rules to the given token, which is a [word, tag] list.
         """
         w = token[0]
-        for r in self:
-            if r[1] in self._cmd: # Rule = ly hassuf 2 RB x
-                f, x, pos, cmd = bool(0), r[0], r[-2], r[1].lower()
-            if r[2] in self._cmd: # Rule = NN s fhassuf 1 NNS x
-                f, x, pos, cmd = bool(1), r[1], r[-2], r[2].lower().lstrip("f")
-            if f and token[1] != r[0]:
+        rules, (word, prefix, suffix, other) = self._compile()
+        # Rules are applied in order, but only the rules that can fire are visited:
+        # rules that depend on word prefix or suffix are looked up in a trie.
+        a = list(other)
+        a.extend(word.get(w, ()))
+        a.extend(_trie_search(prefix, w))
+        a.extend(_trie_search(suffix, w[::-1]))
+        a.sort()
+        for i in a:
+            f, x, pos, cmd = rules[i]
+            if f is not None and token[1] != f:
                 continue
-            if (cmd == "word"       and x == w) \
+            if (cmd == "word") \
+            or (cmd == "haspref") \
+            or (cmd == "hassuf") \
             or (cmd == "char"       and x in w) \
-            or (cmd == "haspref"    and w.startswith(x)) \
-            or (cmd == "hassuf"     and w.endswith(x)) \
             or (cmd == "addpref"    and x + w in self.known) \
             or (cmd == "addsuf"     and w + x in self.known) \
-            or (cmd == "deletepref" and w.startswith(x) and w[len(x):] in self.known) \
-            or (cmd == "deletesuf"  and w.endswith(x) and w[:-len(x)] in self.known) \
+            or (cmd == "deletepref" and w[len(x):] in self.known) \
+            or (cmd == "deletesuf"  and w[:-len(x)] in self.known) \
             or (cmd == "goodleft"   and x == next[0]) \
             or (cmd == "goodright"  and x == previous[0]):
                 token[1] = pos
@@ -809,7 +1285,7 @@ class Morphology(lazylist):
             r = [tagged, affix, "f" + cmd.lstrip("f"), tag, "x"]
         else:
             r = [affix, cmd.lstrip("f"), tag, "x"]
-        lazylist.insert(self, i, r)
+        self._modify("insert", i, r)
 
     def append(self, *args, **kwargs):
         self.insert(len(self) - 1, *args, **kwargs)
@@ -822,13 +1298,43 @@ class Morphology(lazylist):
 # Brill's algorithm generates contextual rules in the following format:
 # VBD VB PREVTAG TO => unknown word tagged VBD changes to VB if preceded by a word tagged TO.
 
+# Each command is compiled to a function(tokens, i, x, y) that returns True if the rule fires.
+_CONTEXT = {
+           "prevtag": lambda t, i, x, y: x ==  t[i - 1][1],
+           "nexttag": lambda t, i, x, y: x ==  t[i + 1][1],
+          "prev2tag": lambda t, i, x, y: x ==  t[i - 2][1],
+          "next2tag": lambda t, i, x, y: x ==  t[i + 2][1],
+       "prev1or2tag": lambda t, i, x, y: x in (t[i - 1][1], t[i - 2][1]),
+       "next1or2tag": lambda t, i, x, y: x in (t[i + 1][1], t[i + 2][1]),
+    "prev1or2or3tag": lambda t, i, x, y: x in (t[i - 1][1], t[i - 2][1], t[i - 3][1]),
+    "next1or2or3tag": lambda t, i, x, y: x in (t[i + 1][1], t[i + 2][1], t[i + 3][1]),
+       "surroundtag": lambda t, i, x, y: x ==  t[i - 1][1] and y == t[i + 1][1],
+             "curwd": lambda t, i, x, y: x ==  t[i + 0][0],
+            "prevwd": lambda t, i, x, y: x ==  t[i - 1][0],
+            "nextwd": lambda t, i, x, y: x ==  t[i + 1][0],
+        "prev1or2wd": lambda t, i, x, y: x in (t[i - 1][0], t[i - 2][0]),
+        "next1or2wd": lambda t, i, x, y: x in (t[i + 1][0], t[i + 2][0]),
+         "prevwdtag": lambda t, i, x, y: x ==  t[i - 1][0] and y == t[i - 1][1],
+         "nextwdtag": lambda t, i, x, y: x ==  t[i + 1][0] and y == t[i + 1][1],
+         "wdprevtag": lambda t, i, x, y: x ==  t[i - 1][1] and y == t[i + 0][0],
+         "wdnexttag": lambda t, i, x, y: x ==  t[i + 0][0] and y == t[i + 1][1],
+         "wdand2aft": lambda t, i, x, y: x ==  t[i + 0][0] and y == t[i + 2][0],
+      "wdand2tagbfr": lambda t, i, x, y: x ==  t[i - 2][1] and y == t[i + 0][0],
+      "wdand2tagaft": lambda t, i, x, y: x ==  t[i + 0][0] and y == t[i + 2][1],
+           "lbigram": lambda t, i, x, y: x ==  t[i - 1][0] and y == t[i + 0][0],
+           "rbigram": lambda t, i, x, y: x ==  t[i + 0][0] and y == t[i + 1][0],
+        "prevbigram": lambda t, i, x, y: x ==  t[i - 2][1] and y == t[i - 1][1],
+        "nextbigram": lambda t, i, x, y: x ==  t[i + 1][1] and y == t[i + 2][1],
+}
 
-class Context(lazylist):
+
+class Context(_CompiledRules):
 
     def __init__(self, path=""):
         """ A list of rules based on context (preceding and following words).
         """
         self._path = path
+        self._compiled = None
         self._cmd = set((
                "prevtag", # Preceding word is tagged x.
                "nexttag", # Following word is tagged x.
@@ -867,46 +1373,46 @@ class Context(lazylist):
         # ["VBD", "VB", "PREVTAG", "TO"]
         list.extend(self, (x.split() for x in _read(self._path)))
 
+    def _compile(self):
+        """ Returns a dictionary of (tag, [(function, x, y, tag2), ...])-items,
+            with for each tag the rules that can fire on a word with that tag,
+            in reverse order (the last rule that fires determines the tag).
+        """
+        if self._compiled is not None:
+            return self._compiled
+        a = []
+        for r in self:
+            f = _CONTEXT.get(r[2].lower()) if len(r) > 2 else None
+            if f is not None:
+                a.append((r[0], (f, r[3] if len(r) > 3 else "", r[4] if len(r) > 4 else "", r[1])))
+        # Rules for any tag (*) are merged into the rules for each tag.
+        index = dict((tag, []) for tag, r in a)
+        index.setdefault("*", [])
+        for tag, r in a:
+            for k in (index if tag == "*" else (tag,)):
+                index[k].append(r)
+        for k in index:
+            index[k].reverse()
+        self._compiled = index
+        return index
+
     def apply(self, tokens):
         """ Applies contextual rules to the given list of tokens,
             where each token is a [word, tag] list.
         """
         o = [("STAART", "STAART")] * 3 # Empty delimiters for look ahead/back.
         t = o + tokens + o
-        for i, token in enumerate(t):
-            for r in self:
-                if token[1] == "STAART":
-                    continue
-                if token[1] != r[0] and r[0] != "*":
-                    continue
-                cmd, x, y = r[2], r[3], r[4] if len(r) > 4 else ""
-                cmd = cmd.lower()
-                if (cmd == "prevtag"        and x ==  t[i - 1][1]) \
-                or (cmd == "nexttag"        and x ==  t[i + 1][1]) \
-                or (cmd == "prev2tag"       and x ==  t[i - 2][1]) \
-                or (cmd == "next2tag"       and x ==  t[i + 2][1]) \
-                or (cmd == "prev1or2tag"    and x in (t[i - 1][1], t[i - 2][1])) \
-                or (cmd == "next1or2tag"    and x in (t[i + 1][1], t[i + 2][1])) \
-                or (cmd == "prev1or2or3tag" and x in (t[i - 1][1], t[i - 2][1], t[i - 3][1])) \
-                or (cmd == "next1or2or3tag" and x in (t[i + 1][1], t[i + 2][1], t[i + 3][1])) \
-                or (cmd == "surroundtag"    and x ==  t[i - 1][1] and y == t[i + 1][1]) \
-                or (cmd == "curwd"          and x ==  t[i + 0][0]) \
-                or (cmd == "prevwd"         and x ==  t[i - 1][0]) \
-                or (cmd == "nextwd"         and x ==  t[i + 1][0]) \
-                or (cmd == "prev1or2wd"     and x in (t[i - 1][0], t[i - 2][0])) \
-                or (cmd == "next1or2wd"     and x in (t[i + 1][0], t[i + 2][0])) \
-                or (cmd == "prevwdtag"      and x ==  t[i - 1][0] and y == t[i - 1][1]) \
-                or (cmd == "nextwdtag"      and x ==  t[i + 1][0] and y == t[i + 1][1]) \
-                or (cmd == "wdprevtag"      and x ==  t[i - 1][1] and y == t[i + 0][0]) \
-                or (cmd == "wdnexttag"      and x ==  t[i + 0][0] and y == t[i + 1][1]) \
-                or (cmd == "wdand2aft"      and x ==  t[i + 0][0] and y == t[i + 2][0]) \
-                or (cmd == "wdand2tagbfr"   and x ==  t[i - 2][1] and y == t[i + 0][0]) \
-                or (cmd == "wdand2tagaft"   and x ==  t[i + 0][0] and y == t[i + 2][1]) \
-                or (cmd == "lbigram"        and x ==  t[i - 1][0] and y == t[i + 0][0]) \
-                or (cmd == "rbigram"        and x ==  t[i + 0][0] and y == t[i + 1][0]) \
-                or (cmd == "prevbigram"     and x ==  t[i - 2][1] and y == t[i - 1][1]) \
-                or (cmd == "nextbigram"     and x ==  t[i + 1][1] and y == t[i + 2][1]):
-                    t[i] = [t[i][0], r[1]]
+        index = self._compile()
+        default = index["*"]
+        for i in range(len(o), len(t) - len(o)):
+            if t[i][1] == "STAART":
+                continue
+            # Rules only look at the current word, not the current tag,
+            # so the first rule that fires (in reverse order) wins.
+            for f, x, y, tag in index.get(t[i][1], default):
+                if f(t, i, x, y):
+                    t[i] = [t[i][0], tag]
+                    break
         return t[len(o):-len(o)]
 
     def insert(self, i, tag1, tag2, cmd="prevtag", x=None, y=None):
@@ -919,7 +1425,7 @@ class Context(lazylist):
         if " > " in tag1 and not x and not y:
             x, tag1 = tag1.split(" > ")
             cmd = "nexttag"
-        lazylist.insert(self, i, [tag1, tag2, cmd, x or "", y or ""])
+        self._modify("insert", i, [tag1, tag2, cmd, x or "", y or ""])
 
     def append(self, *args, **kwargs):
         self.insert(len(self) - 1, *args, **kwargs)
@@ -956,6 +1462,8 @@ class Entities(lazydict):
     def load(self):
         # ["Alexander", "the", "Great", "PERS"]
         # {"alexander": [["alexander", "the", "great", "pers"], ...]}
+        if self._load_table(self._path):
+            return
         for x in _read(self.path):
             x = [x.lower() for x in x.split()]
             dict.setdefault(self, x[0], []).append(x)
@@ -1189,15 +1697,7 @@ class Parser(object):
             return s
         # Construct TaggedString.format.
         # (this output is usable by tree.Text).
-        format = ["word"]
-        if tags:
-            format.append("part-of-speech")
-        if chunks:
-            format.extend(("chunk", "preposition"))
-        if relations:
-            format.append("relation")
-        if lemmata:
-            format.append("lemma")
+        format = _token_format(tags, chunks, relations, lemmata)
         # Collapse raw list.
         # Sentences are separated by newlines, tokens by spaces, tags by slashes.
         # Slashes in words are encoded with &slash;
@@ -1210,6 +1710,84 @@ class Parser(object):
         s = TaggedString(s, format, language=kwargs.get("language", self.language))
         return s
 
+    def parsetree(self, s, tokenize=True, tags=True, chunks=True, relations=False, lemmata=False, encoding="utf-8", **kwargs):
+        """ Takes a string (sentences) and returns a parse tree (Text).
+            The Sentence, Chunk and Word objects are constructed directly from the tagged tokens,
+            without formatting them as a slash-formatted TaggedString in between.
+            Optional parameters are passed to Parser.parse().
+        """
+        kwargs["collapse"] = False
+        kwargs.pop("split", None)
+        s = self.parse(s, tokenize, tags, chunks, relations, lemmata, encoding, **kwargs)
+        return Text(s,
+               token = _token_format(tags, chunks, relations, lemmata),
+            language = kwargs.get("language", self.language))
+
+    def parse_many(self, strings, processes=1, chunksize=64, stats=None, **kwargs):
+        """ Returns an iterator of tagged Unicode strings (TaggedString), one for each string
+            in the given iterable, in the same order.
+            With processes > 1 (or None = the number of CPU's), strings are parsed in a pool
+            of worker processes. The parser (lexicon, context, morphology, model) is handed to
+            each worker once, and strings are sent to the workers in batches of chunksize.
+            The optional stats dictionary is updated with the number of documents,
+            the elapsed time (seconds) and the throughput (documents per second).
+            Optional parameters are passed to Parser.parse().
+        """
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        if stats is None:
+            stats = {}
+        stats.update(documents=0, time=0.0, throughput=0.0)
+        t = time.time()
+        if processes <= 1:
+            iterator = (self.parse(s, **kwargs) for s in strings)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(processes, _parse_many_init, (self, kwargs))
+            iterator = pool.imap(_parse_many_worker, strings, chunksize)
+        try:
+            for s in iterator:
+                stats["documents"] += 1
+                stats["time"] = time.time() - t
+                stats["throughput"] = stats["documents"] / (stats["time"] or 1e-9)
+                yield s
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+# Parser.parse_many() worker processes each hold a reference to the parser.
+# With the default "fork" start method, the lexicon etc. are shared copy-on-write;
+# otherwise they are pickled and loaded only once per worker.
+_parse_many_parser = None
+_parse_many_kwargs = {}
+
+
+def _parse_many_init(parser, kwargs):
+    global _parse_many_parser
+    global _parse_many_kwargs
+    _parse_many_parser = parser
+    _parse_many_kwargs = kwargs
+
+
+def _parse_many_worker(s):
+    return _parse_many_parser.parse(s, **_parse_many_kwargs)
+
+
+def _token_format(tags=True, chunks=True, relations=False, lemmata=False):
+    """ Returns the order of tags in each token parsed by Parser.parse().
+    """
+    format = ["word"]
+    if tags:
+        format.append("part-of-speech")
+    if chunks:
+        format.extend(("chunk", "preposition"))
+    if relations:
+        format.append("relation")
+    if lemmata:
+        format.append("lemma")
+    return format
+
 #--- TAGGED STRING ---------------------------------------------------------------------------------
 # Pattern.parse() returns a TaggedString: a Unicode string with "tags" and "language" attributes.
 # The pattern.text.tree.Text class uses this attribute to determine the token format and
@@ -1382,87 +1960,203 @@ RE_SARCASM = re.compile(r"\( ?\! ?\)")
 EOS = "END-OF-SENTENCE"
 
 
+# Emoticons that were split into separate tokens (e.g., ": -)") are joined by find_tokens().
+# If a sentence contains none of these bigrams, RE_EMOTICONS.sub() has nothing to join.
+_RE_EMOTICONS_SPLIT = set((e[i], e[i + 1]) for v in EMOTICONS.values() for e in v for i in range(len(e) - 1))
+_RE_EMOTICONS_SPLIT = re.compile("|".join("%s (?:%s)" % (re.escape(a), "|".join(
+    re.escape(y) for x, y in _RE_EMOTICONS_SPLIT if x == a)) for a in set(x for x, y in _RE_EMOTICONS_SPLIT)))
+_RE_EMOJI_FIRST = re.compile("[%s]" % "".join(set(re.escape(e[0]) for v in EMOJI.values() for e in v)))
+
+# Unicode quotes are split from words.
+_QUOTES = ("“", "”", "‘", "’")
+
+# Sentence breaks: a series of periods (or ?!) between tokens, see _Tokenizer.sentences().
+_RE_EOS = r"(?<![^ ])(?:%s)(?: (?:%s))*(?![^ ])" % ((r"\.\.\.|\.|!|\?|" + re.escape(EOS),) * 2)
+_RE_EOS = re.compile(_RE_EOS)
+
+
+class _Tokenizer(object):
+
+    def __init__(self, punctuation=PUNCTUATION, abbreviations=ABBREVIATIONS, replace=replacements, linebreak=r"\n{2,}"):
+        """ A tokenizer for find_tokens() with the given punctuation, abbreviations, contractions
+            and linebreak compiled into regular expressions, so that a string is scanned once
+            for contractions, quotes and line breaks, and once for punctuation marks.
+            Only tokens that start or end with punctuation are handled in Python.
+        """
+        self._args = [copy.copy(a) for a in (punctuation, abbreviations, replace)]
+        self.punctuation = tuple(punctuation)
+        self.abbreviations = abbreviations
+        self.replace = replace
+        # Contractions without regular expression syntax are replaced in one pass,
+        # together with Unicode quotes and line breaks.
+        # Other contractions are replaced with re.sub() first.
+        self._replace = {}
+        self._re_replace = []
+        for a, b in replace.items():
+            if a and re.escape(a) == a and "\\" not in b and not re.search(r"\s|[%s]" % "".join(_QUOTES), a + b):
+                self._replace[a] = b
+            else:
+                self._re_replace.append((re.compile(a), b))
+        self._replace.update((q, " %s " % q) for q in _QUOTES)
+        self._normalize = re.compile("%s|%s" % (
+            "|".join(re.escape(a) for a in sorted(self._replace, key=len, reverse=True)), linebreak))
+        # Tokens that start or end with punctuation.
+        p = [re.escape(x) for x in self.punctuation if len(x) == 1]
+        if len(p) == len(self.punctuation) > 0:
+            p = "[%s]" % "".join(p)
+            self._punctuation = re.compile(r"(?<![^ ])(?:%s[^ ]*|[^ ]*%s)(?![^ ])" % (p, p))
+        elif self.punctuation:
+            self._punctuation = re.compile(r"[^ ]+")
+        else:
+            self._punctuation = None
+
+    def _valid(self, punctuation, abbreviations, replace):
+        return self._args == [punctuation, abbreviations, replace]
+
+    def _sub(self, m):
+        return self._replace.get(m.group(0), " %s " % EOS)
+
+    def _split(self, m):
+        """ Returns the given token match with punctuation marks split off (if any).
+            Handles common cases of abbreviations (e.g., etc., ...).
+        """
+        t = m.group(0)
+        punctuation, replace, tokens, tail = self.punctuation, self.replace, [], []
+        if not RE_MENTION.match(t):
+            while t.startswith(punctuation) and \
+              t not in replace:
+                # Split leading punctuation.
+                tokens.append(t[0]); t = t[1:]
+        while t.endswith(punctuation) and \
+          t not in replace:
+            # Split trailing punctuation.
+            if t.endswith(punctuation) and not t.endswith("."):
+                tail.append(t[-1]); t = t[:-1]
+            # Split ellipsis (...) before splitting period.
+            if t.endswith("..."):
+                tail.append("..."); t = t[:-3].rstrip(".")
+            # Split period (if not an abbreviation).
+            if t.endswith("."):
+                if t in self.abbreviations or \
+                  RE_ABBR1.match(t) is not None or \
+                  RE_ABBR2.match(t) is not None or \
+                  RE_ABBR3.match(t) is not None:
+                    break
+                else:
+                    tail.append(t[-1]); t = t[:-1]
+        if t != "":
+            tokens.append(t)
+        tokens.extend(reversed(tail))
+        return " ".join(tokens)
+
+    def tokens(self, string):
+        """ Returns a string of space-separated tokens for the given string,
+            where paragraph breaks are replaced by the EOS marker.
+        """
+        # Handle replacements (contractions).
+        for a, b in self._re_replace:
+            string = a.sub(b, string)
+        # Handle Unicode quotes + paragraph line breaks.
+        if "\r\n" in string:
+            string = string.replace("\r\n", "\n")
+        string = self._normalize.sub(self._sub, string)
+        # Collapse whitespace.
+        string = " ".join(string.split())
+        # Handle punctuation marks.
+        if self._punctuation is not None:
+            string = self._punctuation.sub(self._split, string)
+        return string
+
+    def sentences(self, string, start=0, final=True):
+        """ Returns a (sentences, rest, start)-tuple for the given string of tokens.
+            Periods (or ?!) mark the end of a sentence, together with any periods that follow.
+            If final=False, the rest is the string after the last sentence
+            (which may continue), to be scanned from the given start offset.
+        """
+        a, i = [], 0
+        for m in _RE_EOS.finditer(string, start):
+            j = m.end()
+            if j == len(string) and not final:
+                return a, string[i:], m.start() - i
+            s = string[i:j]
+            if EOS in s:
+                s = " ".join(t for t in s.split(" ") if t != EOS)
+            if s:
+                a.append(self._format(s))
+            i = j + 1
+        if final and i < len(string):
+            a.append(self._format(string[i:]))
+        return a, string[i:], len(string) - i
+
+    def _format(self, s):
+        """ Returns the given sentence with emoticons, emoji and sarcasm marks as tokens.
+        """
+        # Handle sarcasm (!) + emoticons.
+        if "!" in s and "(" in s:
+            s = RE_SARCASM.sub("(!)", s)
+        if _RE_EMOTICONS_SPLIT.search(s) is not None:
+            s = RE_EMOTICONS.sub(
+                lambda m: m.group(1).replace(" ", "") + m.group(2), s)
+        # Handle emoji.
+        if _RE_EMOJI_FIRST.search(s) is not None:
+            s = RE_EMOJI.sub(
+                lambda m: (m.group(1) or " ") + m.group(2) + (m.group(3) or " "), s)
+            s = s.replace("  ", " ").strip()
+        return s
+
+    def __call__(self, chunks, size=65536):
+        """ Returns an iterator of sentences for the given iterable of strings,
+            tokenized in blocks of the given size (at whitespace).
+        """
+        b, n, s, k = [], 0, "", 0
+        for chunk in chunks:
+            b.append(chunk)
+            n += len(chunk)
+            if n >= size:
+                string = "".join(b)
+                # Tokenize up to the last token (which may continue in the next chunk).
+                m = re.search(r"\s(\S+\s*)\Z", string)
+                if m is not None:
+                    b, n = [string[m.start(1):]], len(string) - m.start(1)
+                    a, s, k = self.sentences((s + " " + self.tokens(string[:m.start(1)])).strip(), k, final=False)
+                    for sentence in a:
+                        yield sentence
+        a, s, k = self.sentences((s + " " + self.tokens("".join(b))).strip(), k)
+        for sentence in a:
+            yield sentence
+
+_tokenizers = {}
+
+
+def _tokenizer(punctuation=PUNCTUATION, abbreviations=ABBREVIATIONS, replace=replacements, linebreak=r"\n{2,}"):
+    """ Returns a (cached) _Tokenizer for the given arguments.
+    """
+    k = (id(punctuation), id(abbreviations), id(replace), linebreak)
+    t = _tokenizers.get(k)
+    if t is None or not t._valid(punctuation, abbreviations, replace):
+        if len(_tokenizers) > 100:
+            _tokenizers.clear()
+        t = _tokenizers[k] = _Tokenizer(punctuation, abbreviations, replace, linebreak)
+    return t
+
+
 def find_tokens(string, punctuation=PUNCTUATION, abbreviations=ABBREVIATIONS, replace=replacements, linebreak=r"\n{2,}"):
     """ Returns a list of sentences. Each sentence is a space-separated string of tokens (words).
         Handles common cases of abbreviations (e.g., etc., ...).
         Punctuation marks are split from other words. Periods (or ?!) mark the end of a sentence.
         Headings without an ending period are inferred by line breaks.
     """
-    # Handle punctuation.
-    punctuation = tuple(punctuation)
-    # Handle replacements (contractions).
-    for a, b in replace.items():
-        string = re.sub(a, b, string)
-    # Handle Unicode quotes.
-    if isinstance(string, str):
-        string = string.replace("“", " “ ")
-        string = string.replace("”", " ” ")
-        string = string.replace("‘", " ‘ ")
-        string = string.replace("’", " ’ ")
-    # Collapse whitespace.
-    string = re.sub("\r\n", "\n", string)
-    string = re.sub(linebreak, " %s " % EOS, string)
-    string = re.sub(r"\s+", " ", string)
-    tokens = []
-    # Handle punctuation marks.
-    for t in TOKEN.findall(string + " "):
-        if len(t) > 0:
-            tail = []
-            if not RE_MENTION.match(t):
-                while t.startswith(punctuation) and \
-                  t not in replace:
-                    # Split leading punctuation.
-                    if t.startswith(punctuation):
-                        tokens.append(t[0]); t = t[1:]
-            if not False:
-                while t.endswith(punctuation) and \
-                  t not in replace:
-                    # Split trailing punctuation.
-                    if t.endswith(punctuation) and not t.endswith("."):
-                        tail.append(t[-1]); t = t[:-1]
-                    # Split ellipsis (...) before splitting period.
-                    if t.endswith("..."):
-                        tail.append("..."); t = t[:-3].rstrip(".")
-                    # Split period (if not an abbreviation).
-                    if t.endswith("."):
-                        if t in abbreviations or \
-                          RE_ABBR1.match(t) is not None or \
-                          RE_ABBR2.match(t) is not None or \
-                          RE_ABBR3.match(t) is not None:
-                            break
-                        else:
-                            tail.append(t[-1]); t = t[:-1]
-            if t != "":
-                tokens.append(t)
-            tokens.extend(reversed(tail))
-    # Handle citations (periods + quotes).
-    if isinstance(string, str):
-        quotes = ("'", "\"", "”", "’")
-    else:
-        quotes = ("'", "\"")
-    # Handle sentence breaks (periods, quotes, parenthesis).
-    sentences, i, j = [[]], 0, 0
-    while j < len(tokens):
-        if tokens[j] in ("...", ".", "!", "?", EOS):
-            while j < len(tokens) \
-              and (tokens[j] in ("...", ".", "!", "?", EOS) or tokens[j] in quotes):
-                if tokens[j] in quotes and sentences[-1].count(tokens[j]) % 2 == 0:
-                    break # Balanced quotes.
-                j += 1
-            sentences[-1].extend(t for t in tokens[i:j] if t != EOS)
-            sentences.append([])
-            i = j
-        j += 1
-    # Handle emoticons.
-    sentences[-1].extend(tokens[i:j])
-    sentences = (" ".join(s) for s in sentences if len(s) > 0)
-    sentences = (RE_SARCASM.sub("(!)", s) for s in sentences)
-    sentences = [RE_EMOTICONS.sub(
-        lambda m: m.group(1).replace(" ", "") + m.group(2), s) for s in sentences]
-    sentences = [RE_EMOJI.sub(
-        lambda m: (m.group(1) or " ") + m.group(2) + (m.group(3) or " "), s) for s in sentences]
-    sentences = [s.replace("  ", " ").strip() for s in sentences]
-    return sentences
+    return list(_tokenizer(punctuation, abbreviations, replace, linebreak)((string,)))
+
+
+def find_tokens_iter(string, punctuation=PUNCTUATION, abbreviations=ABBREVIATIONS, replace=replacements, linebreak=r"\n{2,}"):
+    """ Returns an iterator of sentences, like find_tokens(), for the given string
+        or iterable of strings (e.g., the lines in an open file).
+        Large inputs are tokenized in blocks of 64KB, yielding each sentence once it is complete.
+    """
+    if isinstance(string, (str, bytes)):
+        string = (string,)
+    return _tokenizer(punctuation, abbreviations, replace, linebreak)(string)
 
 #--- PART-OF-SPEECH TAGGER -------------------------------------------------------------------------
 
@@ -1598,14 +2292,21 @@ def find_chunks(tagged, language="en"):
     """
     chunked = [x for x in tagged]
     tags = "".join("%s%s" % (tag, SEPARATOR) for token, tag in tagged)
+    # Offsets of separators in the tags-string.
+    # Number of preceding separators = number of preceding tokens.
+    if any(SEPARATOR in tag for token, tag in tagged):
+        offsets = [i for i, ch in enumerate(tags) if ch == SEPARATOR]
+    else:
+        offsets, i = [], -1
+        for token, tag in tagged:
+            i += len(tag) + 1
+            offsets.append(i)
     # Use Germanic or Romance chunking rules according to given language.
     for tag, rule in CHUNKS[int(language in ("ca", "es", "fr", "it", "pt", "ro"))]:
         for m in rule.finditer(tags):
             # Find the start of chunks inside the tags-string.
-            # Number of preceding separators = number of preceding tokens.
-            i = m.start()
-            j = tags[:i].count(SEPARATOR)
-            n = m.group(0).count(SEPARATOR)
+            j = bisect_left(offsets, m.start())
+            n = bisect_left(offsets, m.end()) - j
             for k in range(j, j + n):
                 if len(chunked[k]) == 3:
                     continue
@@ -2315,6 +3016,8 @@ class Score(tuple):
 
 class Sentiment(lazydict):
 
+    _codec = "p"
+
     def __init__(self, path="", language=None, synset=None, confidence=None, **kwargs):
         """ A dictionary of words (adjectives) and polarity scores (positive/negative).
             The value for each word is a dictionary of part-of-speech tags.
@@ -2353,6 +3056,8 @@ class Sentiment(lazydict):
         # <word form="damnmit" polarity="-0.75" subjectivity="1.0" label="profanity" />
         if not path:
             path = self._path
+            if self._load_table(path):
+                return
         if not os.path.exists(path):
             return
         words, synsets, labels = {}, {}, {}
@@ -2391,6 +3096,30 @@ class Sentiment(lazydict):
         dict.update(self.labeler, labels)
         dict.update(self._synsets, synsets)
 
+    def _load_table(self, path):
+        tables = _tables(path)
+        if tables is None:
+            return False
+        self._table = tables[""]
+        self._synsets = tables["synsets"]
+        self._language = tables["meta"].get("language") or self._language
+        dict.update(self.labeler, tables["labeler"].items())
+        return True
+
+    def _untable(self):
+        lazydict._untable(self)
+        self._synsets = dict(self._synsets.items())
+
+    def _tables(self):
+        if dict.__len__(self) == 0 and self._table is None:
+            self.load()
+        return [
+            (""       , "p", self),
+            ("synsets", "j", self._synsets),
+            ("labeler", "s", self.labeler),
+            ("meta"   , "s", {"language": self._language or ""})
+        ]
+
     def synset(self, id, pos=ADJECTIVE):
         """ Returns a (polarity, subjectivity)-tuple for the given synset id.
             For example, the adjective "horrible" has id 193480 in WordNet:
@@ -2406,7 +3135,7 @@ class Sentiment(lazydict):
                 id = "a-" + id
             if pos == ADVERB:
                 id = "r-" + id
-        if dict.__len__(self) == 0:
+        if dict.__len__(self) == 0 and self._table is None:
             self.load()
         try:
             return tuple(self._synsets[id])[:2]
@@ -2610,6 +3339,8 @@ class Spelling(lazydict):
     # cyrillic alphabet
     CYRILLIC = 'абвгдеёжзийклмнопрстуфхцчшщьыъэюя'
 
+    _codec = "i"
+
     def __init__(self, path="", alphabet='LATIN'):
         self._path = path
         if alphabet == 'CYRILLIC':
@@ -2618,6 +3349,8 @@ class Spelling(lazydict):
             self.alphabet = Spelling.LATIN
 
     def load(self):
+        if self._load_table(self._path):
+            return
         for x in _read(self._path):
             x = x.split()
             dict.__setitem__(self, x[0], int(x[1]))
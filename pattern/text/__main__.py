@@ -0,0 +1,25 @@
+#### PATTERN | TEXT | COMMAND-LINE #################################################################
+# Copyright (c) 2010 University of Antwerp, Belgium
+# Author: Tom De Smedt <tom@organisms.be>
+# License: BSD (see LICENSE.txt for details).
+# http://www.clips.ua.ac.be/pages/pattern
+
+####################################################################################################
+# Compiles the lexicon, frequency, entities, sentiment and spelling files of the given languages
+# to memory-mapped tables (e.g., en-lexicon.txt => en-lexicon.bin), which load much faster:
+# python -m pattern.text compile en nl
+
+from __future__ import print_function
+from __future__ import absolute_import
+
+import sys
+
+from pattern.text import LANGUAGES, compile_tables
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "compile":
+        print("usage: python -m pattern.text compile [language ...]")
+        sys.exit(1)
+    for language in sys.argv[2:] or LANGUAGES:
+        for path in compile_tables(language):
+            print(path)
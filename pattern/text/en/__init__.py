@@ -76,12 +76,23 @@ from pattern.text.en.modality import (
     negated
 )
 # Import all submodules.
+# WordNet (NLTK) is slow to import and is imported on first use of en.wordnet (Python 3.7+).
 from pattern.text.en import inflect
-from pattern.text.en import wordnet
 from pattern.text.en import wordlist
 
+if sys.version_info < (3, 7):
+    from pattern.text.en import wordnet
+
 sys.path.pop(0)
 
+
+def __getattr__(name):
+    if name == "wordnet":
+        import importlib
+        globals()["wordnet"] = m = importlib.import_module("pattern.text.en.wordnet")
+        return m
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
 #--- ENGLISH PARSER --------------------------------------------------------------------------------
 
 
@@ -169,10 +180,17 @@ def parse(s, *args, **kwargs):
     return parser.parse(s, *args, **kwargs)
 
 
+def parse_many(strings, processes=1, chunksize=64, stats=None, **kwargs):
+    """ Returns an iterator of tagged Unicode strings, one for each given string,
+        optionally parsed in parallel by the given number of processes.
+    """
+    return parser.parse_many(strings, processes, chunksize, stats, **kwargs)
+
+
 def parsetree(s, *args, **kwargs):
     """ Returns a parsed Text from the given string.
     """
-    return Text(parse(s, *args, **kwargs))
+    return parser.parsetree(s, *args, **kwargs)
 
 
 def tree(s, token=[WORD, POS, CHUNK, PNP, REL, LEMMA]):
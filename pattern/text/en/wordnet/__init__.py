@@ -45,33 +45,79 @@ except:
 #os.environ["WNHOME"] = os.path.join(MODULE, CORPUS)
 #os.environ["WNSEARCHDIR"] = os.path.join(MODULE, CORPUS, "dict")
 
-import nltk
-from nltk.corpus import wordnet as wn
-from nltk.corpus import sentiwordnet as swn
-from nltk.corpus import wordnet_ic as wn_ic
-from nltk.corpus.reader.wordnet import Synset as WordNetSynset
-
-# Make sure the necessary corpora are downloaded to the local drive
-for token in ("wordnet", "wordnet_ic", "sentiwordnet"):
-    try:
-        nltk.data.find("corpora/" + token)
-    except LookupError:
+# NLTK and its corpora are imported on first use,
+# so that "import pattern.en" does not have to wait for them.
+_corpora = {}
+
+
+def _corpus(name):
+    """ Returns the NLTK corpus reader with the given name (wordnet, wordnet_ic, sentiwordnet).
+        The corpus is downloaded to the local drive if necessary.
+    """
+    if name not in _corpora:
+        import nltk
+        import nltk.corpus
+        # Make sure the necessary corpus is downloaded to the local drive
         try:
-            nltk.download(token, quiet = True, raise_on_error = True)
-        except ValueError:
-            # Sometimes there are problems with the default index.xml URL. Then we will try this...
-            from nltk.downloader import Downloader as NLTKDownloader
-            d = NLTKDownloader("http://nltk.github.com/nltk_data/")
-            d.download(token, quiet = True, raise_on_error = True)
-
-# Use the Brown corpus for calculating information content (IC)
-brown_ic = wn_ic.ic('ic-brown.dat')
-IC_CORPUS, IC_MAX = brown_ic, {}
-for key in IC_CORPUS:
-    IC_MAX[key] = max(IC_CORPUS[key].values())
-
-# This will hold the WordNet version
-VERSION = wn.get_version() or "3.0"
+            nltk.data.find("corpora/" + name)
+        except LookupError:
+            try:
+                nltk.download(name, quiet = True, raise_on_error = True)
+            except ValueError:
+                # Sometimes there are problems with the default index.xml URL. Then we will try this...
+                from nltk.downloader import Downloader as NLTKDownloader
+                d = NLTKDownloader("http://nltk.github.com/nltk_data/")
+                d.download(name, quiet = True, raise_on_error = True)
+        _corpora[name] = getattr(nltk.corpus, name)
+    return _corpora[name]
+
+
+class _LazyCorpus(object):
+
+    def __init__(self, name):
+        """ A proxy for the NLTK corpus reader with the given name,
+            loaded on first attribute access (e.g., wn.synsets).
+        """
+        self._name = name
+
+    def __getattr__(self, k):
+        return getattr(_corpus(self.__dict__["_name"]), k)
+
+wn    = _LazyCorpus("wordnet")
+swn   = _LazyCorpus("sentiwordnet")
+wn_ic = _LazyCorpus("wordnet_ic")
+
+_ic = None
+
+
+def _information_content():
+    """ Returns an (IC_CORPUS, IC_MAX)-tuple, where IC_CORPUS is the information content (IC)
+        of synsets in the Brown corpus and IC_MAX is the maximum IC for each part-of-speech.
+    """
+    global _ic
+    if _ic is None:
+        # Use the Brown corpus for calculating information content (IC)
+        IC_CORPUS = wn_ic.ic("ic-brown.dat")
+        IC_MAX = dict((key, max(IC_CORPUS[key].values())) for key in IC_CORPUS)
+        _ic = (IC_CORPUS, IC_MAX)
+    return _ic
+
+
+def __getattr__(name):
+    # Python 3.7+ loads IC_CORPUS, IC_MAX and VERSION on first use (PEP 562).
+    if name in ("IC_CORPUS", "brown_ic"):
+        return _information_content()[0]
+    if name == "IC_MAX":
+        return _information_content()[1]
+    if name == "VERSION":
+        # This will hold the WordNet version
+        return wn.get_version() or "3.0"
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+if sys.version_info < (3, 7):
+    brown_ic, IC_MAX = _information_content()
+    IC_CORPUS = brown_ic
+    VERSION = wn.get_version() or "3.0"
 
 #---------------------------------------------------------------------------------------------------
 
@@ -120,9 +166,10 @@ NOUN, VERB, ADJECTIVE, ADVERB = \
     NN, VB, JJ, RB = \
         "NN", "VB", "JJ", "RB"
 
-_pattern2wordnet = {NN : wn.NOUN, VB : wn.VERB, JJ : wn.ADJ, RB: wn.ADV}
+# NLTK wn.NOUN, wn.VERB, wn.ADJ, wn.ADV, wn.ADJ_SAT.
+_pattern2wordnet = {NN : "n", VB : "v", JJ : "a", RB: "r"}
 _wordnet2pattern = {v : k for k, v in _pattern2wordnet.items()}
-_wordnet2pattern[wn.ADJ_SAT] = JJ
+_wordnet2pattern["s"] = JJ
 
 
 def synsets(word, pos=NOUN):
@@ -166,6 +213,7 @@ class Synset(object):
     def __init__(self, synset):
         """ A set of synonyms that share a common meaning.
         """
+        from nltk.corpus.reader.wordnet import Synset as WordNetSynset
         if isinstance(synset, WordNetSynset):
             self._wnsynset = synset
         elif isinstance(synset, Synset):
@@ -328,13 +376,14 @@ class Synset(object):
             synsets("cat")[0].similarity(synsets("box")[0]) => 0.17.
         """
 
-        return self._wnsynset.lin_similarity(synset._wnsynset, IC_CORPUS)
+        return self._wnsynset.lin_similarity(synset._wnsynset, _information_content()[0])
 
     @property
     def ic(self):
         offset, pos = self.id, self.pos
         if pos in _pattern2wordnet:
             pos = _pattern2wordnet[pos]
+        IC_CORPUS, IC_MAX = _information_content()
         if pos in IC_CORPUS and offset in IC_CORPUS[pos]:
             return IC_CORPUS[pos][offset] / IC_MAX[pos]
         return None
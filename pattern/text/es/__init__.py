@@ -239,7 +239,7 @@ def parse(s, *args, **kwargs):
 def parsetree(s, *args, **kwargs):
     """ Returns a parsed Text from the given string.
     """
-    return Text(parse(s, *args, **kwargs))
+    return parser.parsetree(s, *args, **kwargs)
 
 
 def tree(s, token=[WORD, POS, CHUNK, PNP, REL, LEMMA]):
@@ -42,6 +42,11 @@ from io import open
 
 from itertools import chain
 
+try:
+    from sys import intern
+except ImportError:
+    intern = lambda s: s # Python 2 (Unicode strings can't be interned).
+
 try:
     from config import SLASH
     from config import WORD, POS, CHUNK, PNP, REL, ANCHOR, LEMMA
@@ -140,11 +145,39 @@ class Map(list):
 encode_entities = lambda string: string.replace("/", SLASH)
 decode_entities = lambda string: string.replace(SLASH, "/")
 
+#--- SLOTS -----------------------------------------------------------------------------------------
+# Parse tree nodes define __slots__ to save memory, with a __dict__ slot for user-defined attributes.
+# Pickle protocol 0 and 1 require __getstate__() for classes with __slots__ (e.g., Model.save()).
+
+
+def _getstate(self):
+    """ Returns a dictionary with the slot values (and attributes) of the given object.
+    """
+    state = dict(getattr(self, "__dict__", {}))
+    for cls in self.__class__.__mro__:
+        for k in cls.__dict__.get("__slots__", ()):
+            if k not in ("__dict__", "__weakref__"):
+                try:
+                    state[k] = cls.__dict__[k].__get__(self, cls)
+                except AttributeError: # Slot not set.
+                    pass
+    return state
+
+
+def _setstate(self, state):
+    for k, v in state.items():
+        setattr(self, k, v)
+
 #--- WORD ------------------------------------------------------------------------------------------
 
 
 class Word(object):
 
+    __slots__ = ("sentence", "index", "string", "lemma", "type", "chunk", "pnp", "_custom_tags", "__dict__")
+
+    __getstate__ = _getstate
+    __setstate__ = _setstate
+
     def __init__(self, sentence, string, lemma=None, type=None, index=0):
         """ A word in the sentence.
             - lemma: base form of the word; "was" => "be".
@@ -255,7 +288,7 @@ class Word(object):
 
     # User-defined tags are available as Word.[tag] attributes.
     def __getattr__(self, tag):
-        d = self.__dict__.get("_custom_tags", None)
+        d = self._custom_tags if tag != "_custom_tags" else None
         if d and tag in d:
             return d[tag]
         raise AttributeError("Word instance has no attribute '%s'" % tag)
@@ -284,6 +317,11 @@ class Word(object):
 
 class Tags(dict):
 
+    __slots__ = ("word",)
+
+    __getstate__ = _getstate
+    __setstate__ = _setstate
+
     def __init__(self, word, items=[]):
         """ A dictionary of custom word tags.
             A word may be annotated with its part-of-speech tag (e.g., "cat/NN"), 
@@ -312,6 +350,11 @@ class Tags(dict):
 
 class Chunk(object):
 
+    __slots__ = ("sentence", "words", "type", "relations", "pnp", "anchor", "attachments", "_conjunctions", "_modifiers", "__dict__")
+
+    __getstate__ = _getstate
+    __setstate__ = _setstate
+
     def __init__(self, sentence, words=[], type=None, role=None, relation=None):
         """ A list of words that make up a phrase in the sentence.
             - type: the phrase tag; "NP" => a noun phrase (e.g., "the black cat").
@@ -562,6 +605,8 @@ class Chunk(object):
 
 
 class Chink(Chunk):
+    __slots__ = ()
+
     def __repr__(self):
         return Chunk.__repr__(self).replace("Chunk(", "Chink(", 1)
 
@@ -570,6 +615,8 @@ class Chink(Chunk):
 
 class PNPChunk(Chunk):
 
+    __slots__ = ("chunks",)
+
     def __init__(self, *args, **kwargs):
         """ A chunk of chunks that make up a prepositional noun phrase (i.e., PP + NP).
             When the output of the parser includes PP-attachment,
@@ -617,6 +664,11 @@ DISJUNCT = OR = "OR"
 
 class Conjunctions(list):
 
+    __slots__ = ("anchor",)
+
+    __getstate__ = _getstate
+    __setstate__ = _setstate
+
     def __init__(self, chunk):
         """ Chunk.conjunctions is a list of other chunks participating in a conjunction.
             Each item in the list is a (chunk, conjunction)-tuple, with conjunction either AND or OR.
@@ -646,16 +698,25 @@ def _is_tokenstring(string):
 
 class Sentence(object):
 
+    __slots__ = (
+        "parent", "text", "language", "id", "token", "words", "chunks", "pnp", "relations",
+        "_anchors", "_relation", "_attachment", "_previous", "__dict__"
+    )
+
+    __getstate__ = _getstate
+    __setstate__ = _setstate
+
     def __init__(self, string="", token=[WORD, POS, CHUNK, PNP, REL, ANCHOR, LEMMA], language="en"):
         """ A nested tree of sentence words, chunks and prepositions.
-            The input is a tagged string from parse(). 
+            The input is a tagged string from parse(), 
+            or a list of tokens where each token is a list of tags.
             The order in which token tags appear can be specified.
         """
         # Extract token format from TokenString or TaggedString if possible.
         if _is_tokenstring(string):
             token, language = string.tags, getattr(string, "language", language)
         # Convert to Unicode.
-        if not isinstance(string, str):
+        if isinstance(string, bytes):
             for encoding in (("utf-8",), ("windows-1252",), ("utf-8", "ignore")):
                 try:
                     string = string.decode(*encoding)
@@ -676,9 +737,11 @@ class Sentence(object):
         self.relations   = {"SBJ": {}, "OBJ": {}, "VP": {}}
         # Split the slash-formatted token into the separate tags in the given order.
         # Append Word and Chunk objects according to the token's tags.
-        for chars in string.split(" "):
-            if chars:
-                self.append(*self.parse_token(chars, token))
+        if isinstance(string, str):
+            string = [chars for chars in string.split(" ") if chars]
+        for tags in string:
+            if len(tags) > 1 or any(tags):
+                self.append(*self.parse_token(tags, token))
 
     @property
     def word(self):
@@ -811,6 +874,7 @@ class Sentence(object):
             Returns a (word, lemma, type, chunk, role, relation, preposition, anchor, iob, custom)-tuple,
             which can be passed to Sentence.append(): Sentence.append(*Sentence.parse_token("cats/NNS/NP"))
             The custom value is a dictionary of (tag, value)-items of unrecognized tags in the token.
+            The token can also be a list of tags: Sentence.parse_token(["cats", "NNS", "NP"]).
         """
         p = {WORD: "",
                POS: None,
@@ -825,9 +889,17 @@ class Sentence(object):
         # Decode &slash; characters (usually in words and lemmata).
         # Assume None for missing tags (except the word itself, which defaults to an empty string).
         custom = {}
-        for k, v in zip(tags, token.split("/")):
+        if isinstance(token, str):
+            token = token.split("/")
+        if len(token) == len(tags):
+            tags = _zip(tags, token)
+        else:
+            tags = zip(tags, token)
+        for k, v in tags:
             if SLASH0 in v:
                 v = v.replace(SLASH, "/")
+            # Words and tags are shared between tokens (saves memory).
+            v = intern(v)
             if k == "pos":
                 k = POS
             if k not in p:
@@ -839,7 +911,7 @@ class Sentence(object):
         # I- marks inside of a chunk.
         ch = p[CHUNK]
         if ch is not None and ch.startswith(("B-", "I-")):
-            p[IOB], p[CHUNK] = ch[:1], ch[2:] # B-NP
+            p[IOB], p[CHUNK] = ch[:1], intern(ch[2:]) # B-NP
         # Split the role from the relation:
         # NP-SBJ-1 => relation id is 1 and role is SBJ,
         # VP-1 => relation id is 1 with no role.
@@ -1155,6 +1227,8 @@ class Sentence(object):
 
 class Slice(Sentence):
 
+    __slots__ = ("_start",)
+
     def __init__(self, *args, **kwargs):
         """ A portion of the sentence returned by Sentence.slice().
         """
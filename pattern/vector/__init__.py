@@ -50,13 +50,15 @@ except ImportError:
     import pickle
 
 import gzip
+import json
 import types
 
 from math import log, exp, sqrt, tanh
 from time import time
 from random import random, randint, uniform, choice, sample, seed
-from itertools import chain
-from bisect import insort
+from itertools import chain, islice
+from bisect import insort, bisect_left
+from array import array
 from operator import itemgetter
 from collections import defaultdict
 
@@ -105,8 +107,10 @@ def shi(i, base="0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
 
 def shuffled(iterable, **kwargs):
     """ Returns a copy of the given list with the items in random order.
+        With an optional seed, the order is the same each time.
     """
-    seed(kwargs.get("seed"))
+    if kwargs.get("seed") is not None:
+        seed(kwargs["seed"])
     return sorted(list(iterable), key=lambda x: random())
 
 
@@ -396,6 +400,62 @@ def character_ngrams(string="", n=3, top=None, threshold=0, exclude=[], **kwargs
 
 chngrams = character_ngrams
 
+#--- VOCABULARY ------------------------------------------------------------------------------------
+# A Vocabulary maps each term in a Model to an integer id.
+# Documents in a Model store their terms as parallel arrays of term ids and counts,
+# so that each term string is stored once per model instead of once per document.
+
+
+class Vocabulary(object):
+
+    def __init__(self, terms=[]):
+        """ A list of unique terms (e.g., words), where the index of a term is its id.
+        """
+        self.terms = [] # Id => term.
+        self._ids  = {} # Term => id.
+        for w in terms:
+            self.id(w)
+
+    @property
+    def ids(self):
+        """ Yields a dict of (term, id)-items (built on first access for a loaded vocabulary).
+        """
+        if self._ids is None:
+            self._ids = dict(zip(self.terms, range(len(self.terms))))
+        return self._ids
+
+    def id(self, term):
+        """ Returns the id of the given term (a new id if the term is not in the vocabulary).
+        """
+        i = self.ids.get(term)
+        if i is None:
+            i = self.ids[term] = len(self.terms)
+            self.terms.append(term)
+        return i
+
+    def get(self, term, default=None):
+        return self.ids.get(term, default)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __iter__(self):
+        return iter(self.terms)
+
+    def __contains__(self, term):
+        return term in self.ids
+
+    def __getitem__(self, i):
+        return self.terms[i]
+
+    def __getstate__(self):
+        # The term => id dictionary is rebuilt when unpickled.
+        return {"terms": self.terms}
+
+    def __setstate__(self, state):
+        self.terms = state["terms"]
+        self._ids = None
+
 #--- DOCUMENT --------------------------------------------------------------------------------------
 # A Document is a bag of words in which each word is a feature.
 # A Document is represented as a vector of weighted (TF-IDF) features.
@@ -413,14 +473,30 @@ def _uid():
     _UID += 1
     return _SESSION + "-" + str(_UID)
 
+
+def _isalnum(w):
+    """ Returns True if the given word is alphanumeric (default word filter in Document).
+    """
+    # A function instead of a lambda, so that it can be pickled (see corpus()).
+    return w.lstrip("'").isalnum()
+
 # Term relevance weight:
 TF, TFIDF, TF_IDF, BINARY = \
     "tf", "tf-idf", "tf-idf", "binary"
 
 
 class Document(object):
+
+    # Default for documents pickled before this attribute existed.
+    _version = None
+
+    # Terms interned in a Model.vocabulary, see Document._intern().
+    _ids        = None # Sorted array of term ids.
+    _counts     = None # Array of counts, one for each term id.
+    _vocabulary = None # Vocabulary of the term ids.
+
     # Document(string = "",
-    #          filter = lambda w: w.lstrip("'").isalnum(),
+    #          filter = _isalnum,
     #     punctuation = PUNCTUATION,
     #             top = None,
     #       threshold = 0,
@@ -443,7 +519,7 @@ class Document(object):
             Stop words in the exclude list are excluded from the document.
             Only top words whose count exceeds the threshold are included in the document.        
         """
-        kwargs.setdefault("filter", lambda w: w.lstrip("'").isalnum())
+        kwargs.setdefault("filter", _isalnum)
         kwargs.setdefault("threshold", 0)
         kwargs.setdefault("dict", readonlydict)
         # A string of words: map to read-only dict of (word, count)-items.
@@ -504,7 +580,11 @@ class Document(object):
         self._language    = kwargs.get("language")
         self._description = kwargs.get("description", "")
         self._terms       = w                  # Dictionary of (word, count)-items.
+        self._ids         = None               # Array of term ids (in a Model).
+        self._counts      = None               # Array of term counts (in a Model).
+        self._vocabulary  = None               # Model.vocabulary of the term ids.
         self._vector      = v                  # Cached tf-idf vector.
+        self._version     = None               # Model version of the cached vector.
         self._count       = None               # Total number of words (minus stop words).
         self._model       = None               # Parent Model.
 
@@ -613,49 +693,114 @@ class Document(object):
 
     @property
     def terms(self):
+        """ Yields a read-only dict of (word, count)-items.
+            For a document in a Model, the dict is built from the interned term ids.
+        """
+        if self._terms is None:
+            return readonlydict(self._items())
         return self._terms
 
-    @property
-    def words(self):
-        return self._terms
+    words = terms
 
     @property
     def features(self):
-        return list(self._terms.keys())
+        return list(self)
 
     @property
     def count(self):
         # Yields the number of words in the document representation.
         # Cache the word count so we can reuse it when calculating tf.
         if not self._count:
-            self._count = sum(self.terms.values())
+            self._count = sum(self._counts if self._terms is None else self._terms.values())
         return self._count
 
     @property
     def wordcount(self):
         return self._count
 
+    def __getstate__(self):
+        # The cached vector of a document in a Model is not pickled,
+        # it is recalculated from the term counts when needed.
+        state = self.__dict__.copy()
+        if state.get("_terms") is None:
+            state["_vector"] = None
+        # The terms of a loaded document are a slice of the model arrays, see Model.load().
+        for k in ("_ids", "_counts"):
+            if isinstance(state.get(k), memoryview):
+                state[k] = array(state[k].format, state[k].tolist())
+        return state
+
+    def _intern(self, vocabulary):
+        """ Stores the document terms as an array of term ids in the given Vocabulary,
+            and an array of counts (instead of a dict with a string key for each term).
+        """
+        if self._vocabulary is vocabulary:
+            return
+        v = sorted((vocabulary.id(w), f) for w, f in self.terms.items())
+        f = [f for i, f in v]
+        if all(type(x) is int and -2**31 <= x < 2**31 for x in f):
+            f = array("i", f)
+        else:
+            try:
+                f = array("d", f)
+            except TypeError:
+                return
+        self._ids = array("i", [i for i, f in v])
+        self._counts = f
+        self._vocabulary = vocabulary
+        self._terms = None
+
+    def _index_of(self, word):
+        # Returns the index of the given word in Document._ids, or -1.
+        try:
+            i = self._vocabulary.ids.get(word)
+        except TypeError: # unhashable
+            return -1
+        if i is not None:
+            j = bisect_left(self._ids, i)
+            if j < len(self._ids) and self._ids[j] == i:
+                return j
+        return -1
+
+    def _items(self):
+        # Yields the (word, count)-items (without building a dict for a document in a Model).
+        if self._terms is None:
+            return zip(map(self._vocabulary.terms.__getitem__, self._ids), self._counts)
+        return self._terms.items()
+
     def __len__(self):
-        return len(self.terms)
+        return len(self._ids if self._terms is None else self._terms)
 
     def __iter__(self):
-        return iter(self.terms)
+        if self._terms is None:
+            return map(self._vocabulary.terms.__getitem__, self._ids)
+        return iter(self._terms)
 
     def __contains__(self, word):
-        return word in self.terms
+        if self._terms is None:
+            return self._index_of(word) >= 0
+        return word in self._terms
 
     def __getitem__(self, word):
-        return self.terms.__getitem__(word)
+        if self._terms is None:
+            i = self._index_of(word)
+            if i < 0:
+                raise KeyError(word)
+            return self._counts[i]
+        return self._terms.__getitem__(word)
 
     def get(self, word, default=None):
-        return self.terms.get(word, default)
+        if self._terms is None:
+            i = self._index_of(word)
+            return self._counts[i] if i >= 0 else default
+        return self._terms.get(word, default)
 
     def term_frequency(self, word):
         """ Returns the term frequency of a given word in the document (0.0-1.0).
             tf = number of occurences of the word / number of words in document.
             The more occurences of the word, the higher its relative tf weight.
         """
-        return float(self.terms.get(word, 0)) / (self.count or 1)
+        return float(self.get(word, 0)) / (self.count or 1)
 
     tf = term_frequency
 
@@ -700,23 +845,30 @@ class Document(object):
             The document vector is used to calculate similarity between two documents,
             for example in a clustering or classification algorithm.
         """
-        if not self._vector:
+        if not self._vector or self._model is not None and self._version != self._model._version:
             # See the Vector class below = a dict with extra functionality (copy, norm).
-            # When a document is added/deleted from a model, the cached vector is deleted.
+            # When a document is added/deleted from a model, the model version changes,
+            # and the cached vector is recalculated.
+            # The terms dict is built once (instead of a lookup for each term).
+            t = self.terms
+            n = self.count or 1
             w = getattr(self.model, "weight", TF)
             if w not in (TF, TFIDF, IG, INFOGAIN, GR, GAINRATIO, BINARY):
-                f = lambda w: float(self._terms[w]); w=None
+                f = lambda w: float(t[w]); w=None
             if w == BINARY:
-                f = lambda w: int(self._terms[w] > 0)
+                f = lambda w: int(t[w] > 0)
             if w == TF:
-                f = self.tf
+                f = lambda w: float(t[w]) / n
             if w == TFIDF:
-                f = self.tf_idf
+                def f(w, idf=self.model.idf):
+                    x = idf(w)
+                    return float(t[w]) / n * (1 if x is None else x)
             if w in (IG, INFOGAIN):
                 f = self.model.ig
             if w in (GR, GAINRATIO):
                 f = self.model.gr
-            self._vector = Vector(((w, f(w)) for w in self.terms), weight=w)
+            self._vector = Vector(((w, f(w)) for w in t), weight=w)
+            self._version = self._model._version if self._model is not None else None
         return self._vector
 
     @property
@@ -770,6 +922,111 @@ class Document(object):
 
 Bag = BagOfWords = BOW = Document
 
+#--- CORPUS ----------------------------------------------------------------------------------------
+# A corpus reader streams documents from a directory, a text file or an iterable,
+# as lists of (at most) batch Document objects. Words are counted in parallel processes.
+# Memory usage depends on the batch size, not on the size of the corpus:
+# m = Model()
+# for documents in corpus("reviews/", batch=1000, processes=4):
+#     m.extend(documents)
+
+
+def corpus(source, batch=1000, processes=1, encoding="utf-8", **kwargs):
+    """ Returns an iterator of lists of Document objects (at most batch per list) from:
+        - a directory: one document per file, with the subdirectory name as Document.type,
+        - a path pattern (e.g., "reviews/*.txt"): one document per file,
+        - a file path: one document per (non-empty) line,
+        - an iterable of strings, (string, type)-tuples or Document objects.
+        Optional parameters (e.g., stemmer, stopwords, language) are passed to each Document.
+        With processes > 1 (or None = all cores), words are counted in parallel (0 or 1 = serial).
+    """
+    items = _corpus_items(source, encoding, **kwargs)
+    pool = None
+    if processes not in (0, 1):
+        import multiprocessing
+        pool = multiprocessing.Pool(processes, _corpus_init, (kwargs,))
+    try:
+        while True:
+            # Only the current batch of strings is kept in memory.
+            b = list(islice(items, max(1, batch)))
+            if not b:
+                break
+            tasks = [x for x in b if not isinstance(x, Document)]
+            if pool is not None:
+                counts = pool.map(_corpus_task, tasks)
+            else:
+                counts = [_corpus_count(x, kwargs) for x in tasks]
+            counts = iter(counts)
+            yield [x if isinstance(x, Document) else
+                Document(next(counts), name=x[3], type=x[4], language=kwargs.get("language"))
+                    for x in b]
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+def _corpus_items(source, encoding="utf-8", **kwargs):
+    """ Yields (string, path, encoding, name, type)-tuples (or Document objects) from the given source.
+        With a file path instead of a string, the file is read in a worker process.
+    """
+    if isinstance(source, str) and os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            type = os.path.relpath(root, source).split(os.sep)[0]
+            type = type != os.curdir and type or None
+            for f in sorted(files):
+                if not f.startswith("."):
+                    f = os.path.join(root, f)
+                    yield (None, f, encoding, os.path.relpath(f, source), type)
+    elif isinstance(source, str) and re.search(r"[\*\?\[]", source):
+        for f in sorted(glob.glob(source)):
+            if os.path.isfile(f):
+                yield (None, f, encoding, f, None)
+    elif isinstance(source, str):
+        with open(source, "rb") as f:
+            for s in f:
+                s = decode_utf8(s, encoding).strip()
+                if s:
+                    yield (s, None, encoding, None, None)
+    else:
+        for x in source:
+            s, type = isinstance(x, tuple) and x or (x, None)
+            if isinstance(s, Document):
+                yield s
+            elif isinstance(s, (str, bytes)):
+                yield (s, None, encoding, None, type)
+            else:
+                # Dicts, lists, Sentence objects, ... are not tokenized.
+                yield Document(s, type=type, **kwargs)
+
+
+def _corpus_count(task, kwargs={}):
+    """ Returns a dict of (word, count)-items for the given (string, path, encoding, name, type)-task.
+    """
+    s, path, encoding = task[:3]
+    if path is not None:
+        with open(path, "rb") as f:
+            s = f.read()
+    s = decode_utf8(s, encoding)
+    kwargs = dict(kwargs)
+    kwargs.setdefault("filter", _isalnum)
+    kwargs.setdefault("threshold", 0)
+    kwargs["dict"] = dict
+    return count(words(s, **kwargs), **kwargs)
+
+# The Document parameters of each process,
+# sent once when the process starts (see multiprocessing.Pool initializer).
+_corpus_data = {}
+
+
+def _corpus_init(kwargs):
+    _corpus_data["kwargs"] = kwargs
+
+
+def _corpus_task(task):
+    return _corpus_count(task, _corpus_data["kwargs"])
+
 #--- VECTOR ----------------------------------------------------------------------------------------
 # A Vector represents document terms (called features) and their tf or tf * idf relevance weight.
 # A Vector is a sparse represenation: i.e., a dictionary with only those features > 0.
@@ -973,9 +1230,15 @@ def entropy(p=[], base=None):
 # Export formats:
 ORANGE, WEKA = "orange", "weka"
 
+# Model.save() formats:
+PICKLE, NPY = "pickle", "npy"
+
 # LSA reduction methods:
 NORM, L1, L2, TOP300 = "norm", "L1", "L2", "top300"
 
+# LSA singular value decomposition:
+FULL, TRUNCATED, RANDOMIZED = "full", "truncated", "randomized"
+
 # Feature selection methods:
 INFOGAIN, GAINRATIO, CHISQUARE, CHISQUARED = "infogain", "gainratio", "chisquare", "chisquared"
 IG, GR, X2, DF = "ig", "gr", "x2", "df"
@@ -986,15 +1249,201 @@ KMEANS, HIERARCHICAL = "k-means", "hierarchical"
 # Resampling methods:
 MINORITY, MAJORITY = "minority", "majority"
 
+#--- SPARSE MATRIX ---------------------------------------------------------------------------------
+# A SparseMatrix stores the term counts of the documents in a model in compressed sparse row (CSR)
+# format: one row per document, one column per term, with a term => column index.
+# Rows are appended to flat typed arrays, so adding a document does not rebuild the matrix,
+# and tf, tf-idf and binary weights can be calculated for all documents at once with SciPy.
+# Deleted rows are marked, and removed from the arrays in one pass when the matrix is next used.
+
+
+class SparseMatrix(object):
+
+    # Defaults for matrices pickled before these attributes existed.
+    _columns = None
+    _deleted = ()
+
+    def __init__(self, documents=[]):
+        """ A documents x terms matrix of counts in CSR format,
+            built from the given list of Document.terms dictionaries.
+        """
+        self.terms    = []         # Column index => term.
+        self.data     = array("d") # Nonzero counts, row by row.
+        self.indices  = array("i") # Column index of each count.
+        self.indptr   = array("i", [0]) # Row i = data[indptr[i]:indptr[i+1]].
+        self._columns = {}         # Term => column index.
+        self._csr     = None       # Cached scipy.sparse.csr_matrix.
+        self._deleted = []         # Deleted rows (sorted), see SparseMatrix.compact().
+        for terms in documents:
+            self.append(terms)
+
+    @classmethod
+    def _load(cls, data, indices, indptr, terms):
+        """ Returns a new SparseMatrix with the given (possibly memory-mapped) arrays.
+            The arrays are only copied when a row is appended.
+        """
+        from scipy.sparse import csr_matrix
+        m = cls()
+        m.terms = terms
+        m.data = m.indices = m.indptr = None
+        m._columns = None
+        m._csr = csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, len(terms)), copy=False)
+        return m
+
+    @property
+    def columns(self):
+        """ Yields a dict of (term, column index)-items.
+        """
+        if self._columns is None:
+            self._columns = dict(zip(self.terms, range(len(self.terms))))
+        return self._columns
+
+    @property
+    def shape(self):
+        self.compact()
+        return (len(self), len(self.terms))
+
+    def __len__(self):
+        if self.indptr is None:
+            return self._csr.shape[0] - len(self._deleted)
+        return len(self.indptr) - 1 - len(self._deleted)
+
+    def _copy(self):
+        """ Copies the arrays of a loaded matrix, see SparseMatrix._load().
+        """
+        if self.indptr is None:
+            m = self._csr
+            self.data    = array("d", m.data.astype(np.float64).tobytes())
+            self.indices = array("i", m.indices.astype(np.intc).tobytes())
+            self.indptr  = array("i", m.indptr.astype(np.intc).tobytes())
+
+    def append(self, terms):
+        """ Appends a row with the given dictionary of (term, count)-items.
+            New terms are assigned the next free column.
+        """
+        self._copy()
+        for w, f in terms.items():
+            j = self.columns.get(w)
+            if j is None:
+                j = self.columns[w] = len(self.terms)
+                self.terms.append(w)
+            if f != 0:
+                self.data.append(f)
+                self.indices.append(j)
+        self.indptr.append(len(self.data))
+        self._csr = None
+
+    def extend(self, documents):
+        for terms in documents:
+            self.append(terms)
+
+    def __delitem__(self, i):
+        """ Deletes row i. The row is only marked as deleted (see SparseMatrix.compact()),
+            so that deleting a row does not rebuild the matrix.
+        """
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("row index out of range")
+        # Row i is the i-th row that is not deleted.
+        for j in self._deleted:
+            if j > i:
+                break
+            i += 1
+        self._deleted = list(self._deleted)
+        insort(self._deleted, i)
+
+    def compact(self):
+        """ Removes the deleted rows from the arrays,
+            and the columns of terms that no longer occur in any row.
+        """
+        if not self._deleted:
+            return
+        self._copy()
+        indptr = np.array(self.indptr, dtype=np.intc)
+        keep = np.ones(len(indptr) - 1, dtype=bool)
+        keep[self._deleted] = False
+        mask = np.repeat(keep, np.diff(indptr))
+        data = np.array(self.data, dtype=np.float64)[mask]
+        indices = np.array(self.indices, dtype=np.intc)[mask]
+        # Remaining columns keep their order.
+        used = np.zeros(len(self.terms), dtype=bool)
+        used[indices] = True
+        columns = np.cumsum(used) - 1
+        self.terms    = [w for w, b in zip(self.terms, used.tolist()) if b]
+        self.data     = array("d", data.tobytes())
+        self.indices  = array("i", columns[indices].astype(np.intc).tobytes())
+        self.indptr   = array("i", np.concatenate(([0], np.cumsum(np.diff(indptr)[keep]))).astype(np.intc).tobytes())
+        self._columns = None
+        self._csr     = None
+        self._deleted = []
+
+    @property
+    def csr(self):
+        """ Yields a scipy.sparse.csr_matrix of counts (cached until the next append).
+        """
+        self.compact()
+        if self._csr is None:
+            from scipy.sparse import csr_matrix
+            # The arrays are copied: an array that exports its buffer can't grow.
+            self._csr = csr_matrix((
+                np.array(self.data, dtype=np.float64),
+                np.array(self.indices, dtype=np.intc),
+                np.array(self.indptr, dtype=np.intc)), shape=self.shape)
+        return self._csr
+
+    def document_frequency(self):
+        """ Returns an array with the number of rows (documents) per column (term).
+        """
+        return np.bincount(self.csr.indices, minlength=len(self.terms)).astype(np.float64)
+
+    df = document_frequency
+
+    def weighted(self, weight=TFIDF, base=2.71828):
+        """ Returns a new csr_matrix with the counts adjusted by the given weight
+            (TF, TFIDF, BINARY or None), identical to Document.vector in a Model.
+            Returns None for weights that can't be calculated by column (IG, GR).
+        """
+        if weight in (IG, INFOGAIN, GR, GAINRATIO):
+            return None
+        m = self.csr.astype(np.float64)
+        n = m.shape[0]
+        if weight == BINARY:
+            m.data = (m.data > 0).astype(np.float64)
+        if weight in (TF, TFIDF):
+            # tf = count / sum of counts in the row (Document.count).
+            s = np.asarray(m.sum(axis=1)).ravel()
+            s[s == 0] = 1.0
+            m.data /= np.repeat(s, np.diff(m.indptr))
+        if weight == TFIDF:
+            # idf = log(1 / df), where df = documents with the term / all documents.
+            df = self.df() / (n or 1)
+            df[df == 0] = 1.0
+            m.data *= (np.log(1.0 / df) / log(base))[m.indices]
+        m.eliminate_zeros()
+        return m
+
 
 class Model(object):
 
-    def __init__(self, documents=[], weight=TFIDF):
+    # Defaults for models pickled before these attributes existed.
+    _matrix = None
+    _csr = None
+    _postings = None
+    _vocabulary = None
+
+    # Model version counter, see Model._update().
+    _version = 0
+
+    def __init__(self, documents=[], weight=TFIDF, sparse=False):
         """ A model is a bag-of-word representation of a corpus of documents, 
             where each document vector is a bag of (word, relevance)-items.
             Vectors can then be compared for similarity using a distance metric.
             The weighting scheme can be: relative TF, TFIDF (default), IG, BINARY, None,
             where None means that the original weights are used.
+            With sparse=True, the model also maintains a SparseMatrix of the documents,
+            used for vectorized nearest neighbors, k-means clustering and LSA.
         """
         self.description = ""             # Description of the dataset: author e-mail, etc.
         self._documents  = readonlylist() # List of documents (read-only).
@@ -1006,10 +1455,15 @@ class Model(object):
         self._ig         = {}             # Cache of (word, information gain)-items.
         self._gr         = {}             # Cache of (word, information gain ratio)-items.
         self._inverted   = {}             # Cache of word => Document.
+        self._postings   = None           # Cache of word => [(document index, weight / norm)].
         self._vector     = None           # Cache of model vector with all the features in the model.
         self._classifier = None           # Classifier trained on the documents in the model (NB, KNN, SVM).
         self._lsa        = None           # LSA matrix with reduced dimensionality.
         self._weight     = weight         # Weight used in Document.vector (TF, TFIDF, IG, BINARY or None).
+        self._matrix     = SparseMatrix() if sparse else None # Documents x terms CSR matrix.
+        self._csr        = None           # Cache of (weighted csr_matrix, row L2-norms).
+        self._vocabulary = Vocabulary()   # Term => id of the document terms.
+        self._version    = 0              # Incremented when document vectors must be recalculated.
         self._update()
         self.extend(documents)
 
@@ -1025,6 +1479,23 @@ class Model(object):
 
     features = words = terms
 
+    @property
+    def vocabulary(self):
+        """ Yields the Vocabulary of term ids, used to store the terms of each document.
+        """
+        if self._vocabulary is None:
+            self._vocabulary = Vocabulary()
+        return self._vocabulary
+
+    @property
+    def matrix(self):
+        """ Yields a SparseMatrix with a row of term counts for each document.
+            It is built on first access and then updated with Model.append() and Model.extend().
+        """
+        if self._matrix is None:
+            self._matrix = SparseMatrix(d.terms for d in self.documents)
+        return self._matrix
+
     @property
     def classes(self):
         return list(set(d.type for d in self.documents))
@@ -1061,10 +1532,17 @@ class Model(object):
     weight = property(_get_weight, _set_weight)
 
     @classmethod
-    def load(cls, path):
-        """ Loads the model from a gzipped pickle file created with Model.save().
+    def load(cls, path, mmap=False):
+        """ Loads the model from a gzipped pickle file or a directory created with Model.save().
+            With mmap=True, the term counts in a directory are memory-mapped (read-only),
+            so that they are read from disk when needed.
         """
+        if os.path.isdir(path):
+            return cls._load_npy(path, mmap)
         model = pickle.loads(gzip.GzipFile(path, "rb").read())
+        # Models saved with relative document frequency (instead of counts).
+        if "_version" not in model.__dict__:
+            model._df = {}
         # Deserialize Model.classifier.
         if model.classifier:
             p = path + ".tmp"
@@ -1075,10 +1553,15 @@ class Model(object):
             os.remove(p)
         return model
 
-    def save(self, path, update=False, final=False):
+    def save(self, path, update=False, final=False, format=PICKLE):
         """ Saves the model as a gzipped pickle file at the given path.
-            The advantage is that cached vectors and cosine similarity are stored.
+            The advantage is that cached document frequency and cosine similarity are stored.
+            Document vectors are not stored, they are recalculated from the term counts.
+            With format=NPY, saves the model as a directory of NumPy arrays instead,
+            which loads much faster, but without the cache (or LSA).
         """
+        if format == NPY:
+            return self._save_npy(path, final)
         # Update the cache before saving.
         if update:
             classes = self.classes
@@ -1092,15 +1575,138 @@ class Model(object):
                 for d2 in self.documents:
                     self.cosine_similarity(d1, d2)
         # Serialize Model.classifier.
-        if self._classifier:
+        classifier = self._classifier
+        if classifier:
             p = path + ".tmp"
-            self._classifier.save(p, final)
+            classifier.save(p, final)
+            classifier.test = classifier._test
             self._classifier = open(p, "rb").read()
             os.remove(p)
-        f = gzip.GzipFile(path, "wb")
-        f.write(pickle.dumps(self, 1))  # 1 = binary
+        try:
+            f = gzip.GzipFile(path, "wb")
+            f.write(pickle.dumps(self, 1))  # 1 = binary
+            f.close()
+        finally:
+            self._classifier = classifier
+
+    # The NPY format is a directory with:
+    # - model.json       : format version, weight, description, number of documents,
+    # - vocabulary.pickle: list of terms (column index => term),
+    # - documents.pickle : dict of document id, name, type, language and description lists,
+    # - indptr.npy       : document i has the terms indices[indptr[i]:indptr[i+1]],
+    # - indices.npy      : term ids (int32), sorted for each document,
+    # - counts.npy       : term counts (int32, or float64 if any count is not an int),
+    # - classifier       : Model.classifier saved with Classifier.save() (optional).
+    # Documents in a loaded model store their terms as a slice of indices.npy and counts.npy.
+    _NPY_VERSION = 1
+
+    def _save_npy(self, path, final=False):
+        """ Saves the model as a directory of NumPy arrays, see Model.save().
+        """
+        if not os.path.exists(path):
+            os.makedirs(path)
+        documents = self.documents
+        for d in documents:
+            d._intern(self.vocabulary)
+            if d._terms is not None:
+                raise TypeError("can't save document terms that are not numbers")
+        indptr = np.zeros(len(documents) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(d._ids) for d in documents])
+        indices = np.concatenate([np.zeros(0, np.intc)] + [np.asarray(d._ids, np.intc) for d in documents])
+        counts = np.concatenate([np.zeros(0, np.intc)] + [np.asarray(d._counts) for d in documents])
+        # Terms that are no longer in the model (i.e., removed documents) are not saved.
+        # The other terms are saved in order of appearance, the same as Model.vector.
+        u, i = np.unique(indices, return_index=True)
+        u = u[np.argsort(i, kind="mergesort")]
+        terms = [self.vocabulary.terms[j] for j in u.tolist()]
+        m = np.zeros(len(self.vocabulary), dtype=np.intc)
+        m[u] = np.arange(len(u), dtype=np.intc)
+        from scipy.sparse import csr_matrix
+        x = csr_matrix((counts, m[indices], indptr), shape=(len(documents), len(terms)))
+        x.sort_indices()
+        for k, a in (("indptr", x.indptr.astype(np.int64)), ("indices", x.indices), ("counts", x.data)):
+            np.save(os.path.join(path, k + ".npy"), a, allow_pickle=False)
+        f = open(os.path.join(path, "vocabulary.pickle"), "wb")
+        f.write(pickle.dumps(terms, 2))
+        f.close()
+        f = open(os.path.join(path, "documents.pickle"), "wb")
+        f.write(pickle.dumps(dict(
+                   id = [d.id for d in documents],
+                 name = [d.name for d in documents],
+                 type = [d.type for d in documents],
+             language = [d.language for d in documents],
+          description = [d.description for d in documents]), 2))
+        f.close()
+        # Save Model.classifier.
+        p = os.path.join(path, "classifier")
+        if self._classifier:
+            self._classifier.save(p, final)
+            self._classifier.test = self._classifier._test
+        elif os.path.exists(p):
+            os.remove(p)
+        # The model.json file is written last,
+        # so an incomplete directory can't be loaded.
+        f = open(os.path.join(path, "model.json"), "w", encoding="utf-8")
+        f.write(decode_utf8(json.dumps({
+                 "format": "pattern.vector.Model",
+                "version": self._NPY_VERSION,
+                 "weight": self._weight,
+            "description": self.description,
+              "documents": len(documents),
+                 "sparse": self._matrix is not None,
+             "classifier": bool(self._classifier)})))
         f.close()
 
+    @classmethod
+    def _load_npy(cls, path, mmap=False):
+        """ Returns a Model loaded from a directory of NumPy arrays, see Model.load().
+        """
+        f = open(os.path.join(path, "model.json"), "r", encoding="utf-8")
+        a = json.loads(f.read())
+        f.close()
+        if a.get("format") != "pattern.vector.Model" or a.get("version", 0) > cls._NPY_VERSION:
+            raise ValueError("unsupported model format in %s" % path)
+        indptr, indices, counts = (np.load(os.path.join(path, k + ".npy"),
+            mmap_mode = "r" if mmap else None,
+          allow_pickle = False) for k in ("indptr", "indices", "counts"))
+        f = open(os.path.join(path, "vocabulary.pickle"), "rb")
+        v = Vocabulary()
+        v.terms = pickle.loads(f.read())
+        v._ids = None
+        f.close()
+        f = open(os.path.join(path, "documents.pickle"), "rb")
+        m = pickle.loads(f.read())
+        f.close()
+        model = cls(weight=a["weight"])
+        model.description = a["description"]
+        model._vocabulary = v
+        # Each document stores a slice of the arrays (without a copy).
+        p = indptr.tolist()
+        i = memoryview(indices)
+        f = memoryview(counts)
+        documents = []
+        for j, id in enumerate(m["id"]):
+            d = Document(None,
+                       name = m["name"][j],
+                       type = m["type"][j],
+                   language = m["language"][j],
+                description = m["description"][j])
+            d._id = id
+            d._terms = None
+            d._ids = i[p[j]:p[j + 1]]
+            d._counts = f[p[j]:p[j + 1]]
+            d._vocabulary = v
+            documents.append(d)
+        model.extend(documents)
+        if a["sparse"]:
+            model._matrix = SparseMatrix._load(counts, indices, indptr, list(v.terms))
+            if not counts.all():
+                model._matrix._csr = model._matrix._csr.copy()
+                model._matrix._csr.eliminate_zeros()
+        if a["classifier"]:
+            model._classifier = Classifier.load(os.path.join(path, "classifier"))
+        return model
+
     def export(self, path, format=ORANGE, **kwargs):
         """ Exports the model as a file for other machine learning applications,
             e.g., Orange or Weka.
@@ -1137,18 +1743,66 @@ class Model(object):
     def _update(self):
         # Ensures that all document vectors are recalculated
         # when a document is added or deleted (= new features).
-        self._df = {}
+        # Document vectors are recalculated lazily, when their version differs from the model's.
+        # Document frequency, the inverted index and Model.vector are kept up to date
+        # by Model._add() and Model._remove().
+        Model._version += 1 # Unique across models.
+        self._version = Model._version
         self._cos = {}
         self._pp = {}
         self._x2 = {}
         self._ig = {}
         self._gr = {}
-        self._inverted = {}
-        self._vector = None
+        self._postings = None
         self._classifier = None
         self._lsa = None
-        for document in self.documents:
-            document._vector = None
+        self._csr = None
+
+    def _add(self, document):
+        # Updates the cached document frequency, inverted index and Model.vector
+        # with the given new document (if they were calculated before).
+        if self._df:
+            for w, f in document._items():
+                if f != 0:
+                    self._df[w] = self._df.get(w, 0) + 1
+        if self._inverted:
+            for w in document:
+                if w not in self._inverted:
+                    self._inverted[w] = set()
+                self._inverted[w].add(document)
+        if self._vector:
+            for w in document:
+                if w not in self._vector:
+                    dict.__setitem__(self._vector, w, 0.0)
+
+    def _remove(self, document):
+        # Updates the cached document frequency, inverted index and Model.vector
+        # with the given removed document.
+        if self._df:
+            for w, f in document._items():
+                if f != 0:
+                    self._df[w] -= 1
+                    if self._df[w] == 0:
+                        del self._df[w]
+        if self._inverted:
+            for w in document:
+                self._inverted[w].discard(document)
+                if len(self._inverted[w]) == 0:
+                    del self._inverted[w]
+        self._vector = None
+
+    def _weighted(self):
+        """ Returns a (csr_matrix, norms)-tuple of document vectors and their L2-norm,
+            or None if the model has no SparseMatrix or uses IG / GR weights.
+        """
+        if self._matrix is None:
+            return None
+        if self._csr is None:
+            m = self._matrix.weighted(self._weight)
+            if m is None:
+                return None
+            self._csr = (m, np.sqrt(np.asarray(m.multiply(m).sum(axis=1)).ravel()))
+        return self._csr
 
     def __len__(self):
         return len(self.documents)
@@ -1163,15 +1817,23 @@ class Model(object):
         d = list.pop(self.documents, i)
         d._model = None
         self._index.pop(d.name, None)
+        self._remove(d)
+        if self._matrix is not None:
+            del self._matrix[i]
         self._update()
 
     def clear(self):
         self._documents = readonlylist()
+        self._df = {}
+        self._inverted = {}
+        self._vector = None
+        if self._matrix is not None:
+            self._matrix = SparseMatrix()
         self._update()
 
     def append(self, document):
         """ Appends the given Document to the model.
-            If Model.weight != TF, the cache of vectors and cosine similarity is cleared
+            If Model.weight != TF, the cache of vectors and cosine similarity is invalidated
             (feature weights will be different now that there is a new document).
         """
         if not isinstance(document, Document):
@@ -1179,7 +1841,13 @@ class Model(object):
         if document.name is not None:
             self._index[document.name] = document
         document._model = self
+        document._version = self._version
+        document._intern(self.vocabulary)
         list.append(self.documents, document)
+        if self._matrix is not None:
+            self._matrix.append(document.terms)
+        self._add(document)
+        self._csr = None
         if self._weight not in (TF, BINARY, None):
             self._update()
 
@@ -1189,11 +1857,18 @@ class Model(object):
         documents = list(documents)
         for i, document in enumerate(documents):
             if not isinstance(document, Document):
-                documents[i] = Document(document)
+                document = documents[i] = Document(document)
             if document.name is not None:
                 self._index[document.name] = document
             document._model = self
+            document._version = self._version
+            document._intern(self.vocabulary)
         list.extend(self.documents, documents)
+        if self._matrix is not None:
+            self._matrix.extend(d.terms for d in documents)
+        for document in documents:
+            self._add(document)
+        self._csr = None
         if self._weight not in (TF, BINARY, None):
             self._update()
 
@@ -1215,7 +1890,7 @@ class Model(object):
             With normalized=True, weights are normalized between 0.0 and 1.0 (their sum will be 1.0).
         """
         self.df(None) # Populate document frequency cache.
-        n = normalized and sum(self._df.values()) or 1.0
+        n = float(sum(self._df.values()) if normalized else len(self.documents)) or 1.0
         v = ((f / n, w) for w, f in self._df.items())
         v = heapq.nsmallest(top, v, key=lambda v: (-v[0], v[1]))
         return v
@@ -1231,14 +1906,14 @@ class Model(object):
         if len(self._df) == 0:
             # Caching document frequency for each word gives a 300x performance boost
             # (i.e., calculated all at once). Drawback is if you need it for just one word.
+            # The cache stores the number of documents per word,
+            # and it is updated when documents are added or removed.
             df = self._df
             for d in self.documents:
-                for w, f in d.terms.items():
+                for w, f in d._items():
                     if f != 0:
-                        df[w] = (w in df) and df[w] + 1 or 1.0
-            for w in df:
-                df[w] /= float(len(self.documents))
-        return self._df.get(word, 0.0)
+                        df[w] = (w in df) and df[w] + 1 or 1
+        return self._df.get(word, 0) / float(len(self.documents))
 
     df = document_frequency
 
@@ -1265,7 +1940,7 @@ class Model(object):
         if not self._inverted:
             m = {}
             for d in self.documents:
-                for w in d.terms:
+                for w in d:
                     if w not in m:
                         m[w] = set()
                     m[w].add(d)
@@ -1274,6 +1949,31 @@ class Model(object):
 
     inverted = inverted_index
 
+    def _posting_lists(self):
+        """ Returns a (postings, bounds, positive)-tuple, where postings is a dictionary of
+            word => [(document index, weight / document norm)] for nonzero Document.vector weights,
+            bounds a dictionary of word => maximum weight, and positive is True if no weight < 0.
+        """
+        # Documents appended without a new model version (e.g., TF weights)
+        # are added to the existing posting lists.
+        if self._postings is None:
+            self._postings = ({}, {}, True, 0)
+        p, b, positive, j = self._postings
+        for i, d in enumerate(self.documents[j:], j):
+            v = d.vector
+            n = l2_norm(v)
+            for w, f in v.items():
+                if f != 0:
+                    f = f / n
+                    if w not in p:
+                        p[w] = []
+                        b[w] = f
+                    p[w].append((i, f))
+                    b[w] = max(b[w], f)
+                    positive = positive and f > 0
+        self._postings = (p, b, positive, len(self.documents))
+        return self._postings[:3]
+
     @property
     def vector(self):
         """ Returns a Vector dict of (word, 0.0)-items from the vector space model.
@@ -1288,7 +1988,11 @@ class Model(object):
         #    i.e., the document was not in the model, this can be the case in Model.search().
         # See: Vector.__call__().
         if not self._vector:
-            self._vector = Vector(((w, 0.0) for w in chain(*(d.terms for d in self.documents))), sparse=False)
+            if self._matrix is not None:
+                self._matrix.compact()
+                self._vector = Vector(((w, 0.0) for w in self._matrix.terms), sparse=False)
+            else:
+                self._vector = Vector(((w, 0.0) for w in chain(*self.documents)), sparse=False)
         return self._vector
 
     @property
@@ -1350,15 +2054,67 @@ class Model(object):
         """ Returns a list of (similarity, document)-tuples in the model, 
             sorted by cosine similarity to the given document.
         """
-        v = ((self.cosine_similarity(document, d), d) for d in self.documents)
+        m = not getattr(self, "lsa", None) and self._weighted()
+        if m:
+            # Using the sparse matrix:
+            # one matrix-vector product yields the similarity with every document.
+            m, n = m
+            v1 = document.vector
+            c = self._matrix.columns
+            q = np.zeros(m.shape[1])
+            for f, w in v1.items():
+                if f in c:
+                    q[c[f]] = w
+            n = n * l2_norm(v1)
+            n[n == 0] = 1.0
+            s = m.dot(q) / n
+            v = ((float(s[i]), self.documents[i]) for i in np.flatnonzero(s > 0))
+        elif not getattr(self, "lsa", None):
+            # Using the inverted index:
+            # only documents that share a feature with the given document are compared.
+            v = self._candidates(document, top)
+            v = ((self.cosine_similarity(document, self.documents[i]), self.documents[i]) for i in v)
+        else:
+            v = ((self.cosine_similarity(document, d), d) for d in self.documents)
         # Filter the input document from the matches.
         # Filter documents that score zero, and return the top.
         v = [(w, d) for w, d in v if w > 0 and d.id != document.id]
-        v = heapq.nsmallest(top, v, key=lambda v: (-v[0], v[1]))
+        v = heapq.nsmallest(top, v, key=lambda v: -v[0]) # Ties in model order.
         return v
 
     similar = related = neighbors = nn = nearest_neighbors
 
+    def _candidates(self, document, top=10):
+        """ Returns a sorted list of indices of documents in the model
+            that can be among the top nearest neighbors of the given document.
+        """
+        # The partial dot product of the normalized vectors is accumulated one feature at a time,
+        # in order of decreasing upper bound (= query weight * maximum weight of the feature).
+        # If all weights are positive, partial scores are lower bounds of the final score,
+        # so once the upper bounds of the remaining features add up to less than
+        # the top-th partial score, other documents can no longer enter the top (MaxScore).
+        p, b, positive = self._posting_lists()
+        v = document.vector
+        n = l2_norm(v) or 1.0
+        q = [(f / n * b[w], f / n, w) for w, f in v.items() if f != 0 and w in p]
+        q = sorted(q, key=itemgetter(0), reverse=True)
+        # The upper bound of the remaining features, for each feature.
+        u = [0.0] * len(q)
+        for i in reversed(range(len(q) - 1)):
+            u[i] = u[i + 1] + q[i + 1][0]
+        # The given document may be in the model, so the top is one larger.
+        k = top + 1 if top is not None else None
+        m = positive and k is not None and all(x[1] > 0 for x in q)
+        a = {}
+        for (ub, f, w), r in zip(q, u):
+            for i, x in p[w]:
+                a[i] = a.get(i, 0.0) + f * x
+            if m and len(a) >= k:
+                t = heapq.nlargest(k, a.values())[-1] - 1e-9 # Rounding errors.
+                if r < t:
+                    return sorted(i for i, x in a.items() if x + r >= t)
+        return sorted(a)
+
     def vector_space_search(self, words=[], **kwargs):
         """ Returns related documents from the model as a list of (similarity, document)-tuples.
             The given words can be a string (one word), a list or tuple of words, or a Document.
@@ -1393,6 +2149,31 @@ class Model(object):
         # The optional documents parameter can be a selective list
         # of documents in the model to cluster.
         documents = kwargs.get("documents", self.documents)
+        m = not getattr(self, "lsa", None) and self._weighted()
+        if m and method in (KMEANS, "kmeans") \
+             and kwargs.get("distance", COSINE) in (COSINE, EUCLIDEAN):
+            # Using the sparse matrix (vectorized Lloyd's algorithm):
+            m = m[0]
+            if documents is not self.documents:
+                i = dict((d.id, i) for i, d in enumerate(self.documents))
+                m = m[[i[d.id] for d in documents]]
+            clusters = _k_means_matrix(m,
+                         k = kwargs.pop("k", 10),
+                iterations = kwargs.pop("iterations", 10),
+                  distance = kwargs.get("distance", COSINE),
+                      seed = kwargs.get("seed", RANDOM))
+            return [[documents[i] for i in cluster] for cluster in clusters]
+        if m and method == HIERARCHICAL \
+             and kwargs.get("distance", COSINE) in (COSINE, EUCLIDEAN):
+            # Using the sparse matrix (priority queue of nearest clusters):
+            m = m[0]
+            i = dict((d.id, i) for i, d in enumerate(self.documents))
+            documents = shuffled(documents)
+            merged = _hierarchical_matrix(m[[i[d.id] for d in documents]],
+                         k = kwargs.pop("k", 1),
+                iterations = kwargs.pop("iterations", 1000),
+                  distance = kwargs.get("distance", COSINE))
+            return _cluster(documents, merged)
         if not getattr(self, "lsa", None):
             # Using document vectors:
             vectors, features = [d.vector for d in documents], list(self.vector.keys())
@@ -1420,14 +2201,15 @@ class Model(object):
                     for i, v in enumerate(cluster) if not isinstance(v, Cluster)])
         return clusters
 
-    def latent_semantic_analysis(self, dimensions=NORM):
+    def latent_semantic_analysis(self, dimensions=NORM, svd=FULL, **kwargs):
         """ Creates LSA concept vectors by reducing the vector space's dimensionality.
             Each concept vector has the given number of features (concepts).
             The concept vectors are consequently used in Model.cosine_similarity(), Model.cluster()
             and classification. This can be faster for high-dimensional vectors (i.e., many features).
+            With svd=TRUNCATED or RANDOMIZED, only the given number of dimensions is calculated.
             The reduction can be undone by setting Model.lsa=False.
         """
-        self._lsa = LSA(self, k=dimensions)
+        self._lsa = LSA(self, k=dimensions, svd=svd, **kwargs)
         self._cos = {}
         return self._lsa
 
@@ -1773,16 +2555,29 @@ apriori = Apriori()
 
 class LSA(object):
 
-    def __init__(self, model, k=NORM):
+    # Default for LSA objects pickled before this attribute existed.
+    _rows = None
+
+    def __init__(self, model, k=NORM, svd=FULL, **kwargs):
         """ Latent Semantic Analysis is a statistical machine learning method based on 
             singular value decomposition (SVD), and related to principal component analysis (PCA).
             Closely related features (words) in the model are combined into "concepts".
             Documents then get a concept vector that is an approximation of the original vector,
             but with reduced dimensionality so that cosine similarity and clustering run faster.
-        """
-        # Calling Model.vector() in a loop is quite slow, we should refactor this:
-        matrix = [list(model.vector(d).values()) for d in model.documents]
-        matrix = np.array(matrix)
+            With svd=TRUNCATED or RANDOMIZED, the given k (int) dimensions are calculated
+            from a sparse matrix, and LSA.u, LSA.sigma and LSA.vt are NumPy arrays.
+        """
+        if svd in (TRUNCATED, RANDOMIZED):
+            self._init_sparse(model, k, svd, **kwargs)
+            return
+        # Calling Model.vector() in a loop is quite slow,
+        # the model's SparseMatrix (if any) yields the same matrix at once.
+        matrix = model._weighted()
+        if matrix is not None:
+            matrix = matrix[0].toarray()
+        else:
+            matrix = [list(model.vector(d).values()) for d in model.documents]
+            matrix = np.array(matrix)
         # Singular value decomposition, where u * sigma * vt = svd(matrix).
         # Sigma is the diagonal matrix of singular values,
         # u has document rows and concept columns, vt has concept rows and term columns.
@@ -1822,12 +2617,41 @@ class LSA(object):
         # Store as Python dict and lists so we can pickle it.
         self.model = model
         self._terms = dict(enumerate(model.vector().keys())) # Vt-index => word.
+        self._rows = None
         self.u, self.sigma, self.vt = (
             dict((d.id, Vector((i, float(x)) for i, x in enumerate(v))) for d, v in zip(model, u)),
             list(sigma),
             [[float(x) for x in v] for v in vt]
         )
 
+    def _init_sparse(self, model, k, svd=TRUNCATED, **kwargs):
+        # Truncated SVD calculates only the k largest singular values (Lanczos, scipy.sparse.linalg),
+        # randomized SVD projects the matrix onto k random directions first (Halko et al., 2011).
+        # Both work on the sparse documents x terms matrix.
+        assert isinstance(k, int), \
+            "truncated SVD needs the number of dimensions"
+        assert 0 < k < min(len(model.documents), len(model.vector)), \
+            "can't create more dimensions than there are documents"
+        matrix = model._weighted()
+        if matrix is not None:
+            matrix = matrix[0]
+        else:
+            matrix = _csr_matrix([d.vector for d in model.documents], model.vector.keys())
+        if svd == RANDOMIZED:
+            u, sigma, vt = _randomized_svd(matrix, k, **kwargs)
+        else:
+            from scipy.sparse.linalg import svds
+            u, sigma, vt = svds(matrix, k)
+            i = np.argsort(-sigma) # svds() returns ascending singular values.
+            u, sigma, vt = u[:, i], sigma[i], vt[i]
+        u, sigma, vt = list(map(np.abs, (u, sigma, vt)))
+        self.model = model
+        self._terms = dict(enumerate(model.vector.keys()))
+        self._rows = dict((d.id, i) for i, d in enumerate(model.documents)) # Document.id => u-index.
+        self._columns = dict((w, i) for i, w in self._terms.items())      # Word => vt-index.
+        self._vectors = {} # Cache of Document.id => Vector.
+        self.u, self.sigma, self.vt = u, sigma, vt
+
     @property
     def terms(self):
         """ Yields a list of all terms, identical to LSA.model.vector.keys().
@@ -1841,7 +2665,7 @@ class LSA(object):
         """ Yields a list of all concepts, each a dictionary of (word, weight)-items.
         """
         # Round the weight so 9.0649330400000009e-17 becomes a more meaningful 0.0.
-        return [dict((self._terms[i], round(w, 15)) for i, w in enumerate(concept)) for concept in self.vt]
+        return [dict((self._terms[i], round(float(w), 15)) for i, w in enumerate(concept)) for concept in self.vt]
 
     @property
     def vectors(self):
@@ -1851,20 +2675,30 @@ class LSA(object):
                 for concept in lsa.vectors(document.id):
                     print(document, concept)
         """
+        if self._rows is not None:
+            return dict((id, self[id]) for id in self._rows)
         return self.u
 
     def vector(self, id):
         if isinstance(id, Document):
             id = id.id
-        return self.u[id]
+        return self[id]
 
     def __getitem__(self, id):
+        if self._rows is not None:
+            if id not in self._vectors:
+                self._vectors[id] = Vector(enumerate(self.u[self._rows[id]].tolist()))
+            return self._vectors[id]
         return self.u[id]
 
     def __contains__(self, id):
+        if self._rows is not None:
+            return id in self._rows
         return id in self.u
 
     def __iter__(self):
+        if self._rows is not None:
+            return iter(self._rows)
         return iter(self.u)
 
     def __len__(self):
@@ -1875,17 +2709,64 @@ class LSA(object):
             This happes automatically in Model.cosine_similarity(),
             but it must be done explicitly for Classifier.classify() input.
         """
-        if document.id in self.u:
-            return self.u[document.id]
+        if document.id in self:
+            return self[document.id]
         if document.id in _lsa_transform_cache:
             return _lsa_transform_cache[document.id]
-        import numpy
+        if self._rows is not None:
+            # inv(sigma) * vt * v, using only the columns of the features in the document.
+            v = [(self._columns[w], x) for w, x in document.vector.items() if w in self._columns]
+            v = np.dot(self.vt[:, [i for i, x in v]], [x for i, x in v]) / self.sigma if v else \
+                np.zeros(len(self.sigma))
+            v = _lsa_transform_cache[document.id] = Vector(enumerate(v.tolist()))
+            return v
         v = self.model.vector(document)
         v = [v[self._terms[i]] for i in range(len(v))]
         v = np.dot(np.dot(np.linalg.inv(np.diag(self.sigma)), self.vt), v)
         v = _lsa_transform_cache[document.id] = Vector(enumerate(v))
         return v
 
+
+def _csr_matrix(vectors, features):
+    """ Returns a scipy.sparse.csr_matrix with a row for each given vector (dict)
+        and a column for each given feature (or a dict of feature => column index).
+    """
+    from scipy.sparse import csr_matrix
+    if isinstance(features, dict):
+        columns = features
+    else:
+        columns = dict((f, i) for i, f in enumerate(features))
+    data, indices, indptr = array("d"), array("i"), array("i", [0])
+    for v in vectors:
+        for f, w in v.items():
+            if w != 0 and f in columns:
+                data.append(w)
+                indices.append(columns[f])
+        indptr.append(len(data))
+    return csr_matrix((
+        np.array(data, dtype=np.float64),
+        np.array(indices, dtype=np.intc),
+        np.array(indptr, dtype=np.intc)), shape=(len(indptr) - 1, len(columns)))
+
+
+def _randomized_svd(matrix, k, oversamples=10, iterations=4, seed=None):
+    """ Returns a (u, sigma, vt)-tuple with the k largest singular values of the given matrix.
+    """
+    # Halko, Martinsson & Tropp (2011). Finding structure with randomness:
+    # Probabilistic algorithms for constructing approximate matrix decompositions.
+    r = np.random.RandomState(seed)
+    q = matrix.dot(r.normal(size=(matrix.shape[1], min(k + oversamples, min(matrix.shape)))))
+    q = np.linalg.qr(q)[0]
+    # Power iterations make the decay of singular values faster (more accurate).
+    for i in range(iterations):
+        q = np.linalg.qr(matrix.T.dot(q))[0]
+        q = np.linalg.qr(matrix.dot(q))[0]
+    # Project the matrix onto the subspace, and decompose the small matrix.
+    b = np.asarray(matrix.T.dot(q)).T
+    u, sigma, vt = np.linalg.svd(b, full_matrices=False)
+    u = q.dot(u)
+    return u[:, :k], sigma[:k], vt[:k]
+
 # LSA cache for Model.vector_space_search() shouldn't be stored with Model.save()
 # (so it is a global instead of a property of the LSA class).
 _lsa_transform_cache = {}
@@ -1984,19 +2865,28 @@ def cluster(method=KMEANS, vectors=[], **kwargs):
 # Initialization methods:
 RANDOM, KMPP = "random", "kmeans++"
 
+# Engines:
+PYTHON, NUMPY = "python", "numpy"
 
-def k_means(vectors, k=None, iterations=10, distance=COSINE, seed=RANDOM, **kwargs):
+
+def k_means(vectors, k=None, iterations=10, distance=COSINE, seed=RANDOM, engine=PYTHON, **kwargs):
     """ Returns a list of k clusters, where each cluster is a list of vectors (Lloyd's algorithm).
         Vectors are assigned to k random centers using a distance metric (EUCLIDEAN, COSINE, ...).
         Since the initial centers are chosen randomly (by default, seed=RANDOM),
         there is no guarantee of convergence or of finding an optimal solution.
         A more efficient way is to use seed=KMPP (k-means++ initialization algorithm).
+        With engine=NUMPY, the vectors are packed into a sparse matrix
+        and all vectors are assigned at once (COSINE and EUCLIDEAN distance).
     """
     features = kwargs.get("features") or _features(vectors)
     if k is None:
         k = sqrt(len(vectors) / 2)
     if k < 2:
         return [[v for v in vectors]]
+    if engine == NUMPY and distance in (COSINE, EUCLIDEAN):
+        vectors = list(vectors)
+        clusters = _k_means_matrix(_csr_matrix(vectors, features), k, iterations, distance, seed)
+        return [[vectors[i] for i in cluster] for cluster in clusters]
     if seed == KMPP:
         clusters = kmpp(vectors, k, distance)
     else:
@@ -2085,8 +2975,95 @@ def kmpp(vectors, k, distance=COSINE):
         clusters[d.index(min(d))].append(v1)
     return clusters
 
+
+def _k_means_matrix(matrix, k=10, iterations=10, distance=COSINE, seed=RANDOM):
+    """ Returns a list of k clusters, where each cluster is a list of row indices
+        of the given NumPy array or SciPy sparse matrix (COSINE or EUCLIDEAN distance).
+        The rows are randomly partitioned (seed=RANDOM) or assigned to k-means++ centers (KMPP),
+        and then reassigned to the nearest center, all rows at once.
+    """
+    from scipy.sparse import csr_matrix
+    n = matrix.shape[0]
+    if k is None:
+        k = sqrt(n / 2)
+    k = int(k)
+    if k < 2:
+        return [list(range(n))]
+    # Squared L2-norm of each row.
+    if hasattr(matrix, "multiply"):
+        x2 = np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel()
+    else:
+        x2 = (matrix * matrix).sum(axis=1)
+    r = np.arange(n)
+    if seed == KMPP:
+        a = _kmpp_matrix(matrix, x2, k, distance)
+    else:
+        # Randomly partition the rows across k clusters.
+        a = np.empty(n, dtype=int)
+        a[sorted(range(n), key=lambda x: random())] = np.arange(n) % k
+    for _ in range(iterations):
+        # Calculate the center of each cluster (k x n averaging matrix * n x features).
+        p = np.bincount(a, minlength=k).astype(np.float64)
+        p = csr_matrix((1.0 / np.maximum(p, 1)[a], (a, r)), shape=(k, n))
+        c = p.dot(matrix)
+        c = c.toarray() if hasattr(c, "toarray") else np.asarray(c)
+        d = _matrix_distance(matrix, x2, c, distance)
+        # Assign each row to the nearest center, if it is nearer than its current center.
+        b = d.argmin(axis=1)
+        b = np.where(d[r, b] < d[r, a], b, a)
+        if (b == a).all():
+            break
+        a = b
+    return [np.flatnonzero(a == i).tolist() for i in range(k)]
+
+
+def _matrix_distance(matrix, x2, c, distance=COSINE):
+    """ Returns an array with the distance between each row in the given matrix
+        and each row (center) in the given dense array c (x2 = squared L2-norm of the rows).
+    """
+    c2 = (c * c).sum(axis=1)
+    d = np.asarray(matrix.dot(c.T))
+    if distance == COSINE:
+        x = np.outer(x2 ** 0.5, c2 ** 0.5)
+        x[x == 0] = 1.0
+        return 1 - d / x
+    # Squared Euclidean distance.
+    return np.maximum(x2[:, None] + c2[None, :] - 2 * d, 0)
+
+
+def _kmpp_matrix(matrix, x2, k, distance=COSINE):
+    """ Returns an array with the nearest k-means++ center (0-k) for each row in the given matrix.
+    """
+    # See kmpp(): the same algorithm, with the distances to all rows calculated at once.
+    row = lambda i: matrix[i].toarray() if hasattr(matrix, "toarray") else matrix[i:i + 1]
+    n = matrix.shape[0]
+    centroids = [randint(0, n - 1)]
+    d = _matrix_distance(matrix, x2, row(centroids[0]), distance)[:, 0]
+    s = d.sum()
+    for _ in range(int(k) - 1):
+        # Choose a random number y between 0 and d1 + d2 + ... + dn.
+        # Find vector i so that: d1 + d2 + ... + di >= y > d1 + d2 + ... + dj.
+        # Perform a number of local tries so that y yields a small distance sum.
+        i = 0
+        c = np.cumsum(d)
+        for _ in range(int(2 + log(k))):
+            i1 = min(int(np.searchsorted(c, random() * s)), n - 1)
+            s1 = np.minimum(d, _matrix_distance(matrix, x2, row(i1), distance)[:, 0]).sum()
+            if s1 < s:
+                s, i = s1, i1
+        # Add vector i as a new center.
+        # Repeat until we have chosen k centers.
+        centroids.append(i)
+        d = np.minimum(d, _matrix_distance(matrix, x2, row(i), distance)[:, 0])
+        s = d.sum()
+    # Assign rows to the nearest center.
+    c = matrix[centroids]
+    c = c.toarray() if hasattr(c, "toarray") else c
+    return _matrix_distance(matrix, x2, c, distance).argmin(axis=1)
+
 #--- HIERARCHICAL ----------------------------------------------------------------------------------
 # Hierarchical clustering is slow but the optimal solution guaranteed in O(len(vectors) ** 3).
+# With engine=NUMPY, the nearest clusters are kept in a priority queue, in about O(n ** 2).
 
 
 class Cluster(list):
@@ -2141,12 +3118,18 @@ def sequence(i=0, f=lambda i: i + 1):
         i = f(i)
 
 
-def hierarchical(vectors, k=1, iterations=1000, distance=COSINE, **kwargs):
+def hierarchical(vectors, k=1, iterations=1000, distance=COSINE, engine=PYTHON, **kwargs):
     """ Returns a Cluster containing k items (vectors or clusters with nested items).
         With k=1, the top-level cluster contains a single cluster.
+        With engine=NUMPY, the vectors are packed into a sparse matrix
+        and the nearest clusters are kept in a priority queue (COSINE and EUCLIDEAN distance).
     """
     id = sequence()
     features = kwargs.get("features", _features(vectors))
+    if engine == NUMPY and distance in (COSINE, EUCLIDEAN):
+        vectors = shuffled(vectors)
+        merged = _hierarchical_matrix(_csr_matrix(vectors, features), k, iterations, distance)
+        return _cluster(vectors, merged)
     clusters = Cluster((v for v in shuffled(vectors)))
     centroids = [(next(id), v) for v in clusters]
     map = {}
@@ -2178,6 +3161,106 @@ def hierarchical(vectors, k=1, iterations=1000, distance=COSINE, **kwargs):
         centroids.append((next(id), v))
     return clusters
 
+
+def _hierarchical_matrix(matrix, k=1, iterations=1000, distance=COSINE):
+    """ Returns a list of (i, j)-tuples, one for each pair of merged clusters,
+        where i and j are row indices of the given SciPy sparse matrix,
+        or n + the index of a previously merged pair (n = number of rows).
+    """
+    # Nearest clusters are merged using a priority queue of nearest neighbors
+    # (Mullner, 2011. Modern hierarchical, agglomerative clustering algorithms).
+    # Each cluster has a center (= mean of its rows), and the distance to a new cluster
+    # follows from the sum of its rows (Lance-Williams formula for centroid linkage).
+    # The rows of a cluster are not copied. Each row is labeled with its cluster,
+    # and the dot products of a center with all clusters are summed from the rows.
+    n = matrix.shape[0]
+    N = 2 * n - 1
+    labels = np.arange(n)
+    sums = dict((i, matrix[i]) for i in range(n))
+    size = np.zeros(N)
+    size[:n] = 1
+    x2 = np.zeros(N)
+    x2[:n] = np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel()
+    active = np.zeros(N, dtype=bool)
+    active[:n] = True
+
+    def distances(dot, i):
+        # Distance between cluster i and each cluster, given their dot products.
+        if distance == COSINE:
+            x = np.sqrt(x2[i] * x2[:len(dot)])
+            x[x == 0] = 1.0
+            d = 1 - dot / x
+        else:
+            d = x2[i] / size[i] ** 2 + x2[:len(dot)] / np.maximum(size[:len(dot)], 1) ** 2 \
+                - 2 * dot / (size[i] * np.maximum(size[:len(dot)], 1))
+            d = np.maximum(d, 0)
+        d[~active[:len(dot)]] = np.inf
+        d[i] = np.inf
+        return d
+
+    def nearest(i):
+        # Distance between cluster i and each cluster.
+        dot = matrix.dot(sums[i].toarray().ravel())
+        dot = np.bincount(labels, weights=dot, minlength=N)
+        return distances(dot, i)
+
+    def update(i, d):
+        # Nearest cluster for cluster i, given its distance to each cluster.
+        nn[i] = d.argmin()
+        nd[i] = d[nn[i]]
+        heapq.heappush(heap, (nd[i], i))
+
+    # For each cluster, the nearest other cluster, in a priority queue.
+    nn = np.zeros(N, dtype=int)
+    nd = np.zeros(N)
+    nd[:] = np.inf
+    heap = []
+    for i in range(0, n, 256):
+        dot = matrix[i:i + 256].dot(matrix.T).toarray()
+        for j, dot in enumerate(dot, i):
+            update(j, distances(dot, j))
+    merged = []
+    for m in range(n, n + min(iterations, n - max(k, 1))):
+        # Pairs of nearest clusters are merged as we move up the hierarchy.
+        # Clusters that were merged or have a nearer neighbor are skipped.
+        # Clusters whose nearest neighbor was merged have a lower bound distance,
+        # and their nearest neighbor is only searched once they are on top.
+        while True:
+            d0, i = heapq.heappop(heap)
+            if not active[i] or d0 != nd[i]:
+                continue
+            if not active[nn[i]]:
+                update(i, nearest(i))
+                continue
+            break
+        i, j = sorted((i, nn[i]))
+        merged.append((i, j))
+        active[i] = active[j] = False
+        active[m] = True
+        labels[(labels == i) | (labels == j)] = m
+        sums[m] = sums.pop(i) + sums.pop(j)
+        size[m] = size[i] + size[j]
+        x2[m] = sums[m].multiply(sums[m]).sum()
+        dm = nearest(m)
+        update(m, dm)
+        # Clusters that are nearer to the new cluster than to their nearest neighbor.
+        for x in np.flatnonzero(dm < nd):
+            nn[x] = m
+            nd[x] = dm[x]
+            heapq.heappush(heap, (nd[x], x))
+    return merged
+
+
+def _cluster(items, merged):
+    """ Returns a Cluster of the given items, nested for each (i, j)-tuple
+        of merged items (see _hierarchical_matrix()).
+    """
+    n = len(items)
+    clusters = dict(enumerate(items))
+    for m, (i, j) in enumerate(merged):
+        clusters[n + m] = Cluster((clusters.pop(i), clusters.pop(j)))
+    return Cluster(clusters[i] for i in sorted(clusters))
+
 #from pattern.vector import Vector
 #
 #v1 = Vector(wings=0, beak=0, claws=1, paws=1, fur=1) # cat
@@ -2527,35 +3610,95 @@ def K_fold_cross_validation(Classifier, documents=[], folds=10, **kwargs):
         The given list of documents contains Documents or (document, type)-tuples.
         The given classifier is a class (NB, KNN, SLP, SVM)
         which is initialized with the given optional parameters.
+        With processes > 1 (or None = all cores), the folds are tested in parallel (0 or 1 = serial).
+        With a seed, the folds and the results are the same each time.
     """
     K = kwargs.pop("K", folds)
     s = kwargs.pop("shuffled", True)
-    # Macro-average accuracy, precision, recall & F1-score.
-    m = [0.0, 0.0, 0.0, 0.0]
-    f = []
-    # Create shuffled folds to avoid a list sorted by type
-    # (we take successive folds and the source data could be sorted).
+    p = kwargs.pop("processes", 1)
+    r = kwargs.pop("seed", None)
+    data, folds = _cross_validation_folds(documents, K, s, r)
+    return _cross_validation(Classifier, data, folds, [kwargs], p, r)[0]
+
+kfoldcv = K_fold_cv = k_fold_cv = k_fold_cross_validation = K_fold_cross_validation
+
+
+def _cross_validation_folds(documents=[], K=10, shuffle=True, seed=None):
+    """ Returns a (data, folds)-tuple, where data is a list of (document, type)-tuples
+        and folds is a list of (train, test)-tuples with indices in data.
+    """
     if isinstance(K, (int, float)):
-        folds = list(_folds(shuffled(documents) if s else documents, K))
-    # K tests with different train (d1) and test (d2) sets.
+        folds = list(_folds(shuffled(documents, seed=seed) if shuffle else documents, K))
+    else:
+        folds = K
+    # Each document is stored once, so that it can be sent once to each process.
+    data, index = [], {}
     for d1, d2 in folds:
-        d1 = [isinstance(d, Document) and (d, d.type) or d for d in d1]
-        d2 = [isinstance(d, Document) and (d, d.type) or d for d in d2]
-        classifier = Classifier(train=d1, **kwargs)
-        A, P, R, F = classifier.test(d2, **kwargs)
-        m[0] += A
-        m[1] += P
-        m[2] += R
-        m[3] += F
-        f.append(F)
-    # F-score mean & variance.
+        for d in chain(d1, d2):
+            if id(d) not in index:
+                index[id(d)] = len(data)
+                data.append(isinstance(d, Document) and (d, d.type) or d)
+    folds = [([index[id(d)] for d in d1], [index[id(d)] for d in d2]) for d1, d2 in folds]
+    return data, folds
+
+
+def _cross_validation(Classifier, data, folds, parameters=[{}], processes=1, seed=None):
+    """ Returns a list of (accuracy, precision, recall, F1-score, standard deviation)-tuples,
+        one for each dict of optional parameters, tested on the given (train, test)-folds.
+    """
+    # All folds for all parameters are independent tasks.
+    # With a seed, the random number generator is reset for each fold,
+    # so that results are the same regardless of the number of processes.
+    tasks = [(p, d1, d2, seed if seed is None else seed + i)
+        for p in parameters
+            for i, (d1, d2) in enumerate(folds)]
+    if processes not in (0, 1) and len(tasks) > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(processes, _cross_validation_init, (Classifier, data))
+        try:
+            f = pool.map(_cross_validation_task, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        _cross_validation_init(Classifier, data)
+        try:
+            f = [_cross_validation_task(t) for t in tasks]
+        finally:
+            _cross_validation_init(None, None)
+    s = []
     K = len(folds)
-    u = float(sum(f)) / (K or 1.0)
-    o = float(sum((x - u) ** 2 for x in f)) / (K - 1 or 1.0)
-    o = sqrt(o)
-    return tuple([v / (K or 1.0) for v in m] + [o])
+    for i in range(len(parameters)):
+        # Macro-average accuracy, precision, recall & F1-score.
+        m = [sum(v) / (K or 1.0) for v in zip(*f[i * K:i * K + K])] or [0.0, 0.0, 0.0, 0.0]
+        # F-score mean & variance.
+        u = float(sum(v[3] for v in f[i * K:i * K + K])) / (K or 1.0)
+        o = float(sum((v[3] - u) ** 2 for v in f[i * K:i * K + K])) / (K - 1 or 1.0)
+        o = sqrt(o)
+        s.append(tuple(m + [o]))
+    return s
+
+# The classifier and the documents of each process,
+# sent once when the process starts (see multiprocessing.Pool initializer).
+_cross_validation_data = {}
+
+
+def _cross_validation_init(Classifier, data):
+    _cross_validation_data["Classifier"] = Classifier
+    _cross_validation_data["data"] = data
 
-kfoldcv = K_fold_cv = k_fold_cv = k_fold_cross_validation = K_fold_cross_validation
+
+def _cross_validation_task(task):
+    """ Returns an (accuracy, precision, recall, F1-score)-tuple
+        for the given (parameters, train, test, seed)-task.
+    """
+    kwargs, d1, d2, r = task
+    Classifier = _cross_validation_data["Classifier"]
+    data = _cross_validation_data["data"]
+    if r is not None:
+        seed(r)
+    classifier = Classifier(train=[data[i] for i in d1], **kwargs)
+    return classifier.test([data[i] for i in d2], **kwargs)
 
 
 def folds(documents=[], K=10, **kwargs):
@@ -2590,6 +3733,7 @@ def gridsearch(Classifier, documents=[], folds=10, **kwargs):
         > (0.919, 0.921, 0.919, 0.920), {"c": 10}
         > (0.874, 0.884, 0.865, 0.874), {"c": 1}
         > (0.535, 0.424, 0.551, 0.454), {"c": 0.1}
+        With processes > 1 (or None = all cores), the folds are tested in parallel (0 or 1 = serial).
     """
     def product(*args):
         # Yields the cartesian product of given iterables:
@@ -2602,12 +3746,17 @@ def gridsearch(Classifier, documents=[], folds=10, **kwargs):
     s = [] # [((A, P, R, F, o), parameters), ...]
     p = [] # [[("c", 0.1), ("c", 10), ...],
            #  [("gamma", 0.1), ("gamma", 0.2), ...], ...]
+    o = kwargs.pop("processes", 1)
+    r = kwargs.pop("seed", None)
     for k, v in kwargs.items():
         p.append([(k, v) for v in v])
-    for p in product(*p):
-        p = dict(p)
-        s.append((K_fold_cross_validation(Classifier, documents, folds, **p), p))
-    return sorted(s, reverse=True)
+    p = [dict(p) for p in product(*p)]
+    # Each combination of parameters is tested on the same folds,
+    # and the folds of all combinations are tested in parallel.
+    data, folds = _cross_validation_folds(documents, folds, True, r)
+    s = _cross_validation(Classifier, data, folds, p, o, r)
+    s = list(zip(s, p))
+    return sorted(s, reverse=True, key=itemgetter(0))
 
 
 def feature_selection(documents=[], top=None, method=CHISQUARED, threshold=0.0):
@@ -2645,7 +3794,7 @@ class NB(Classifier):
         self._classes    = {}     # {class: frequency}
         self._features   = {}     # {feature: frequency}
         self._likelihood = {}     # {class: {feature: frequency}}
-        self._cache      = {}     # Cache log likelihood sums.
+        self._log        = None   # Cache log likelihood tables.
         self._method     = method # MULTINOMIAL or BERNOUILLI.
         self._alpha      = alpha  # Smoothing.
         Classifier.__init__(self, train, baseline)
@@ -2669,7 +3818,7 @@ class NB(Classifier):
         type, vector = self._vector(document, type=type)
         self._classes[type] = self._classes.get(type, 0) + 1
         self._likelihood.setdefault(type, {})
-        self._cache.pop(type, None)
+        self._log = None
         for f, w in vector.items():
             if self._method in (BINARY, BINOMIAL, BERNOUILLI):
                 w = 1
@@ -2686,39 +3835,83 @@ class NB(Classifier):
         # The multiplication can cause underflow so we use log() instead.
         # For unknown features, we smoothen with an alpha value.
         v = self._vector(document)[1]
-        m = self._method
-        a = self._alpha
-        n = self._classes.values()
-        n = float(sum(n))
-        p = defaultdict(float)
-        for type in self._classes:
-            if m == MULTINOMIAL:
-                if type not in self._cache: # 10x faster
-                    self._cache[type] = float(sum(self._likelihood[type].values()))
-                d = self._cache[type]
-            if m == BINOMIAL \
-            or m == BERNOUILLI:
-                d = float(self._classes[type])
-            L = self._likelihood[type]
-            g = sum(log((L[f] if f in L else a) / d) for f in v)
-            g = exp(g) * self._classes[type] / n # prior
-            p[type] = g
-        # Normalize probability estimates.
-        s = sum(p.values()) or 1
-        for type in p:
-            p[type] /= s
+        index, types, L, a, p = self._tables()
+        g = L[[index[f] for f in v if f in index]].sum(axis=0) + len(v) * a + p
+        return self._probabilities(g, types, discrete)
+
+    def classify_many(self, documents=[], discrete=True):
+        """ Returns a list of types with the highest probability for the given documents.
+        """
+        v = [self._vector(document)[1] for document in documents]
+        n = np.array([len(v) for v in v], dtype=float)
+        index, types, L, a, p = self._tables()
+        g = _csr_matrix((dict.fromkeys(v, 1) for v in v), index).dot(L)
+        g = np.asarray(g) + n[:, None] * a + p
+        if not types:
+            return [self._probabilities(g, types, discrete) for g in g]
         if not discrete:
-            return Probabilities(self, p)
+            # Normalize probability estimates (log-sum-exp).
+            p = np.exp(g - g.max(axis=1)[:, None])
+            p = p / p.sum(axis=1)[:, None]
+            return [Probabilities(self, zip(types, p)) for p in p.tolist()]
+        # Ties are broken in _probabilities().
+        m = g.argmax(axis=1)
+        t = (g == g[np.arange(len(g)), m][:, None]).sum(axis=1) > 1
+        return [self._probabilities(g[i], types) if t[i] else types[m[i]] for i in range(len(g))]
+
+    def _tables(self):
+        """ Returns a (features, classes, likelihood, alpha, prior)-tuple, where features is
+            a dict of feature => row index, likelihood an array of features x classes,
+            and alpha and prior arrays of classes (log probabilities).
+        """
+        # The log probability of a class for a document is the sum of the likelihood
+        # of its features, + alpha for each feature, + prior, where log(L[f] / d) is
+        # split into log(a / d) + log(L[f] / a), so that features that do not occur
+        # in a class have 0.0 in the table (= smoothed with alpha).
+        # The tables are calculated once, and again after training.
+        if getattr(self, "_log", None) is None:
+            n = float(sum(self._classes.values()))
+            index = dict((f, i) for i, f in enumerate(self._features))
+            types = list(self._classes.keys())
+            L = np.zeros((len(index), len(types)))
+            a = np.zeros(len(types))
+            p = np.zeros(len(types))
+            for j, type in enumerate(types):
+                w = self._likelihood[type]
+                if self._method == MULTINOMIAL:
+                    d = float(sum(w.values()))
+                else:
+                    d = float(self._classes[type])
+                L[[index[f] for f in w], j] = np.log(np.array(list(w.values()), dtype=float) / self._alpha)
+                a[j] = log(self._alpha / d)
+                p[j] = log(self._classes[type] / n)
+            self._log = (index, types, L, a, p)
+        return self._log
+
+    def _probabilities(self, g, types, discrete=True):
+        """ Returns the type with the highest probability for the given array of log probabilities.
+        """
+        if not discrete:
+            # Normalize probability estimates (log-sum-exp).
+            p = np.exp(g - g.max()) if len(g) else g
+            p = p / (p.sum() or 1)
+            return Probabilities(self, zip(types, p.tolist()))
         try:
             # Ties are broken in favor of the majority class
             # (random winner for majority ties).
-            m = max(p.values())
-            p = sorted((self._classes[type], type) for type, g in p.items() if g == m > 0)
+            g = g.tolist()
+            m = max(g)
+            p = sorted((self._classes[type], type) for type, x in zip(types, g) if x == m)
             p = [type for frequency, type in p if frequency == p[0][0]]
             return choice(p)
         except:
             return self.baseline
 
+    def finalize(self):
+        """ Calculates the log likelihood tables, so that they are saved with Classifier.save().
+        """
+        self._tables()
+
 Bayes = NaiveBayes = NB
 
 #--- K-NEAREST NEIGHBOR CLASSIFIER -----------------------------------------------------------------
@@ -2747,13 +3940,31 @@ class KNN(Classifier):
             If the classifier has been trained on LSA concept vectors
             you need to supply LSA.transform(document).
         """
-        # Distance is calculated between the document vector and all training instances.
-        # This will make KNN slow in higher dimensions.
-        classes = {}
-        v1 = self._vector(document)[1]
-        D = ((distance(v1, v2, method=self.distance), type) for type, v2 in self._vectors)
-        D = ((d, type) for d, type in D if d < 1) # Nothing in common if distance=1.0.
-        D = heapq.nsmallest(self.k, D)            # k-least distant.
+        return self.classify_many([document], discrete)[0]
+
+    def classify_many(self, documents=[], discrete=True):
+        """ Returns a list of types with the highest probability for the given documents.
+            With distance=COSINE, only training instances that share features
+            with a document are scored, using an inverted index.
+        """
+        vectors = [self._vector(document)[1] for document in documents]
+        if self.distance == COSINE:
+            D = self._nearest(vectors)
+        else:
+            # Distance is calculated between the document vector and all training instances.
+            # This will make KNN slow in higher dimensions.
+            D = []
+            for v1 in vectors:
+                d = ((distance(v1, v2, method=self.distance), type) for type, v2 in self._vectors)
+                d = ((d, type) for d, type in d if d < 1) # Nothing in common if distance=1.0.
+                d = heapq.nsmallest(self.k, d)            # k-least distant.
+                D.append(d)
+        return [self._vote(d, discrete) for d in D]
+
+    def _vote(self, D, discrete=True):
+        """ Returns the type with the highest probability for the given list of
+            (distance, type)-tuples of nearest neighbors.
+        """
         # Normalize probability estimates.
         s = sum(1 - d for d, type in D) or 1
         p = defaultdict(float)
@@ -2771,6 +3982,50 @@ class KNN(Classifier):
         except:
             return self.baseline
 
+    def _nearest(self, vectors=[], batch=100):
+        """ Returns a list of k (cosine distance, type)-tuples for each given vector.
+        """
+        m, norms, columns, types, n = self._index()
+        D = []
+        for i in range(0, len(vectors), batch):
+            # The dot product of a batch of vectors and the inverted index (features x instances)
+            # yields a sparse matrix with the nonzero dot products with all training instances.
+            v = vectors[i:i + batch]
+            x = _csr_matrix(v, columns).dot(m).tocsr()
+            for j, v in enumerate(v):
+                a, b = x.indptr[j], x.indptr[j + 1]
+                k = x.indices[a:b]
+                d = norms[k] * l2_norm(v)
+                d = 1 - x.data[a:b] / np.where(d == 0, 1, d)
+                k, d = k[d < 1], d[d < 1] # Nothing in common if distance=1.0.
+                if len(d) > self.k:
+                    e = np.partition(d, self.k - 1)[self.k - 1]
+                    k, d = k[d <= e], d[d <= e]
+                D.append(heapq.nsmallest(self.k, ((float(d), types[k]) for d, k in zip(d, k))))
+        return D
+
+    def _index(self):
+        """ Returns a (matrix, norms, columns, types, n)-tuple for the n training instances,
+            where matrix is a SciPy sparse matrix with a row of instances for each feature.
+        """
+        # The index is built once, or again when more instances are trained.
+        # Pickled KNN classifiers from older versions have no index.
+        n = len(self._vectors)
+        if getattr(self, "_inverted_index", None) is None or self._inverted_index[-1] != n:
+            columns = {}
+            for type, v in self._vectors:
+                for f in v:
+                    columns.setdefault(f, len(columns))
+            m = _csr_matrix((v for type, v in self._vectors), columns).T.tocsr()
+            norms = np.array([l2_norm(v) for type, v in self._vectors])
+            self._inverted_index = (m, norms, columns, [type for type, v in self._vectors], n)
+        return self._inverted_index
+
+    def finalize(self):
+        """ Builds the inverted index, so that it is saved with Classifier.save().
+        """
+        self._index()
+
 NearestNeighbor = kNN = KNN
 
 #from pattern.vector import Document, KNN
@@ -3031,7 +4286,14 @@ class SLP(Classifier):
             for the given inputs (i.e., document vector features).
             A feature is taken to occur in a vector (1) or not (0), i.e. BINARY weight.
         """
-        self._weight = defaultdict(dict) # {class: {feature: (weight, weight sum, timestamp)}}
+        # The weights are stored in NumPy arrays of features x classes,
+        # with a feature => row index and a class => column index.
+        self._index = {}                  # {feature: row}
+        self._types = []                  # [class, class, ...] (columns)
+        self._w0 = np.zeros((0, 0))       # Weight.
+        self._w1 = np.zeros((0, 0))       # Weight sum.
+        self._t  = np.zeros((0, 0), int)  # Timestamp (-1 = no weight).
+        self._averaged = None
         self._iterations = iterations
         self._iteration = 0
         train = list(train)
@@ -3044,64 +4306,138 @@ class SLP(Classifier):
 
     @property
     def features(self):
-        return list(set(chain(*(list(f.keys()) for f in self._weight.values()))))
+        return list(self._index.keys())
 
     def train(self, document, type=None):
         """ Trains the classifier with the given document of the given type (i.e., class).
             A document can be a Document, Vector, dict, list or string.
             If no type is given, Document.type will be used instead.
         """
-        def _update(type, feature, weight, i):
-            # Collins M. (2002). Discriminative Training Methods for Hidden Markov Models. EMNLP 2002.
-            # Based on: http://honnibal.wordpress.com/2013/09/11/
-            # Accumulate average weights (prevents overfitting).
-            # Instead of keeping all intermediate results and averaging them at the end,
-            # we keep a running sum and the iteration in which the sum was last modified.
-            w = self._weight[type]
-            w0, w1, j = w[feature] if feature in w else (random() * 2 - 1, 0, 0)
-            w0 += weight
-            w[feature] = (w0, (i - j) * w0 + w1, i)
         type, vector = self._vector(document, type=type)
         self._classes[type] = self._classes.get(type, 0) + 1
         t1 = type
-        t2 = SLP.classify(self, document)
+        t2 = SLP._classify(self, vector)
         if t1 != t2: # Error correction.
             self._iteration += 1
-            for f in vector:
-                _update(t1, f, +1, self._iteration)
-                _update(t2, f, -1, self._iteration)
+            self._update(vector, t1, t2, self._iteration)
+
+    def train_many(self, documents=[]):
+        """ Trains the classifier with the given list of Documents or (document, type)-tuples.
+        """
+        # The perceptron learns from its errors, one document at a time.
+        for d in (isinstance(d, Document) and (d, d.type) or d for d in documents):
+            self.train(*d)
+
+    def _update(self, vector, t1, t2, i):
+        """ Updates the weights of the given vector features,
+            for the correct class (+1) and the predicted class (-1).
+        """
+        # Collins M. (2002). Discriminative Training Methods for Hidden Markov Models. EMNLP 2002.
+        # Based on: http://honnibal.wordpress.com/2013/09/11/
+        # Accumulate average weights (prevents overfitting).
+        # Instead of keeping all intermediate results and averaging them at the end,
+        # we keep a running sum and the iteration in which the sum was last modified.
+        r = [self._row(f) for f in vector]
+        c = [self._column(t1), self._column(t2)]
+        # New weights are initialized randomly, in the order of the features.
+        w = [[random() * 2 - 1 if j < 0 else 0.0 for j in t] for t in self._t[r][:, c].tolist()]
+        w = np.array(w, dtype=float).reshape(len(r), 2)
+        for j, (c, weight) in enumerate(((c[0], +1), (c[1], -1))):
+            t = self._t[r, c]
+            w0 = np.where(t < 0, w[:, j], self._w0[r, c]) + weight
+            w1 = np.where(t < 0, 0.0, self._w1[r, c])
+            t = np.where(t < 0, 0, t)
+            self._w0[r, c] = w0
+            self._w1[r, c] = (i - t) * w0 + w1
+            self._t[r, c] = i
+        self._averaged = None
+
+    def _row(self, feature):
+        """ Returns the row index of the given feature (a new row if it is unknown).
+        """
+        if feature not in self._index:
+            self._index[feature] = len(self._index)
+            self._resize()
+        return self._index[feature]
+
+    def _column(self, type):
+        """ Returns the column index of the given class (a new column if it is unknown).
+        """
+        if type not in self._types:
+            self._types.append(type)
+            self._resize()
+        return self._types.index(type)
+
+    def _resize(self, n=None, m=None):
+        """ Grows the weight arrays to fit all features and classes (doubling the size),
+            or resizes them to n rows and m columns.
+        """
+        n0, m0 = self._w0.shape
+        n1 = len(self._index)
+        m1 = len(self._types)
+        if n is None and n1 <= n0 and m1 <= m0:
+            return
+        if n is None:
+            n = n1 > n0 and max(n1, n0 * 2, 64) or n0
+            m = m1 > m0 and max(m1, m0 * 2, 4) or m0
+        for k, v in (("_w0", 0.0), ("_w1", 0.0), ("_t", -1)):
+            a = getattr(self, k)
+            b = np.zeros((n, m), dtype=a.dtype)
+            b[:] = v
+            b[:min(n, n0), :min(m, m0)] = a[:n, :m]
+            setattr(self, k, b)
+
+    def _averaged_weights(self):
+        """ Returns an array of features x classes with the average weights.
+        """
+        # The average weights are calculated when needed (e.g., classify_many()),
+        # and cached until the next update.
+        if self._averaged is None:
+            i = float(self._iteration or 1)
+            n, m = len(self._index), len(self._types)
+            self._averaged = ((i - self._t[:n, :m]) * self._w0[:n, :m] + self._w1[:n, :m]) / i
+        return self._averaged
 
     def classify(self, document, discrete=True):
         """ Returns the type with the highest probability for the given document.
             If the classifier has been trained on LSA concept vectors
             you need to supply LSA.transform(document).
         """
-        v = self._vector(document)[1]
+        return self._classify(self._vector(document)[1], discrete)
+
+    def classify_many(self, documents=[], discrete=True):
+        """ Returns a list of types with the highest probability for the given documents.
+        """
+        v = [self._vector(document)[1] for document in documents]
+        v = _csr_matrix((dict.fromkeys(v, 1) for v in v), self._index)
+        p = np.asarray(v.dot(self._averaged_weights()))
+        return [self._probabilities(p, discrete) for p in p]
+
+    def _classify(self, vector, discrete=True):
+        # Rows of features in the given vector, columns of classes.
+        r = [self._index[f] for f in vector if f in self._index]
+        m = len(self._types)
         i = self._iteration or 1
         i = float(i)
-        p = defaultdict(float)
-        for type, w in self._weight.items():
-            #p[type] = sum(w[f][0] for f in v if f in w) # Without averaging.
-            s = 0.
-            for f in v:
-                if f in w:
-                    w0, w1, j = w[f]
-                    s += ((i - j) * w0 + w1) / i
-            p[type] = s
-        # Normalize probability estimates.
-        p = softmax(p)
-        #m = min(chain(p.values(), (0,)))
-        #s = sum(x-m for x in p.values()) or 1
-        #for type in p:
-        #    p[type] -= m
-        #    p[type] /= s
+        #p = self._w0[r, :m].sum(axis=0) # Without averaging.
+        p = ((i - self._t[r, :m]) * self._w0[r, :m] + self._w1[r, :m]) / i
+        p = p.sum(axis=0)
+        return self._probabilities(p, discrete)
+
+    def _probabilities(self, p, discrete=True):
+        """ Returns the type with the highest probability for the given array of class weights.
+        """
         if not discrete:
-            return Probabilities(self, p)
+            # Normalize probability estimates.
+            return Probabilities(self, softmax(dict(zip(self._types, p.tolist()))))
         try:
             # Ties are broken in favor of the majority class
             # (random winner for majority ties).
-            m = max(p.values())
-            p = sorted((self._classes[type], type) for type, w in p.items() if w == m > 0)
+            # The weights are compared as normalized probability estimates.
+            p = np.exp(p - p.max())
+            p = p / p.sum()
+            m = p.max()
+            p = sorted((self._classes[self._types[i]], self._types[i]) for i in np.flatnonzero((p == m) & (m > 0)))
             p = [type for frequency, type in p if frequency == p[0][0]]
             return choice(p)
         except:
@@ -3112,6 +4448,49 @@ class SLP(Classifier):
             reducing file size with Classifier.save().
         """
         self._vectors = []
+        self._averaged = None
+        self._resize(len(self._index), len(self._types))
+
+    def __getstate__(self):
+        # The average weights are not pickled (see Classifier.save()).
+        d = self.__dict__.copy()
+        d["_averaged"] = None
+        return d
+
+    def _on_load(self, path):
+        # Called from Classifier.load().
+        # In Pattern 3.6-, the weights are stored in a dict of dicts,
+        # {class: {feature: (weight, weight sum, timestamp)}},
+        # which is converted to arrays the first time they are needed (see __getattr__).
+        self._averaged = None
+
+    def __getattr__(self, k):
+        if k in ("_index", "_types", "_w0", "_w1", "_t") and "_weight" in self.__dict__:
+            self._convert(self.__dict__.pop("_weight"))
+            return getattr(self, k)
+        raise AttributeError("'%s' object has no attribute '%s'" % (self.__class__.__name__, k))
+
+    def _convert(self, weight):
+        """ Converts the given Pattern 3.6- dict of weights to arrays.
+        """
+        self._index = {}
+        self._types = list(weight.keys())
+        for w in weight.values():
+            for f in w:
+                if f not in self._index:
+                    self._index[f] = len(self._index)
+        n, m = len(self._index), len(self._types)
+        self._w0 = np.zeros((n, m))
+        self._w1 = np.zeros((n, m))
+        self._t  = np.zeros((n, m), int) - 1
+        for c, w in enumerate(weight.values()):
+            if w:
+                r = [self._index[f] for f in w]
+                w0, w1, t = zip(*w.values())
+                self._w0[r, c] = w0
+                self._w1[r, c] = w1
+                self._t[r, c] = t
+        self._averaged = None
 
 AP = AveragedPerceptron = Perceptron = SLP
 
@@ -3168,10 +4547,15 @@ def sigmoid_derivative(y):
 
 class BPNN(Classifier):
 
+    # Pattern 3.6- (online learning, weights in lists of lists).
+    _batch, _columns = 1, None
+
     def __init__(self, train=[], baseline=MAJORITY, layers=2, iterations=1000, **kwargs):
         """ Backpropagation neural network (BPNN) is a supervised learning method 
             bases on a network of interconnected neurons
             inspired by an animal's nervous system (i.e., the brain).
+            By default, the weights are updated after each training vector (batch=1),
+            or after each mini-batch of training vectors with batch > 1 (e.g., batch=10).
         """
         # Based on:
         # http://www.cs.pomona.edu/classes/cs30/notes/cs030neural.py
@@ -3180,6 +4564,7 @@ class BPNN(Classifier):
         self._iterations = iterations
         self._rate = kwargs.get("rate", 0.5)
         self._momentum = kwargs.get("momentum", 0.1)
+        self._batch = kwargs.get("batch", 1)
         self._trained = False
         Classifier.__init__(self, train, baseline)
 
@@ -3199,6 +4584,10 @@ class BPNN(Classifier):
     def momentum(self):
         return self._momentum
 
+    @property
+    def batch(self):
+        return self._batch
+
     learningrate = learning_rate = rate
 
     def _weight_initialization(self, i=1, o=1, hidden=1, method=RANDOM, a=0.0, b=1.0):
@@ -3207,68 +4596,64 @@ class BPNN(Classifier):
         """
         i += 1 # bias
         # Node activation.
-        self._ai = [1.0] * i
-        self._ao = [1.0] * o
-        self._ah = [1.0] * hidden
+        self._ai = np.ones((1, i - 1))
+        self._ao = np.ones((1, o))
+        self._ah = np.ones((1, hidden))
         # Node weights (w) and recent change (c).
-        self._wi = matrix(i, hidden, a, b)
-        self._ci = matrix(i, hidden)
-        self._wo = matrix(hidden, o, a, b)
-        self._co = matrix(hidden, o)
+        # The last row of input weights is the bias.
+        self._wi = np.array(matrix(i, hidden, a, b)).reshape(i, hidden)
+        self._ci = np.zeros((i, hidden))
+        self._wo = np.array(matrix(hidden, o, a, b)).reshape(hidden, o)
+        self._co = np.zeros((hidden, o))
 
     def _propagate_forward(self, input=[]):
         """ Propagates the input through the network and returns the output activiation.
+            The input is a list of values, or a matrix with a row of values
+            for each vector in a batch (NumPy array or SciPy sparse matrix).
         """
-        ai, ao, ah, wi, wo = self._ai, self._ao, self._ah, self._wi, self._wo
-        assert len(input) == len(ai) - 1
+        wi, wo = self._wi, self._wo
+        if isinstance(input, (list, tuple)):
+            input = np.array(input, dtype=float).reshape(1, -1)
+        assert input.shape[1] == wi.shape[0] - 1
         # Activate input nodes.
-        for i, v in enumerate(input):
-            ai[i] = v
+        self._ai = input
         # Activate hidden nodes.
-        for j, v in enumerate(ah):
-            ah[j] = sigmoid(sum((v * wi[i][j] for i, v in enumerate(ai))))
+        self._ah = np.tanh(np.asarray(input.dot(wi[:-1])) + wi[-1]) # sigmoid
         # Activate output nodes.
-        for k, v in enumerate(ao):
-            ao[k] = sigmoid(sum((v * wo[j][k] for j, v in enumerate(ah))))
-        return list(ao)
+        self._ao = np.tanh(self._ah.dot(wo))
+        return self._ao
 
     def _propagate_backward(self, output=[], rate=0.5, momentum=0.1):
         """ Propagates the output through the network and
             generates delta for hidden and output nodes.
             The learning rate determines speed vs. accuracy of the algorithm.
+            For a batch, the weights are updated with the average change.
         """
-        ai, ao, ah, wi, wo, ci, co = self._ai, self._ao, self._ah, self._wi, self._wo, self._ci, self._co
+        ai, ao, ah, wi, wo = self._ai, self._ao, self._ah, self._wi, self._wo
+        output = np.array(output, dtype=float).reshape(ao.shape)
+        n = float(ao.shape[0])
         # Compute delta for output nodes.
-        do = [0.0] * len(ao)
-        for k, v in enumerate(ao):
-            error = output[k] - v
-            do[k] = error * sigmoid_derivative(v)
+        do = (output - ao) * (1.0 - ao * ao) # sigmoid derivative
         # Compute delta for hidden nodes.
-        dh = [0.0] * len(ah)
-        for j, v in enumerate(ah):
-            error = sum(do[k] * wo[j][k] for k in range(len(ao)))
-            dh[j] = error * sigmoid_derivative(v)
+        dh = do.dot(wo.T) * (1.0 - ah * ah)
         # Update output weights.
-        for j, v1 in enumerate(ah):
-            for k, v2 in enumerate(ao):
-                change = do[k] * v1
-                wo[j][k] += rate * change + momentum * co[j][k]
-                co[j][k] = change
+        change = ah.T.dot(do) / n
+        wo += rate * change + momentum * self._co
+        self._co = change
         # Update input weight.
-        for i, v1 in enumerate(ai):
-            for j, v2 in enumerate(ah):
-                change = dh[j] * v1
-                wi[i][j] += rate * change + momentum * ci[i][j]
-                ci[i][j] = change
+        change = np.vstack((np.asarray(ai.T.dot(dh)), dh.sum(axis=0))) / n
+        wi += rate * change + momentum * self._ci
+        self._ci = change
         # Compute and return error.
-        return sum(0.5 * (output[k] - v) ** 2 for k, v in enumerate(ao))
+        return float(0.5 * ((output - ao) ** 2).sum())
 
     _backprop = _propagate_backward
 
-    def _train(self, data=[], iterations=1000, rate=0.5, momentum=0.1):
+    def _train(self, data=[], iterations=1000, rate=0.5, momentum=0.1, batch=1):
         """ Trains the network with the given data using backpropagation.
             The given data is a list of (input, output)-tuples, 
-            where each input and output a list of values.
+            where each input and output a list of values,
+            or an (input, output)-tuple of matrices with a row for each vector.
             For example, to learn the XOR-function:
             nn = BPNN()
             nn._weight_initialization(2, 1, hidden=2)
@@ -3281,15 +4666,25 @@ class BPNN(Classifier):
             print(nn._classify([0,0]))
             print(nn._classify([0,1]))
         """
+        if isinstance(data, tuple):
+            x, y = data
+        else:
+            x = np.array([input for input, output in data], dtype=float)
+            y = np.array([output for input, output in data], dtype=float)
+        if x.shape[0] == 0:
+            return
+        x = x.reshape(x.shape[0], -1)
+        y = y.reshape(y.shape[0], -1)
         # Error decreases with each iteration.
+        b = [(x[i:i + batch], y[i:i + batch]) for i in range(0, x.shape[0], max(1, batch))]
         for i in range(iterations):
             error = 0.0
-            for input, output in data:
+            for input, output in b:
                 self._propagate_forward(input)
                 error += self._propagate_backward(output, rate, momentum)
 
     def _classify(self, input):
-        return self._propagate_forward(input)
+        return self._propagate_forward(input)[0].tolist()
 
     def train(self, document, type=None):
         """ Trains the classifier with the given document of the given type (i.e., class).
@@ -3304,24 +4699,45 @@ class BPNN(Classifier):
             If the classifier has been trained on LSA concept vectors
             you need to supply LSA.transform(document).
         """
+        return self.classify_many([document], discrete)[0]
+
+    def classify_many(self, documents=[], discrete=True):
+        """ Returns a list of types with the highest probability for the given documents.
+        """
+        if not self.classes:
+            return [self.baseline for document in documents]
         if not self._trained:
             # Batch learning (we need to know the number of features in advance).
-            n = float(len(self.classes)) - 1
+            n = float(len(self.classes)) - 1 or 1.0
             H1 = list(sorted(self.features))
             H2 = dict((x, i / n) for i, x in enumerate(self.classes))  # Class => float hash (0.0-1.0).
             H3 = dict((i / n, x) for i, x in enumerate(self.classes))  # Class reversed hash.
-            v = [([v.get(f, 0.0) for f in H1], [H2[type]]) for type, v in self._vectors]
             self._h = (H1, H2, H3)
+            self._columns = None
+            x = _csr_matrix((v for type, v in self._vectors), self.columns)
+            y = np.array([H2[type] for type, v in self._vectors])
             self._weight_initialization(i=len(H1), o=1, hidden=self._layers, a=0.0, b=1.0)
-            self._train(v, self._iterations, self._rate, self._momentum)
+            self._train((x, y), self._iterations, self._rate, self._momentum, self._batch)
             self._trained = True
         H1, H2, H3 = self._h
-        v = self._vector(document)[1]
-        i = [v.get(f, 0.0) for f in H1]
-        o = self._classify(i)[0]
-        c = min(H3.keys(), key=lambda k: abs(k - o))
-        c = H3[c]
-        return c
+        v = [self._vector(document)[1] for document in documents]
+        o = self._propagate_forward(_csr_matrix(v, self.columns))[:, 0]
+        k = sorted(H3.keys())
+        return [H3[min(k, key=lambda k: abs(k - o))] for o in o.tolist()]
+
+    @property
+    def columns(self):
+        # Feature => input node index.
+        if self._columns is None:
+            self._columns = dict((f, i) for i, f in enumerate(self._h[0]))
+        return self._columns
+
+    def _on_load(self, path):
+        # Called from Classifier.load().
+        # Pattern 3.6- stored node weights as lists of lists.
+        if self._trained and isinstance(self._wi, list):
+            self._wi, self._ci = np.array(self._wi), np.array(self._ci)
+            self._wo, self._co = np.array(self._wo), np.array(self._co)
 
     def finalize(self):
         """ Removes training data from memory, keeping only the node weights,
@@ -3378,6 +4794,53 @@ LOGIT = L2LR = 0 # LIBLINEAR L2 logistic regression
 # separation may be easier in higher dimensions (using a kernel).
 
 
+def _svm_nodes(vectors, features, Node, maximum=None, bias=None):
+    """ Returns a (nodes, rows)-tuple for the given list of vectors (dicts), where nodes is
+        a NumPy array of LIBSVM svm_node or LIBLINEAR feature_node structs (index, value),
+        and rows is a ctypes array with a pointer to the first node of each vector.
+        Features are mapped to indices with the given dict (unknown features to len + 1, 2, ...),
+        and each row is sorted by index and terminated by index -1.
+        Indices > maximum are omitted. With bias, each row has an extra LIBLINEAR bias node.
+    """
+    from ctypes import POINTER, sizeof
+    # Collect the nonzero features in one pass.
+    data, indices, indptr = array("d"), array("i"), array("i", [0])
+    m = len(features)
+    for v in vectors:
+        for k, (f, w) in enumerate(v.items()):
+            if w != 0:
+                indices.append(features.get(f, k + m + 1))
+                data.append(w)
+        indptr.append(len(indices))
+    n = len(indptr) - 1
+    data = np.frombuffer(data, dtype=np.float64) if data else np.zeros(0)
+    indices = np.frombuffer(indices, dtype=np.intc) if indices else np.zeros(0, np.intc)
+    indptr = np.frombuffer(indptr, dtype=np.intc).astype(np.intp)
+    r = np.repeat(np.arange(n), np.diff(indptr))
+    if maximum is not None:
+        i = indices <= maximum
+        r, indices, data = r[i], indices[i], data[i]
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(r, minlength=n))))
+    i = np.lexsort((indices, r))
+    indices, data = indices[i], data[i]
+    # Each row has 1 or 2 extra nodes (bias + terminator).
+    k = 1 if bias is None else 2
+    p = indptr + k * np.arange(n + 1)
+    nodes = np.zeros(p[-1], dtype=np.dtype([("index", np.intc), ("value", np.float64)], align=True))
+    assert nodes.itemsize == sizeof(Node)
+    nodes["index"] = -1
+    i = np.arange(len(indices)) + k * r
+    nodes["index"][i] = indices
+    nodes["value"][i] = data
+    if bias is not None and bias >= 0:
+        nodes["index"][p[1:] - 2] = (maximum or m) + 1
+        nodes["value"][p[1:] - 2] = bias
+    rows = (POINTER(Node) * n)()
+    if n > 0:
+        np.frombuffer(rows, dtype=np.uintp)[:] = nodes.ctypes.data + p[:-1] * nodes.itemsize
+    return nodes, rows
+
+
 class SVM(Classifier):
 
     def __init__(self, *args, **kwargs):
@@ -3530,24 +4993,33 @@ class SVM(Classifier):
         """ Calls libsvm.svm_train() to create a model.
             Vector classes and features are mapped to integers.
         """
+        from ctypes import c_double
         # Note: LIBLINEAR feature indices start from 1 (not 0).
         M  = [v for type, v in self._vectors]                        # List of vectors.
         H1 = dict((w, i + 1) for i, w in enumerate(self.features))     # Feature => integer hash.
         H2 = dict((w, i + 1) for i, w in enumerate(self.classes))      # Class => integer hash.
         H3 = dict((i + 1, w) for i, w in enumerate(self.classes))      # Class reversed hash.
-        x  = list(map(lambda v: dict(map(lambda k: (H1[k], v[k]), v)), M)) # Hashed vectors.
-        y  = list(map(lambda v: H2[v[0]], self._vectors))                  # Hashed classes.
+        y  = [H2[type] for type, v in self._vectors]                   # Hashed classes.
+        if not M:
+            return
+        # The problem (i.e., hashed vectors) is passed to LIBSVM / LIBLINEAR
+        # as an array of nodes, built from the vectors at once.
         # For linear SVC, use LIBLINEAR which is faster.
         # For kernel SVC, use LIBSVM.
         if self.extension == LIBLINEAR:
-            f = self._svm.liblinearutil.train
+            svm = self._svm.liblinearutil
+            x, rows = _svm_nodes(M, H1, svm.feature_node, bias=-1)
+            problem = svm.problem.__new__(svm.problem)
+            problem.bias = -1
             o = "-s %s -c %s -p %s -q" % (
                 self._solver,     # -f
                 self._cost,       # -c
                 self._epsilon     # -p
             )
         else:
-            f = self._svm.libsvmutil.svm_train
+            svm = self._svm.libsvmutil
+            x, rows = _svm_nodes(M, H1, svm.svm_node)
+            problem = svm.svm_problem.__new__(svm.svm_problem)
             o = "-s %s -t %s -d %s -g %s -r %s -c %s -p %s -n %s -m %s -h %s -b %s -q" % (
                 self._type,       # -s
                 self._kernel,     # -t
@@ -3561,9 +5033,24 @@ class SVM(Classifier):
             int(self._shrinking), # -h
             int(self._type != DETECTION), # -b
             )
+        problem.l = len(y)
+        problem.n = int(x["index"].max()) if len(x) else 0
+        problem.y = (c_double * len(y))(*y)
+        problem.x = rows
+        problem.x_space = x # LIBSVM support vectors point to the nodes.
+        if self.extension == LIBLINEAR:
+            # liblinearutil.train() expects lists or NumPy arrays.
+            o = svm.parameter(o)
+            svm.liblinear.set_print_string_function(o.print_func)
+            e = svm.liblinear.check_parameter(problem, o)
+            if e:
+                raise ValueError(e)
+            m = svm.toPyModel(svm.liblinear.train(problem, o))
+        else:
+            m = svm.svm_train(problem, o)
         # Cache the model and the feature hash.
         # SVM.train() will remove the cached model (since it needs to be retrained).
-        self._model = (f(y, x, o.split()), H1, H2, H3)
+        self._model = (m, H1, H2, H3)
 
     def _classify(self, document, probability=False):
         """ Calls libsvm.svm_predict() with the cached model.
@@ -3573,37 +5060,58 @@ class SVM(Classifier):
         """
         if self._model is None:
             return None
+        return self._classify_many([document], probability)[0]
+
+    def _classify_many(self, documents, probability=False):
+        """ Calls svm_predict() in LIBSVM or LIBLINEAR for each document,
+            with the nodes of all documents built at once.
+        """
+        from ctypes import c_double
         M = self._model[0]
         H1 = self._model[1]
         H2 = self._model[2]
         H3 = self._model[3]
-        n = len(H1)
-        v = self._vector(document)[1]
-        v = dict(map(lambda k: (H1.get(k[1], k[0] + n + 1), v[k[1]]), enumerate(v)))
+        v = [self._vector(document)[1] for document in documents]
         s = getattr(self, "_solver", None)
         # For linear SVC, use LIBLINEAR which is 10x faster.
         # For kernel SVC, use LIBSVM.
+        # Note: LIBLINEAR only supports probabilities for logistic regression (solver=0).
         if self.extension == LIBLINEAR:
-            f = self._svm.liblinearutil.predict
-            o = "-b %s -q" % (int(probability) if s == 0 else 0)
+            svm = self._svm.liblinearutil
+            n = M.get_nr_feature()
+            x, rows = _svm_nodes(v, H1, svm.feature_node, maximum=n, bias=M.bias)
+            k = M.get_nr_class()
+            if probability and M.is_probability_model():
+                f, a, e = svm.liblinear.predict_probability, (c_double * k)(), True
+            else:
+                f, a, e = svm.liblinear.predict_values, (c_double * k)(), False
         else:
-            f = self._svm.libsvmutil.svm_predict
-            o = "-b %s -q" % (int(probability))
-        p = f([0], [v], M, o)
-        # Note: LIBLINEAR only supports probabilities for logistic regression (solver=0).
-        if self._type == CLASSIFICATION and probability and self.extension == LIBLINEAR and s != 0:
-            return Probabilities(self, defaultdict(float, ((H3[p[0][0]], 1.0),)))
-        if self._type == CLASSIFICATION and probability and self.extension == LIBLINEAR:
-            return Probabilities(self, defaultdict(float, ((H3[i + 1], w) for i, w in enumerate(p[2][0]))))
-        if self._type == CLASSIFICATION and probability:
-            return Probabilities(self, defaultdict(float, ((H3[i + 0], w) for i, w in enumerate(p[2][0]))))
-        if self._type == CLASSIFICATION:
-            return H3.get(int(p[0][0]))
-        if self._type == REGRESSION:
-            return p[0][0]
-        if self._type == DETECTION:
-            return p[0][0] > 0 # -1 = outlier => return False
-        return p[0][0]
+            svm = self._svm.libsvmutil
+            x, rows = _svm_nodes(v, H1, svm.svm_node)
+            k = M.get_nr_class()
+            if probability and M.is_probability_model():
+                f, a, e = svm.libsvm.svm_predict_probability, (c_double * max(1, k))(), True
+            else:
+                f, a, e = svm.libsvm.svm_predict_values, (c_double * max(1, k * (k - 1) // 2))(), False
+        # The order of classes in probability estimates is the order in the model.
+        labels = [H3.get(i) for i in M.get_labels()] if self._type == CLASSIFICATION else []
+        p = []
+        for i in range(len(v)):
+            y = f(M, rows[i], a)
+            if self._type == CLASSIFICATION and probability and not e:
+                # No probability estimates.
+                p.append(Probabilities(self, defaultdict(float, ((H3[int(y)], 1.0),))))
+            elif self._type == CLASSIFICATION and probability:
+                p.append(Probabilities(self, defaultdict(float, zip(labels, a[:len(labels)]))))
+            elif self._type == CLASSIFICATION:
+                p.append(H3.get(int(y)))
+            elif self._type == REGRESSION:
+                p.append(y)
+            elif self._type == DETECTION:
+                p.append(y > 0) # -1 = outlier => return False
+            else:
+                p.append(y)
+        return p
 
     def train(self, document, type=None):
         """ Trains the classifier with the given document of the given type (i.e., class).
@@ -3622,18 +5130,27 @@ class SVM(Classifier):
             self._train()
         return self._classify(document, probability=not discrete)
 
+    def classify_many(self, documents=[], discrete=True):
+        """ Returns a list of types with the highest probability for the given documents.
+        """
+        if self._model is None:
+            self._train()
+        if self._model is None:
+            return [None for document in documents]
+        return self._classify_many(documents, probability=not discrete)
+
     def save(self, path, final=False):
         if self._model is None:
             self._train()
-        if self.extension == LIBSVM:
+        if self._model is not None and self.extension == LIBSVM:
             self._svm.libsvmutil.svm_save_model(path, self._model[0])
-        if self.extension == LIBLINEAR:
+        if self._model is not None and self.extension == LIBLINEAR:
             self._svm.liblinearutil.save_model(path, self._model[0])
         # Save LIBSVM/LIBLINEAR model as a string.
         # Unlink LIBSVM/LIBLINEAR binaries for cPickle.
         svm, model = self._svm, self._model
         self._svm = None
-        self._model = (open(path, "rb").read(),) + model[1:]
+        self._model = model and (open(path, "rb").read(),) + model[1:]
         Classifier.save(self, path, final)
         self._svm = svm
         self._model = model
@@ -3719,26 +5236,76 @@ class SVM(Classifier):
 # Multinomial logistic regression (or Maximum Entropy) is competitive to SVM and gives probabilities.
 
 
+LBFGS = "lbfgs" # Limited-memory BFGS (full batch).
+SGD   = "sgd"   # Mini-batch stochastic gradient descent with early stopping.
+
+
+def _lr_gradient(t, x, y, l=0.1, method=BINOMIAL):
+    """ Returns a (cost, gradient)-tuple for the given theta array (classes x 1 + features),
+        the given sparse matrix x (vectors x features), and the given one-hot matrix y
+        (vectors x classes), with L2 regularization l.
+        With MULTINOMIAL, the cost is the softmax cross-entropy of all classes jointly.
+        With BINOMIAL, it is the sum of the binary cross-entropy of each class (one-vs-rest).
+    """
+    m = float(x.shape[0])
+    z = x.dot(t[:, 1:].T) + t[:, 0]
+    if method == MULTINOMIAL:
+        z = z - z.max(axis=1)[:, None]
+        z = z - np.log(np.exp(z).sum(axis=1))[:, None] # log softmax
+        J = -(y * z).sum() / m
+        d = np.exp(z) - y
+    else:
+        J = (np.logaddexp(0, z) - y * z).sum() / m       # log(1 + e^z) - yz
+        d = scipy.special.expit(z) - y
+    g = np.empty_like(t)
+    g[:, 0] = d.sum(axis=0) / m
+    g[:, 1:] = x.T.dot(d).T / m
+    # L2 regularization prevents overfitting by excluding unlikely feature values.
+    J += l / m / 2 * (t[:, 1:] ** 2).sum()
+    g[:, 1:] += l / m * t[:, 1:]
+    return J, g
+
+
 class LR(Classifier):
 
-    def __init__(self, train=[], baseline=MAJORITY, iterations=100, **kwargs):
+    # Pattern 3.6- (one-vs-rest, fmin_cg).
+    _method, _optimizer, _l, _batch, _rate = BINOMIAL, LBFGS, 0.1, 100, 0.1
+
+    def __init__(self, train=[], baseline=MAJORITY, iterations=100, method=BINOMIAL, optimizer=LBFGS, **kwargs):
         """ Logistic Regression is a supervised machine learning method,
             Documents are assigned a probability for each possible class,
             based on the probability that a feature occurs in a class 
             (independent of other features).
+            With method=BINOMIAL, each class is trained against the others (one-vs-rest).
+            With method=MULTINOMIAL (softmax), all classes are trained jointly.
+            With optimizer=SGD, training uses mini-batches (batch=100, rate=0.1),
+            and stops early when the cost on a held-out 10% no longer decreases.
         """
         import scipy
         import scipy.sparse
         import scipy.special
         import scipy.optimize
         self._iterations = iterations
-        self._model = None
+        self._method     = method
+        self._optimizer  = optimizer
+        self._l          = kwargs.get("l", 0.1)
+        self._batch      = kwargs.get("batch", 100)
+        self._rate       = kwargs.get("rate", 0.1)
+        self._model      = None
         Classifier.__init__(self, train, baseline)
 
     @property
     def iterations(self):
         return self._iterations
 
+    @property
+    def method(self):
+        return self._method
+
+    @property
+    def optimizer(self):
+        return self._optimizer
+
     def _train(self):
         H1 = dict((w, i) for i, w in enumerate(self.classes))  #   class => index
         H2 = dict((i, w) for i, w in enumerate(self.classes))  #   index => class
@@ -3747,75 +5314,85 @@ class LR(Classifier):
         # Sparse matrix.
         # A full matrix of 10,000 vectors, 100,000 features
         # would take 1,000,000,000 x 8 = 7.5GB.
-        m = len(self._vectors)
-        n = len(H4)
-        try:
-            x = scipy.sparse.lil_matrix((m, n))
-            for i, (type, v) in enumerate(self._vectors):
-                for w in v:
-                    x[i, H3[w]] = v[w]
-            x = scipy.sparse.csr_matrix(x) # faster dot
-            y = scipy.array([H1[type] for type, v in self._vectors])
-            t = self._gradient_descent(x, y, l=0.1, iterations=self._iterations)
-        except:
+        x = _csr_matrix((v for type, v in self._vectors), H3)
+        y = np.zeros((x.shape[0], len(H1)))
+        y[np.arange(x.shape[0]), [H1[type] for type, v in self._vectors]] = 1
+        if x.shape[0] == 0:
             t = None
+        elif self._optimizer == SGD:
+            t = self._gradient_descent(x, y, l=self._l, iterations=self._iterations)
+        else:
+            t = self._lbfgs(x, y, l=self._l, iterations=self._iterations)
         self._model = (t, H1, H2, H3, H4)
 
+    def _lbfgs(self, x, y, l=0.1, iterations=100):
+        """ Returns the theta array (classes x 1 + features) that minimizes the cost,
+            for all classes at once using L-BFGS.
+        """
+        k, n = y.shape[1], x.shape[1] + 1
+
+        def f(t):
+            J, g = _lr_gradient(t.reshape(k, n), x, y, l, self._method)
+            return J, g.ravel()
+
+        t = scipy.optimize.minimize(f, np.zeros(k * n),
+             jac = True,
+          method = "L-BFGS-B",
+         options = {"maxiter": iterations}).x
+        return t.reshape(k, n)
+
+    def _gradient_descent(self, x, y, l=0.1, iterations=100, patience=5, tolerance=1e-4):
+        """ Returns the theta array (classes x 1 + features) that minimizes the cost,
+            using mini-batch gradient descent for the given number of epochs.
+            Training stops when the cost on the held-out vectors
+            has not decreased for the given number of epochs.
+        """
+        m = x.shape[0]
+        i = shuffled(range(m))
+        i, j = np.array(i[m // 10:]), np.array(i[:m // 10]) # 90% train, 10% validation
+        if len(j) == 0:
+            i, j = np.arange(m), np.arange(m)
+        t = np.zeros((y.shape[1], x.shape[1] + 1))
+        G = np.zeros_like(t) + 1e-8
+        b = (t, float("inf"), 0) # (best theta, best cost, epochs since best)
+        for epoch in range(iterations):
+            i = i[np.array(shuffled(range(len(i))), dtype=int)]
+            for k in range(0, len(i), self._batch):
+                k = i[k:k + self._batch]
+                # Regularization is spread over the batches of an epoch.
+                g = _lr_gradient(t, x[k], y[k], l * len(k) / len(i), self._method)[1]
+                # AdaGrad: each weight has its own learning rate,
+                # so that rare (sparse) features are updated with larger steps.
+                G += g ** 2
+                t = t - self._rate * g / np.sqrt(G)
+            J = _lr_gradient(t, x[j], y[j], 0, self._method)[0]
+            if J < b[1] - tolerance:
+                b = (t, J, 0)
+            elif b[2] + 1 >= patience:
+                break
+            else:
+                b = (b[0], b[1], b[2] + 1)
+        return b[0]
+
     def _classify(self, document):
         if self._model is None:
             return None
+        return self._classify_many([self._vector(document)[1]])[0]
+
+    def _classify_many(self, vectors):
+        """ Returns a list of {class: probability} dicts for the given vectors (dicts).
+        """
         t, H1, H2, H3, H4 = self._model
-        if t is not None:
-            v = self._vector(document)[1]
-            v = scipy.array([v.get(w, 0.0) for w in H4])
-            v = scipy.hstack([[1], v])
-            p = scipy.special.expit(scipy.dot(t, v)) # sigmoid
-            p = dict((H2[i], p) for i, p in enumerate(p))
-            return p
-        return {}
-
-    def _gradient_descent(self, x, y, l=0.1, iterations=100):
-        # The cost function computes the mean squared error J.
-        # The cost function represents the average amount of incorrect predictions.
-        # The gradient function is the derivative of the cost function.
-        # The gradient function determines the direction in which to optimize.
-        # Gradient descent then iteratively minimizes the cost (in max iterations).
-        # L2 regularization prevents overfitting by excluding unlikely feature values.
-        def log(z):
-            return scipy.log(z.clip(min=1e-10))
-
-        def cost(t, x, y, l=0.1):
-            # Cost function.
-            m = float(len(y))
-            h = scipy.special.expit(x.dot(t)) # sigmoid
-            J = 1 / m * (scipy.dot(-y, log(h)) - scipy.dot(1 - y, log(1 - h)))
-            L2 = l / m / 2 * sum(t[1:] ** 2)
-            return J + L2
-
-        def gradient(t, x, y, l=0.1):
-            # Cost function derivative.
-            m = float(len(y))
-            h = scipy.special.expit(x.dot(t)) # sigmoid
-            g = 1 / m * x.T.dot((h - y).T).T # dot(h-y, x)
-            L2 = l / m * scipy.insert(t[1:], 0, 0)
-            return scipy.transpose(g + L2)
-        # Gradient descent:
-        if x.shape[0] > 0:
-            m = x.shape[0]
-            n = x.shape[1]
-            t = scipy.zeros((max(y) + 1, n + 1))
-            x = scipy.sparse.hstack([scipy.ones((m, 1)), x])
-            y = scipy.array(y)
-            for i in range(max(y) + 1):
-                t0 = scipy.zeros((n + 1, 1))
-                t0 = scipy.transpose(t0)
-                t[i, :] = scipy.optimize.fmin_cg(
-                    lambda t: cost(t, x, 0 + (y == i), l), t0,
-                    lambda t: gradient(t, x, 0 + (y == i), l),
-                        maxiter = iterations,
-                           disp = 0)
-            return t # theta
-        return None
+        if t is None:
+            return [{} for v in vectors]
+        z = _csr_matrix(vectors, H3).dot(t[:, 1:].T) + t[:, 0]
+        if self._method == MULTINOMIAL:
+            z = np.exp(z - z.max(axis=1)[:, None])
+            p = z / z.sum(axis=1)[:, None]
+        else:
+            p = scipy.special.expit(z) # sigmoid
+        types = [H2[i] for i in range(len(H2))]
+        return [dict(zip(types, p)) for p in p.tolist()]
 
     def train(self, document, type=None):
         """ Trains the classifier with the given document of the given type (i.e., class).
@@ -3832,7 +5409,17 @@ class LR(Classifier):
         """
         if self._model is None:
             self._train()
-        p = self._classify(document)
+        return self._probabilities(self._classify(document), discrete)
+
+    def classify_many(self, documents=[], discrete=True):
+        """ Returns a list of types with the highest probability for the given documents.
+        """
+        if self._model is None:
+            self._train()
+        v = [self._vector(document)[1] for document in documents]
+        return [self._probabilities(p, discrete) for p in self._classify_many(v)]
+
+    def _probabilities(self, p, discrete=True):
         if not discrete:
             return Probabilities(self, p)
         try:
@@ -3848,11 +5435,6 @@ class LR(Classifier):
     def save(self, path, final=False):
         if self._model is None:
             self._train()
-        # Save array as string.
-        f = StringIO()
-        scipy.save(f, self._model[0])
-        f.seek(0)
-        self._model = (f.read(),) + self._model[1:]
         Classifier.save(self, path, final)
 
     @classmethod
@@ -3861,15 +5443,13 @@ class LR(Classifier):
 
     def _on_load(self, path):
         # Called from Classifier.load().
-
         import scipy.sparse
         import scipy.special
         import scipy.optimize
-        if self._model is not None:
-            f = StringIO()
-            f.write(self._model[0])
-            f.seek(0)
-            self._model = (scipy.load(f),) + self._model[1:]
+        if self._model is not None and isinstance(self._model[0], bytes):
+            # Pattern 3.6- stored theta with numpy.save().
+            from io import BytesIO
+            self._model = (np.load(BytesIO(self._model[0])),) + self._model[1:]
 
     def finalize(self):
         """ Removes training data from memory, keeping only the trained model (theta),
@@ -85,16 +85,16 @@ setup(
         "pattern"                 : ["*.js"],
         "pattern.web.cache"       : ["tmp/*"],
         "pattern.web.locale"      : ["*"],
-        "pattern.text.de"         : ["*.txt", "*.xml"],
-        "pattern.text.en"         : ["*.txt", "*.xml", "*.slp"],
+        "pattern.text.de"         : ["*.txt", "*.xml", "*.bin"],
+        "pattern.text.en"         : ["*.txt", "*.xml", "*.slp", "*.bin"],
         "pattern.text.en.wordlist": ["*.txt"],
         "pattern.text.en.wordnet" : ["*.txt", "dict/*"],
-        "pattern.text.ru": ["*.txt", "*.xml", "*.slp"],
+        "pattern.text.ru": ["*.txt", "*.xml", "*.slp", "*.bin"],
         "pattern.text.ru.wordlist": ["*.txt"],
-        "pattern.text.es"         : ["*.txt", "*.xml"],
-        "pattern.text.fr"         : ["*.txt", "*.xml"],
-        "pattern.text.it"         : ["*.txt", "*.xml"],
-        "pattern.text.nl"         : ["*.txt", "*.xml"],
+        "pattern.text.es"         : ["*.txt", "*.xml", "*.bin"],
+        "pattern.text.fr"         : ["*.txt", "*.xml", "*.bin"],
+        "pattern.text.it"         : ["*.txt", "*.xml", "*.bin"],
+        "pattern.text.nl"         : ["*.txt", "*.xml", "*.bin"],
         "pattern.vector"          : ["*.txt"],
         "pattern.vector.svm"      : ["*.txt"],
         "pattern.graph"           : ["*.js", "*.csv"],
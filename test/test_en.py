@@ -574,6 +574,24 @@ class TestParser(unittest.TestCase):
         # Assert parsetree(s) == Text.
         v = en.parsetree("The cat purs.")
         self.assertTrue(isinstance(v, en.Text))
+        # Assert that parse trees built directly from tokens equal those built from parse().
+        s = "The black cat is eating a fish on the mat, and the dog is barking at it. I'm fine!"
+        for kwargs in ({}, {"relations": True, "lemmata": True}, {"chunks": False}):
+            v1 = en.parsetree(s, **kwargs)
+            v2 = en.Text(en.parse(s, **kwargs))
+            self.assertEqual(len(v1), len(v2))
+            for s1, s2 in zip(v1, v2):
+                self.assertEqual(s1, s2)
+                self.assertEqual(s1.token, s2.token)
+                self.assertEqual(s1.language, s2.language)
+                self.assertEqual([repr(ch) for ch in s1.chunks], [repr(ch) for ch in s2.chunks])
+                self.assertEqual([repr(ch) for ch in s1.pnp], [repr(ch) for ch in s2.pnp])
+                self.assertEqual([w.lemma for w in s1], [w.lemma for w in s2])
+                self.assertEqual(sorted(s1.relations["SBJ"]), sorted(s2.relations["SBJ"]))
+        # Assert slashes in words.
+        v = en.parsetree("A 1/2 cup.", lemmata=True)
+        self.assertEqual(v[0].words[1].string, "1/2")
+        self.assertEqual(v[0].words[1].lemma, "1/2")
         print("pattern.en.parsetree()")
 
     def test_split(self):
@@ -759,6 +777,46 @@ class TestParseTree(unittest.TestCase):
         self.assertEqual(s.token, [en.WORD, en.POS, "semantic_type", "taste"])
         print("pattern.en.Word.custom_tags")
 
+    def test_slots(self):
+        # Assert that Sentence, Chunk, PNPChunk and Word store tags in slots, not in __dict__.
+        import pickle
+        s = en.Text(en.parse(self.text[0].string, lemmata=True, relations=True))[0]
+        for v in (s, s.chunks[0], s.pnp[0], s.words[0], s.slice(0, 2)):
+            self.assertEqual(v.__dict__, {})
+        self.assertFalse(hasattr(s.words[0].custom_tags, "__dict__"))
+        self.assertRaises(AttributeError, lambda: s.words[0].semantic_type)
+        # Assert that user-defined attributes can be set.
+        s.words[0].semantic_type = "animal"
+        s.chunks[0].semantic_type = "animal"
+        self.assertEqual(s.words[0].semantic_type, "animal")
+        # Assert that parse trees can be pickled (protocol 1 is used by Model.save()).
+        for protocol in (0, 1, 2):
+            v = pickle.loads(pickle.dumps(s, protocol))
+            self.assertEqual(repr(v), repr(s))
+            self.assertEqual(repr(v.pnp[0]), repr(s.pnp[0]))
+            self.assertEqual(v.words[6].chunk, v.chunks[-1])
+            self.assertEqual(v.words[0].semantic_type, "animal")
+            self.assertEqual(v.chunks[0].semantic_type, "animal")
+            self.assertEqual([w.lemma for w in v], [w.lemma for w in s])
+        # Assert that a Model of parsed sentences can be saved and loaded.
+        import os
+        import tempfile
+        from pattern.vector import Model, Document
+        f = os.path.join(tempfile.mkdtemp(), "test_model.pickle")
+        m = Model([Document(s, name="s1"), Document(en.Sentence(en.parse("the cat purrs")), name="s2")])
+        m.save(f)
+        v = Model.load(f)
+        os.remove(f)
+        os.rmdir(os.path.dirname(f))
+        self.assertEqual(len(v), 2)
+        self.assertEqual(sorted(v.document("s1").words.values()), sorted(m.document("s1").words.values()))
+        self.assertEqual(sorted(v.document("s2").words.values()), sorted(m.document("s2").words.values()))
+        # Assert that words and tags are shared between tokens.
+        v = en.Text(en.parse("the cat, the mat"))
+        self.assertTrue(v[0].words[0].string is v[0].words[3].string)
+        self.assertTrue(v[0].words[1].type is v[0].words[4].type)
+        print("pattern.text.tree.Sentence.__slots__")
+
     def test_find(self):
         # Assert first item for which given function is True.
         v = text.tree.find(lambda x: x > 10, [1, 2, 3, 11, 12])
@@ -1024,6 +1082,22 @@ class TestWordNet(unittest.TestCase):
     def setUp(self):
         pass
 
+    def test_import(self):
+        # Assert that WordNet (NLTK) is not loaded by "import pattern.en" (it takes seconds).
+        if sys.version_info < (3, 7):
+            return
+        p = [sys.executable, "-c", "import sys, pattern.en; print(' '.join(sorted(sys.modules)))"]
+        p = subprocess.Popen(p, stdout=subprocess.PIPE, cwd=os.path.join(PATH, ".."))
+        v = p.communicate()[0].decode("utf-8").split()
+        self.assertEqual(p.returncode, 0)
+        self.assertTrue("pattern.text.en" in v)
+        self.assertTrue("nltk" not in v)
+        self.assertTrue("pattern.text.en.wordnet" not in v)
+        # Assert that WordNet is imported on first use.
+        self.assertEqual(en.wordnet.NOUN, "NN")
+        self.assertTrue(en.wordnet is __import__("pattern.text.en.wordnet").text.en.wordnet)
+        print("pattern.en.wordnet")
+
     def test_normalize(self):
         # Assert normalization of simple diacritics (WordNet does not store diacritics).
         self.assertEqual(en.wordnet.normalize("cliché"), "cliche")
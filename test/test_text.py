@@ -63,6 +63,65 @@ class TestLexicon(unittest.TestCase):
         self.assertEqual(v2["schrödinger"], "NNP")
         print("pattern.text.Lexicon")
 
+    def test_compile(self):
+        # Assert lexicon from compiled, memory-mapped table.
+        import io
+        import tempfile
+        import shutil
+        d = tempfile.mkdtemp()
+        try:
+            f = os.path.join(d, "xx-lexicon.txt")
+            io.open(f, "w", encoding="utf-8").write(";;; Comments. \n schrödinger NNP \n cat NN")
+            v1 = text.Lexicon(path=f)
+            p = v1.compile()
+            v2 = text.Lexicon(path=f)
+            self.assertTrue(p.endswith("xx-lexicon.bin"))
+            self.assertEqual(v2["schrödinger"], "NNP")
+            self.assertEqual(v2.get("cat"), "NN")
+            self.assertEqual(v2.get("dog"), None)
+            self.assertEqual(len(v2), 2)
+            self.assertEqual(sorted(v2.items()), sorted(v1.items()))
+            self.assertTrue(isinstance(v2._table, text.StringTable))
+            # Assert dictionary views (len(), in, repeated iteration).
+            for v in (v2.keys(), v2.values(), v2.items()):
+                self.assertEqual(len(v), 2)
+                self.assertEqual(list(v), list(v))
+            self.assertTrue("cat" in v2.keys())
+            self.assertTrue("NN" in v2.values())
+            self.assertTrue(("cat", "NN") in v2.items())
+            self.assertFalse(("cat", "VB") in v2.items())
+            # Assert that the lexicon can be pickled (e.g., parse_many() in spawned processes).
+            import pickle
+            for protocol in (1, 2):
+                v = pickle.loads(pickle.dumps(v2, protocol))
+                self.assertTrue(isinstance(v._table, text.StringTable))
+                self.assertEqual(v.get("cat"), "NN")
+                self.assertEqual(sorted(v.items()), sorted(v1.items()))
+            # Modifying the lexicon copies the table.
+            v2["dog"] = "NN"
+            self.assertEqual(v2._table, None)
+            self.assertEqual(v2.get("dog"), "NN")
+            self.assertEqual(v2.get("cat"), "NN")
+            # Assert that the table is not used when the file has changed (same modification time).
+            t = os.path.getmtime(f)
+            io.open(f, "w", encoding="utf-8").write(";;; Comments. \n schrödinger NNP \n cat VB")
+            os.utime(f, (t, t))
+            os.utime(p, (t + 10, t + 10))
+            v3 = text.Lexicon(path=f)
+            self.assertEqual(v3.get("cat"), "VB")
+            self.assertEqual(v3._table, None)
+        finally:
+            shutil.rmtree(d)
+        # Assert that encoded values are decoded to the same type (e.g., tuples).
+        for codec, v in (
+          ("j", [["alexander", "the", "great"], ("a", 1.0)]),
+          ("p", {None: (0.5, 1.0, 1.0), "JJ": [0.5, 1.0, 1.0]})):
+            encode, decode = text._CODECS[codec]
+            self.assertEqual(decode(encode(v)), v)
+            self.assertEqual(type(decode(encode(v))[None if codec == "p" else 1]), tuple)
+            self.assertEqual(type(decode(encode(v))["JJ" if codec == "p" else 0]), list)
+        print("pattern.text.Lexicon.compile()")
+
 #---------------------------------------------------------------------------------------------------
 
 
@@ -119,6 +178,38 @@ class TestMorphology(unittest.TestCase):
             ["cats", "NNS"])
         print("pattern.text.Morphology")
 
+    def test_morphology_index(self):
+        # Assert that indexed rules (word, prefix, suffix) are applied in order.
+        f = StringIO("\n".join((
+            "s hassuf 1 NNS x",
+            "NNS ss fhassuf 2 NN x",
+            "un haspref 2 JJ x",
+            "JJ ly fhassuf 2 RB x",
+            "cats word 4 NNP x",
+            "NN ing fdeletesuf 3 VBG x",
+        )))
+        v = text.Morphology(f, known={"walk": "VB"})
+        self.assertEqual(v.apply(["cats", "NN"]), ["cats", "NNP"])
+        self.assertEqual(v.apply(["dogs", "NN"]), ["dogs", "NNS"])
+        self.assertEqual(v.apply(["boss", "NN"]), ["boss", "NN"])
+        self.assertEqual(v.apply(["unlikely", "NN"]), ["unlikely", "RB"])
+        self.assertEqual(v.apply(["walking", "NN"]), ["walking", "VBG"])
+        self.assertEqual(v.apply(["talking", "NN"]), ["talking", "NN"])
+        # Rules added at run time are taken into account.
+        v.append("VBN", "-ed")
+        self.assertEqual(v.apply(["walked", "NN"]), ["walked", "VBN"])
+        # Rules replaced or removed at run time are taken into account.
+        f.seek(0)
+        v = text.Morphology(f, known={"walk": "VB"})
+        self.assertEqual(v.apply(["dogs", "NN"]), ["dogs", "NNS"])
+        v[0] = ["s", "hassuf", "1", "VBZ", "x"]
+        self.assertEqual(v.apply(["dogs", "NN"]), ["dogs", "VBZ"])
+        del v[0]
+        self.assertEqual(v.apply(["dogs", "NN"]), ["dogs", "NN"])
+        v.pop()
+        self.assertEqual(v.apply(["walking", "NN"]), ["walking", "NN"])
+        print("pattern.text.Morphology.apply()")
+
 #---------------------------------------------------------------------------------------------------
 
 
@@ -136,6 +227,75 @@ class TestContext(unittest.TestCase):
             [["to", "TO"], ["be", "VB"]])
         print("pattern.text.Context")
 
+    def test_context_compiled(self):
+        # Assert compiled contextual rules yield the same tags as brute-force rule matching.
+        # Brute-force: each token is checked against each rule (O(tokens x rules)).
+        def apply(rules, tokens):
+            o = [("STAART", "STAART")] * 3
+            t = o + tokens + o
+            for i, token in enumerate(t):
+                for r in rules:
+                    if token[1] == "STAART":
+                        continue
+                    if token[1] != r[0] and r[0] != "*":
+                        continue
+                    cmd, x, y = r[2].lower(), r[3], r[4] if len(r) > 4 else ""
+                    if (cmd == "prevtag"        and x ==  t[i - 1][1]) \
+                    or (cmd == "nexttag"        and x ==  t[i + 1][1]) \
+                    or (cmd == "prev2tag"       and x ==  t[i - 2][1]) \
+                    or (cmd == "next2tag"       and x ==  t[i + 2][1]) \
+                    or (cmd == "prev1or2tag"    and x in (t[i - 1][1], t[i - 2][1])) \
+                    or (cmd == "next1or2tag"    and x in (t[i + 1][1], t[i + 2][1])) \
+                    or (cmd == "prev1or2or3tag" and x in (t[i - 1][1], t[i - 2][1], t[i - 3][1])) \
+                    or (cmd == "next1or2or3tag" and x in (t[i + 1][1], t[i + 2][1], t[i + 3][1])) \
+                    or (cmd == "surroundtag"    and x ==  t[i - 1][1] and y == t[i + 1][1]) \
+                    or (cmd == "curwd"          and x ==  t[i + 0][0]) \
+                    or (cmd == "prevwd"         and x ==  t[i - 1][0]) \
+                    or (cmd == "nextwd"         and x ==  t[i + 1][0]) \
+                    or (cmd == "prev1or2wd"     and x in (t[i - 1][0], t[i - 2][0])) \
+                    or (cmd == "next1or2wd"     and x in (t[i + 1][0], t[i + 2][0])) \
+                    or (cmd == "prevwdtag"      and x ==  t[i - 1][0] and y == t[i - 1][1]) \
+                    or (cmd == "nextwdtag"      and x ==  t[i + 1][0] and y == t[i + 1][1]) \
+                    or (cmd == "wdprevtag"      and x ==  t[i - 1][1] and y == t[i + 0][0]) \
+                    or (cmd == "wdnexttag"      and x ==  t[i + 0][0] and y == t[i + 1][1]) \
+                    or (cmd == "wdand2aft"      and x ==  t[i + 0][0] and y == t[i + 2][0]) \
+                    or (cmd == "wdand2tagbfr"   and x ==  t[i - 2][1] and y == t[i + 0][0]) \
+                    or (cmd == "wdand2tagaft"   and x ==  t[i + 0][0] and y == t[i + 2][1]) \
+                    or (cmd == "lbigram"        and x ==  t[i - 1][0] and y == t[i + 0][0]) \
+                    or (cmd == "rbigram"        and x ==  t[i + 0][0] and y == t[i + 1][0]) \
+                    or (cmd == "prevbigram"     and x ==  t[i - 2][1] and y == t[i - 1][1]) \
+                    or (cmd == "nextbigram"     and x ==  t[i + 1][1] and y == t[i + 2][1]):
+                        t[i] = [t[i][0], r[1]]
+            return t[len(o):-len(o)]
+        import random
+        random.seed(0)
+        path = os.path.join(os.path.dirname(__file__), "..", "pattern", "text", "en")
+        v = text.Context(path=os.path.join(path, "en-context.txt"))
+        w = sorted(text.Lexicon(path=os.path.join(path, "en-lexicon.txt")).items())[::20]
+        s = [[list(random.choice(w)) for i in range(20)] for j in range(200)]
+        v1 = [apply(v, tokens) for tokens in s]
+        v2 = [v.apply(tokens) for tokens in s]
+        self.assertEqual(v1, v2)
+        # Rules added at run time are taken into account.
+        v.append("NN", "VB", "prevtag", "TO")
+        self.assertEqual(v.apply([["to", "TO"], ["be", "NN"]]), [["to", "TO"], ["be", "VB"]])
+        # Rules replaced or removed at run time are taken into account.
+        v = text.Context(path=StringIO("VBD VB PREVTAG TO"))
+        self.assertEqual(v.apply([["to", "TO"], ["be", "VBD"]])[1], ["be", "VB"])
+        v[0] = ["VBD", "NN", "PREVTAG", "TO"]
+        self.assertEqual(v.apply([["to", "TO"], ["be", "VBD"]])[1], ["be", "NN"])
+        v.pop()
+        self.assertEqual(v.apply([["to", "TO"], ["be", "VBD"]])[1], ["be", "VBD"])
+        v.insert(0, "VBD", "VB", "prevtag", "TO")
+        self.assertEqual(v.apply([["to", "TO"], ["be", "VBD"]])[1], ["be", "VB"])
+        del v[0]
+        self.assertEqual(v.apply([["to", "TO"], ["be", "VBD"]])[1], ["be", "VBD"])
+        v += [["VBD", "VB", "PREVTAG", "TO"]]
+        self.assertEqual(v.apply([["to", "TO"], ["be", "VBD"]])[1], ["be", "VB"])
+        v.remove(["VBD", "VB", "PREVTAG", "TO"])
+        self.assertEqual(v.apply([["to", "TO"], ["be", "VBD"]])[1], ["be", "VBD"])
+        print("pattern.text.Context.apply()")
+
 #---------------------------------------------------------------------------------------------------
 
 
@@ -170,6 +330,29 @@ class TestParser(unittest.TestCase):
         self.assertEqual(p.parse("cats"), "cats/NNS/B-NP/O")
         self.assertEqual(p.parse("to saw"), "to/TO/B-VP/O saw/VB/I-VP/O")
 
+    def test_parse_many(self):
+        # Assert batch parsing (in parallel) preserves order and output.
+        p = text.Parser(lexicon={"the": "DT", "cat": "NN", "to": "TO", "saw": "VBD"})
+        s = ["the cat", "to saw", "cats"] * 10
+        v1 = [p.parse(x) for x in s]
+        v2 = list(p.parse_many(s))
+        stats = {}
+        v3 = list(p.parse_many(s, processes=2, chunksize=4, stats=stats))
+        self.assertEqual(v1, v2)
+        self.assertEqual(v1, v3)
+        self.assertEqual(v3[0].tags, v1[0].tags)
+        self.assertEqual(stats["documents"], 30)
+        self.assertTrue(stats["throughput"] > 0)
+        # Assert that the parser can be pickled (worker processes with the "spawn" start method).
+        import pickle
+        from pattern.en import parser
+        parser.parse("the cat")
+        v4 = pickle.loads(pickle.dumps(parser, 1))
+        self.assertEqual(v4.parse("the cats saw it"), parser.parse("the cats saw it"))
+        self.assertEqual(len(v4.lexicon), len(parser.lexicon))
+        self.assertEqual(len(v4.context), len(parser.context))
+        print("pattern.text.Parser.parse_many()")
+
     def test_find_keywords(self):
         # Assert the intrinsic keyword extraction algorithm.
         p = text.Parser()
@@ -199,6 +382,26 @@ class TestParser(unittest.TestCase):
         self.assertEqual(v4[0], "etc.")
         print("pattern.text.Parser.find_tokens()")
 
+    def test_find_tokens_iter(self):
+        # Assert that streaming tokenization yields the same sentences as find_tokens().
+        s = "Mr. Smith said \"hello\"... I'm here :-)\n\nHeading\n\nWow!!! It's 3.5 etc. o_O\n"
+        v1 = text.find_tokens(s)
+        v2 = list(text.find_tokens_iter(s))
+        v3 = list(text.find_tokens_iter(iter(s)))
+        self.assertEqual(v1, [
+            "Mr. Smith said \" hello \" ...",
+            "I 'm here :-)",
+            "Heading",
+            "Wow ! ! !",
+            "It 's 3.5 etc. o_O"])
+        self.assertEqual(v1, v2)
+        self.assertEqual(v1, v3)
+        # Assert sentences across block boundaries (64KB).
+        v4 = list(text.find_tokens_iter((s * 2000).splitlines(True)))
+        self.assertEqual(v4, text.find_tokens(s * 2000))
+        self.assertEqual(len(v4), 8001)
+        print("pattern.text.find_tokens_iter()")
+
     def test_find_tags(self):
         # Assert the default part-of-speech tagger and its optional parameters.
         p = text.Parser()
@@ -227,6 +430,18 @@ class TestParser(unittest.TestCase):
         self.assertEqual(v4, [["", "DT", "B-NP", "O"], ["", "NN", "I-NP", "O"], ["", "JJ", "I-NP", "O"]])
         print("pattern.text.Parser.find_chunks()")
 
+    def test_find_chunks_long(self):
+        # Assert chunks in long sentences (e.g., text without punctuation).
+        s = [["The", "DT"], ["big", "JJ"], ["cat", "NN"], ["sat", "VBD"], ["on", "IN"], ["the", "DT"], ["mat", "NN"], [",", ","]]
+        for language in ("en", "fr"):
+            v1 = text.find_chunks([list(w) for w in s], language=language)
+            v2 = text.find_chunks([list(w) for w in s * 5000], language=language)
+            self.assertEqual(v2, v1 * 5000)
+        # Assert chunks that start inside a tag (DT in WDT).
+        v3 = text.find_chunks([["which", "WDT"], ["cat", "NN"]])
+        self.assertEqual(v3, [["which", "WDT", "B-NP"], ["cat", "NN", "I-NP"]])
+        print("pattern.text.find_chunks()")
+
 #---------------------------------------------------------------------------------------------------
 
 
@@ -14,7 +14,10 @@ import os
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 import time
+import pickle
 import random
+import shutil
+import tempfile
 import unittest
 
 from random import seed
@@ -395,6 +398,134 @@ class TestModel(unittest.TestCase):
         self.model.remove(self.model.document("bird"))
         print("pattern.vector.Model.append()")
 
+    def test_model_incremental(self):
+        # Assert that document frequency, the inverted index and Model.vector
+        # are updated when documents are added or removed, instead of recalculated.
+        v = self.model
+        v.df("cats")
+        v.inverted_index
+        v.vector
+        d = vector.Document("cats fly", name="cat3")
+        v.append(d)
+        self.assertAlmostEqual(v.df("cats"), 0.60, places=2)
+        self.assertAlmostEqual(v.df("fly"), 0.20, places=2)
+        self.assertTrue(d in v.inverted_index["fly"])
+        self.assertTrue("fly" in v.vector)
+        # Assert that cached document vectors are recalculated lazily (new idf).
+        self.assertAlmostEqual(v[0].vector["cats"], 0.26, places=2) # 0.50 * log(5/3)
+        v.remove(d)
+        self.assertAlmostEqual(v.df("cats"), 0.50, places=2)
+        self.assertEqual(v.df("fly"), 0.0)
+        self.assertTrue("fly" not in v.inverted_index)
+        self.assertTrue("fly" not in v.vector)
+        self.assertAlmostEqual(v[0].vector["cats"], 0.35, places=2) # 0.50 * log(4/2)
+        print("pattern.vector.Model._update()")
+
+    def test_model_vocabulary(self):
+        # Assert that document terms are stored as term ids in the model vocabulary.
+        v = self.model
+        d = vector.Document({"cats": 2, "purr": 1, 3: 0.5}, name="cat3")
+        v.append(d)
+        self.assertEqual(d._terms, None)
+        self.assertEqual(d.terms, {"cats": 2, "purr": 1, 3: 0.5})
+        self.assertEqual(d._vocabulary, v.vocabulary)
+        self.assertEqual(v.vocabulary.id("cats"), v.vocabulary.get("cats"))
+        self.assertEqual(v[0].terms, {"cats": 1, "purr": 1})
+        self.assertEqual(v[0]["cats"], 1)
+        self.assertEqual(v[0].get("dogs", 0), 0)
+        self.assertEqual("purr" in v[0], True)
+        self.assertEqual("dogs" in v[0], False)
+        self.assertEqual(v[0].count, 2)
+        self.assertEqual(sorted(v[0]), ["cats", "purr"])
+        self.assertRaises(KeyError, lambda: v[0]["dogs"])
+        # Assert that the terms are kept when the document is removed from the model.
+        v.remove(d)
+        self.assertEqual(d.terms, {"cats": 2, "purr": 1, 3: 0.5})
+        # Assert that the terms are interned again in another model.
+        m = vector.Model(v.documents[:2])
+        self.assertEqual(m[1].terms, {"cats": 1, "meow": 1})
+        self.assertEqual(m[1]._vocabulary, m.vocabulary)
+        self.assertEqual(list(m.vocabulary), ["cats", "purr", "meow"])
+        # Assert pickled documents and vocabulary.
+        m = pickle.loads(pickle.dumps(v, 1))
+        self.assertEqual([d.terms for d in m], [d.terms for d in v])
+        self.assertEqual(m.vocabulary.get("meow"), v.vocabulary.get("meow"))
+        self.assertEqual(m[2]._vocabulary, m.vocabulary)
+        print("pattern.vector.Model.vocabulary")
+
+    def test_corpus(self):
+        # Assert streaming documents from a directory in batches.
+        path = tempfile.mkdtemp()
+        try:
+            for type in ("cat", "dog"):
+                os.mkdir(os.path.join(path, type))
+                for i in range(3):
+                    with open(os.path.join(path, type, "%s.txt" % i), "w", encoding="utf-8") as f:
+                        f.write("The %s is purring, %s %s!" % (type, type, i))
+            v1 = list(vector.corpus(path, batch=4))
+            v2 = list(vector.corpus(path, batch=4, processes=2))
+            v3 = list(vector.corpus(path, batch=4, processes=0))
+            self.assertEqual([len(b) for b in v1], [4, 2])
+            self.assertEqual([d.type for b in v1 for d in b], ["cat"] * 3 + ["dog"] * 3)
+            self.assertEqual(v1[0][0].name, os.path.join("cat", "0.txt"))
+            self.assertEqual(v1[0][0].words, {"cat": 2, "purring": 1, "0": 1})
+            for d1, d2, d3 in zip(sum(v1, []), sum(v2, []), sum(v3, [])):
+                self.assertEqual((d1.name, d1.type, d1.words), (d2.name, d2.type, d2.words))
+                self.assertEqual((d1.name, d1.type, d1.words), (d3.name, d3.type, d3.words))
+            # Assert path pattern and one document per line.
+            v = sum(vector.corpus(os.path.join(path, "dog", "*.txt")), [])
+            self.assertEqual(len(v), 3)
+            with open(os.path.join(path, "lines.txt"), "w", encoding="utf-8") as f:
+                f.write("The cat is purring.\n\nThe dog is barking.\n")
+            v = sum(vector.corpus(os.path.join(path, "lines.txt")), [])
+            self.assertEqual([d.words for d in v], [{"cat": 1, "purring": 1}, {"dog": 1, "barking": 1}])
+        finally:
+            shutil.rmtree(path)
+        # Assert streaming documents from an iterable into a model.
+        m = vector.Model()
+        for documents in vector.corpus(((s, "CAT") for s in ("cat", "cats", "kitten")), batch=2, stemmer=vector.PORTER):
+            m.extend(documents)
+        self.assertEqual(len(m), 3)
+        self.assertEqual(m[1].words, {"cat": 1})
+        self.assertEqual(m.classes, ["CAT"])
+        print("pattern.vector.corpus()")
+
+    def test_model_sparse(self):
+        # Assert Model(sparse=True) with a SparseMatrix updated on append().
+        v = vector.Model(self.model.documents[:2], sparse=True)
+        v.append(vector.Document(self.model[2].terms))
+        v.extend([vector.Document(self.model[3].terms)])
+        self.assertEqual(v.matrix.shape, (4, 6))
+        self.assertEqual(v.matrix.terms, list(v.vector.keys()))
+        # Assert that the weighted matrix rows equal Document.vector.
+        m = v._weighted()[0].toarray()
+        for i, d in enumerate(v.documents):
+            for w, f in d.vector.items():
+                self.assertAlmostEqual(m[i][v.matrix.columns[w]], f, places=10)
+        # Assert vectorized nearest neighbors, clustering and LSA.
+        v1 = v.neighbors(vector.Document("cats meow"))
+        self.assertEqual(v1[0][1], v[1])
+        self.assertAlmostEqual(v1[0][0], 0.95, places=2)
+        self.assertEqual(len(v.cluster(method=vector.KMEANS, k=2)), 2)
+        self.assertEqual(len(v.cluster(method=vector.HIERARCHICAL, k=1)[0].flatten()), 4)
+        self.assertTrue(isinstance(v.reduce(2), vector.LSA))
+        v.remove(v[0])
+        self.assertEqual(v.matrix.shape, (3, 5))
+        # Assert that removed rows are compacted when the matrix is next used.
+        v.extend([vector.Document(d.terms) for d in self.model.documents])
+        del v[-1]
+        del v[1]
+        v.remove(v[4])
+        self.assertEqual(len(v.matrix), 4)
+        self.assertEqual(v.matrix._deleted, [1, 5, 6])
+        m1 = v.matrix.csr.toarray()
+        m2 = vector.SparseMatrix(d.terms for d in v.documents)
+        m2 = m2.csr.toarray()[:, [m2.columns[w] for w in v.matrix.terms]]
+        self.assertEqual(v.matrix._deleted, [])
+        self.assertEqual(m1.tolist(), m2.tolist())
+        self.assertEqual(v.matrix.terms, list(v.vector.keys()))
+        print("pattern.vector.Model.matrix")
+
     def test_model_save(self):
         # Assert Model save & load.
         self.model.save("test_model.pickle", update=True)
@@ -408,6 +539,44 @@ class TestModel(unittest.TestCase):
         print("pattern.vector.Model.save()")
         print("pattern.vector.Model.load()")
 
+    def test_model_save_npy(self):
+        # Assert Model save & load as a directory of NumPy arrays.
+        path = tempfile.mkdtemp()
+        try:
+            v = vector.Model(self.model.documents, sparse=True)
+            v.append(vector.Document({"cats": 0.5, "fly": 1.5}, name="cat3", type="cåt"))
+            v.remove(v.document("dog2"))
+            v.train(vector.NB)
+            v.save(path, format=vector.NPY)
+            for mmap in (False, True):
+                model = vector.Model.load(path, mmap=mmap)
+                self.assertEqual([d.id for d in model], [d.id for d in v])
+                self.assertEqual([d.name for d in model], [d.name for d in v])
+                self.assertEqual([d.type for d in model], [d.type for d in v])
+                self.assertEqual([d.terms for d in model], [d.terms for d in v])
+                self.assertEqual(list(model.vector), list(v.vector))
+                self.assertEqual(list(model.vocabulary), ["cats", "purr", "meow", "dogs", "howl", "fly"])
+                self.assertEqual(model.document("cat3")["fly"], 1.5)
+                self.assertEqual(model.matrix.shape, (4, 6))
+                self.assertEqual(model.classifier.classify("cats fly"), "cåt")
+                self.assertAlmostEqual(model.cosine_similarity(model[0], model[1]), v.cosine_similarity(v[0], v[1]))
+                # Assert that documents can be added to a loaded model.
+                model.append(vector.Document("dogs fly", name="dog3", type="døg"))
+                self.assertEqual(model.matrix.shape, (5, 6))
+                self.assertEqual(model.document("dog3").terms, {"dogs": 1, "fly": 1})
+                # Assert that documents can be removed from a loaded model.
+                model.remove(model.document("dog3"))
+                self.assertEqual(model.matrix.shape, (4, 6))
+                self.assertEqual(model.matrix.csr.sum(), sum(sum(d.terms.values()) for d in model))
+            # Assert that a loaded model can be pickled.
+            model.save(os.path.join(path, "test_model.pickle"))
+            model = vector.Model.load(os.path.join(path, "test_model.pickle"))
+            self.assertEqual(model.document("cat3").terms, {"cats": 0.5, "fly": 1.5})
+        finally:
+            shutil.rmtree(path)
+        print("pattern.vector.Model.save(format=NPY)")
+        print("pattern.vector.Model.load(mmap=True)")
+
     def test_model_export(self):
         # Assert Orange and Weka ARFF export formats.
         for format, src in (
@@ -499,6 +668,19 @@ class TestModel(unittest.TestCase):
         self.assertTrue(len(v3) == 0)
         print("pattern.vector.Model.neighbors()")
 
+    def test_nearest_neighbors_inverted_index(self):
+        # Assert that candidates from the inverted index yield the same neighbors
+        # as comparing the document to every document in the model.
+        m = model()
+        for d in m.documents[::25]:
+            for top in (1, 10):
+                v1 = [(m.cosine_similarity(d, x), x) for x in m.documents]
+                v1 = [(w, x) for w, x in v1 if w > 0 and x != d]
+                v1 = sorted(v1, key=lambda v: -v[0])[:top]
+                v2 = m.neighbors(d, top)
+                self.assertEqual(v1, v2)
+        print("pattern.vector.Model._candidates()")
+
     def test_search(self):
         # Assert document vector space search.
         v1 = self.model.search(self.model[0])
@@ -692,6 +874,28 @@ class TestLSA(unittest.TestCase):
             self.assertTrue(len(v) <= k)
         print("pattern.vector.LSA")
 
+    def test_lsa_truncated(self):
+        # Assert LSA with truncated and randomized SVD.
+        k = 20
+        lsa1 = vector.LSA(self.model, k)
+        for svd in (vector.TRUNCATED, vector.RANDOMIZED):
+            lsa2 = vector.LSA(self.model, k, svd=svd)
+            self.assertTrue(isinstance(lsa2.u, vector.np.ndarray))
+            self.assertEqual(lsa2.u.shape, (len(self.model), k))
+            self.assertEqual(lsa2.vt.shape, (k, len(self.model.vector)))
+            self.assertEqual(lsa2.terms, lsa1.terms)
+            self.assertEqual(len(lsa2.concepts), k)
+            # Assert that the largest singular values are (approximately) the same.
+            for x1, x2 in zip(lsa1.sigma[:5], lsa2.sigma[:5]):
+                self.assertAlmostEqual(x1, x2, places=1)
+            # Assert concept vectors and LSA.transform().
+            d = self.model[0]
+            self.assertTrue(isinstance(lsa2[d.id], vector.Vector))
+            self.assertTrue(d.id in lsa2)
+            v = lsa2.transform(vector.Document(d.terms))
+            self.assertEqual(sorted(v.keys()), sorted(lsa2[d.id].keys()))
+        print("pattern.vector.LSA(svd=TRUNCATED)")
+
     def test_lsa_concepts(self):
         # Assert LSA concept space.
         model = vector.Model((
@@ -735,18 +939,24 @@ class TestLSA(unittest.TestCase):
         print("pattern.vector.LSA.transform()")
 
     def test_model_reduce(self):
-        # Test time and accuracy of model with sparse vectors of maximum 250 features.
-        t1 = time.time()
+        # Test accuracy of model with sparse vectors of maximum 250 features.
         A1, P1, R1, F1, stdev = vector.KNN.test(self.model, folds=10)
-        t1 = time.time() - t1
-        # Test time and accuracy of model with reduced vectors of 20 features.
+        # Test accuracy of model with reduced vectors of 20 features.
         self.model.reduce(dimensions=20)
-        t2 = time.time()
         A2, P2, R2, F2, stdev = vector.KNN.test(self.model, folds=10)
-        t2 = time.time() - t2
         self.assertTrue(len(self.model.lsa[self.model.documents[0].id]) == 20)
-        self.assertTrue(t2 * 2 < t1)       # KNN over 2x faster.
         self.assertTrue(abs(F1 - F2) < 0.06) # Difference in F-score = 1-6%.
+        # Sparse KNN uses an inverted index, so LSA no longer makes it 2x faster.
+        # Assert that the nearest neighbors (dense LSA vectors) are those of a full scan.
+        v = vector.KNN(train=self.model.documents[:100])
+        for d in self.model.documents[100:120]:
+            d = v._vector(d)[1]
+            d1 = v._nearest([d])[0]
+            d2 = (vector.distance(d, d2, method=vector.COSINE) for type, d2 in v._vectors)
+            d2 = sorted(x for x in d2 if x < 1)[:v.k]
+            self.assertEqual(len(d1), len(d2))
+            for (x1, type), x2 in zip(d1, d2):
+                self.assertAlmostEqual(x1, x2, places=10)
         self.model.lsa = None
         print("pattern.vector.Model.reduce()")
 
@@ -809,14 +1019,14 @@ class TestClustering(unittest.TestCase):
             self.assertAlmostEqual(m._cache[(v1.id, v2.id)], 0.55, places=2)
         print("pattern.vector.DistanceMap")
 
-    def _test_k_means(self, seed):
+    def _test_k_means(self, seed, engine=vector.PYTHON):
         # Assert k-means clustering accuracy.
         A = []
         n = 100
         m = dict((d.vector.id, d.type) for d in self.model[:n])
         for i in range(30):
             # Create two clusters of vectors.
-            k = vector.kmeans([d.vector for d in self.model[:n]], k=2, seed=seed)
+            k = vector.kmeans([d.vector for d in self.model[:n]], k=2, seed=seed, engine=engine)
             # Measure the number of spam in each clusters.
             # Ideally, we have a cluster without spam and one with only spam.
             i = len([1 for v in k[0] if m[v.id] == False])
@@ -839,6 +1049,18 @@ class TestClustering(unittest.TestCase):
         self.assertTrue(v >= 0.8)
         print("pattern.vector.kmeans(seed=KMPP)")
 
+    def test_k_means_numpy(self):
+        # Assert vectorized k-means.
+        v = self._test_k_means(seed=vector.RANDOM, engine=vector.NUMPY)
+        self.assertTrue(v >= 0.6)
+        v = self._test_k_means(seed=vector.KMPP, engine=vector.NUMPY)
+        self.assertTrue(v >= 0.8)
+        # Assert that the clusters contain the given Vector objects.
+        v = [d.vector for d in self.model[:10]]
+        k = vector.kmeans(v, k=3, engine=vector.NUMPY, distance=vector.EUCLIDEAN)
+        self.assertEqual(sorted(x.id for x in sum(k, [])), sorted(x.id for x in v))
+        print("pattern.vector.kmeans(engine=NUMPY)")
+
     def test_hierarchical(self):
         # Assert cluster contains nested clusters and/or vectors.
         def _test_cluster(cluster):
@@ -873,6 +1095,24 @@ class TestClustering(unittest.TestCase):
         print("pattern.vector.Cluster()")
         print("pattern.vector.hierarchical()")
 
+    def test_hierarchical_numpy(self):
+        # Assert hierarchical clustering with engine=NUMPY.
+        v = [d.vector for d in self.model[:50]]
+        h = vector.hierarchical(v, k=2, engine=vector.NUMPY)
+        self.assertEqual(len(h), 2)
+        self.assertEqual(sorted(x.id for x in h.flatten()), sorted(x.id for x in v))
+        # Assert that the same clusters are merged as with engine=PYTHON.
+        def _nested(cluster):
+            if isinstance(cluster, vector.Cluster):
+                return frozenset(_nested(x) for x in cluster)
+            return cluster.id
+        v = [vector.Vector({"x": random.random(), "y": random.random(), "z": random.random()}) for i in range(20)]
+        for distance in (vector.COSINE, vector.EUCLIDEAN):
+            h1 = vector.hierarchical(v, k=3, distance=distance)
+            h2 = vector.hierarchical(v, k=3, distance=distance, engine=vector.NUMPY)
+            self.assertEqual(_nested(h1), _nested(h2))
+        print("pattern.vector.hierarchical(engine=NUMPY)")
+
 #---------------------------------------------------------------------------------------------------
 
 
@@ -938,6 +1178,22 @@ class TestClassifier(unittest.TestCase):
         self.assertEqual(("cat", {"cat": 0.5, "purs": 0.5}), v("cat purs", type="cat"))
         print("pattern.vector.Classifier._vector()")
 
+    def test_cross_validation(self):
+        # Assert K-fold cross-validation with a seed, in parallel processes.
+        v1 = vector.K_fold_cross_validation(vector.SLP, self.model, folds=4, iterations=2, seed=1)
+        v2 = vector.K_fold_cross_validation(vector.SLP, self.model, folds=4, iterations=2, seed=1, processes=2)
+        v3 = vector.K_fold_cross_validation(vector.SLP, self.model, folds=4, iterations=2, seed=1, processes=0)
+        self.assertEqual(v1, v2)
+        self.assertEqual(v1, v3)
+        self.assertTrue(v1[3] >= 0.85)
+        # Assert grid search in parallel processes.
+        v = vector.gridsearch(vector.NB, self.model, folds=4, seed=1, processes=2,
+            method=[vector.MULTINOMIAL, vector.BERNOUILLI])
+        self.assertEqual(len(v), 2)
+        self.assertEqual(v[0][0], vector.K_fold_cross_validation(vector.NB, self.model, folds=4, seed=1, **v[0][1]))
+        print("pattern.vector.K_fold_cross_validation()")
+        print("pattern.vector.gridsearch()")
+
     def test_nb(self):
         # Assert Bayesian probability classification.
         self._test_classifier(vector.NB)
@@ -947,6 +1203,18 @@ class TestClassifier(unittest.TestCase):
         self.assertTrue(P >= 0.88)
         self.assertTrue(R >= 0.89)
         self.assertTrue(F >= 0.88)
+        # Assert batch classification.
+        v = vector.NB(train=self.model[:200])
+        p1 = v.classify_many(self.model[200:], discrete=False)
+        p2 = [v.classify(d, discrete=False) for d in self.model[200:]]
+        for p1, p2 in zip(p1, p2):
+            self.assertTrue(isinstance(p1, vector.Probabilities))
+            for type in p2:
+                self.assertAlmostEqual(p1[type], p2[type], places=10)
+        # Assert that probabilities of long documents do not underflow.
+        p = v.classify(dict(("x%s" % i, 1) for i in range(1000)), discrete=False)
+        self.assertAlmostEqual(sum(p.values()), 1.0, places=10)
+        print("pattern.vector.NB.classify_many()")
 
     def test_igtree(self):
         # Assert information gain tree classification.
@@ -967,6 +1235,19 @@ class TestClassifier(unittest.TestCase):
         self.assertTrue(P >= 0.91)
         self.assertTrue(R >= 0.92)
         self.assertTrue(F >= 0.92)
+        # Assert batch classification with the inverted index.
+        v = vector.KNN(train=self.model[:200], k=2)
+        p1 = v.classify_many(self.model[200:], discrete=False)
+        p2 = [v.classify(d, discrete=False) for d in self.model[200:]]
+        self.assertEqual(p1, p2)
+        # Assert that the nearest neighbors are those of cosine distance().
+        d = self.model[200]
+        D = ((vector.distance(d.vector, x.vector), x.type) for x in self.model[:200])
+        D = sorted(D)[:2]
+        for (d1, type1), (d2, type2) in zip(D, v._nearest([d.vector])[0]):
+            self.assertAlmostEqual(d1, d2, places=10)
+            self.assertEqual(type1, type2)
+        print("pattern.vector.KNN.classify_many()")
 
     def test_slp(self):
         random.seed(1)
@@ -978,6 +1259,121 @@ class TestClassifier(unittest.TestCase):
         self.assertTrue(P >= 0.90)
         self.assertTrue(R >= 0.91)
         self.assertTrue(F >= 0.91)
+        # Assert batch training and classification.
+        v = vector.SLP()
+        v.train_many(self.model[:200])
+        p1 = v.classify_many(self.model[200:], discrete=False)
+        p2 = [v.classify(d, discrete=False) for d in self.model[200:]]
+        for p1, p2 in zip(p1, p2):
+            for type in p2:
+                self.assertAlmostEqual(p1[type], p2[type], places=10)
+        # Assert that SLP weights from Pattern 3.6- are converted (dict of dicts).
+        v = vector.SLP.__new__(vector.SLP)
+        v.__dict__.update(
+               description = "",
+                     _data = {},
+                  _vectors = [],
+                  _classes = {"cat": 1, "dog": 1},
+                 _baseline = vector.MAJORITY,
+                _iteration = 2,
+                   _weight = {
+                       "cat": {"purr": (1, 2, 2)},
+                       "dog": {"purr": (-1, -2, 2), "woof": (1, 2, 2)}})
+        v._on_load(None)
+        # Assert that the weights are converted to arrays on first use.
+        self.assertTrue("_weight" in v.__dict__)
+        self.assertEqual(sorted(v.features), ["purr", "woof"])
+        self.assertTrue("_weight" not in v.__dict__)
+        self.assertEqual(v._w0.shape, (2, 2))
+        self.assertEqual(v.classify({"purr": 1}), "cat")
+        self.assertEqual(v.classify({"woof": 1}), "dog")
+        self.assertAlmostEqual(v.classify({"purr": 1}, discrete=False)["cat"], 0.88, places=2)
+        # Assert that probability estimates are the softmax of the (averaged) class weights.
+        p1 = v.classify({"woof": 1}, discrete=False)
+        p2 = vector.softmax({"cat": 0.0, "dog": 1.0})
+        self.assertAlmostEqual(p1["cat"], p2["cat"], places=10)
+        self.assertAlmostEqual(p1["dog"], p2["dog"], places=10)
+        self.assertAlmostEqual(sum(p1.values()), 1.0, places=10)
+        # Assert that an untrained classifier returns the baseline.
+        self.assertEqual(vector.SLP().classify({"purr": 1}), None)
+        self.assertEqual(vector.SLP(baseline="cat").classify({"purr": 1}), "cat")
+        print("pattern.vector.SLP.classify_many()")
+
+    def test_lr(self):
+        random.seed(1)
+        # Assert logistic regression classification.
+        self._test_classifier(vector.LR)
+        self._test_classifier(vector.LR, method=vector.MULTINOMIAL)
+        self.assertEqual(vector.LR().method, vector.BINOMIAL)
+        self._test_classifier(vector.LR, optimizer=vector.SGD)
+        # Assert the accuracy of the classifier.
+        for kwargs in (
+          dict(method=vector.MULTINOMIAL),
+          dict(method=vector.BINOMIAL),
+          dict(optimizer=vector.SGD)):
+            A, P, R, F, o = vector.LR.test(self.model, folds=10, **kwargs)
+            #print(A, P, R, F, o)
+            self.assertTrue(P >= 0.93)
+            self.assertTrue(R >= 0.93)
+            self.assertTrue(F >= 0.93)
+        # Assert batch classification.
+        for method in (vector.MULTINOMIAL, vector.BINOMIAL):
+            v = vector.LR(train=self.model[:200], method=method)
+            p1 = v.classify_many(self.model[200:], discrete=False)
+            p2 = [v.classify(d, discrete=False) for d in self.model[200:]]
+            for p1, p2 in zip(p1, p2):
+                if method == vector.MULTINOMIAL:
+                    self.assertAlmostEqual(sum(p1.values()), 1.0, places=10)
+                for type in p2:
+                    self.assertAlmostEqual(p1[type], p2[type], places=10)
+        # Assert that the softmax gradient is correct (finite differences).
+        x = vector._csr_matrix([{"a": 1.0, "b": 0.5}, {"b": 1.0}, {"a": 0.2}], ["a", "b"])
+        y = vector.np.eye(3)[[0, 1, 2]]
+        t = vector.np.linspace(-1, 1, 9).reshape(3, 3)
+        for method in (vector.MULTINOMIAL, vector.BINOMIAL):
+            J, g = vector._lr_gradient(t, x, y, 0.1, method)
+            for i in range(3):
+                for j in range(3):
+                    e = vector.np.zeros_like(t)
+                    e[i, j] = 1e-6
+                    d = vector._lr_gradient(t + e, x, y, 0.1, method)[0] - J
+                    self.assertAlmostEqual(d / 1e-6, g[i, j], places=4)
+        print("pattern.vector.LR.classify_many()")
+
+    def test_bpnn(self):
+        random.seed(1)
+        # Assert that the network learns the XOR-function.
+        for batch in (1, 4):
+            v = vector.BPNN()
+            v._weight_initialization(2, 1, hidden=3)
+            v._train([
+                ([0, 0], [0]),
+                ([0, 1], [1]),
+                ([1, 0], [1]),
+                ([1, 1], [0])], iterations=2000, batch=batch)
+            self.assertTrue(v._classify([0, 0])[0] < 0.2)
+            self.assertTrue(v._classify([0, 1])[0] > 0.8)
+            self.assertTrue(v._classify([1, 0])[0] > 0.8)
+            self.assertTrue(v._classify([1, 1])[0] < 0.2)
+        # Assert mini-batch training and batch classification.
+        v = vector.BPNN(train=self.model[:200], iterations=100, batch=10)
+        p1 = v.classify_many(self.model[200:])
+        p2 = [v.classify(d) for d in self.model[200:]]
+        self.assertEqual(p1, p2)
+        self.assertTrue(set(p1).issubset(v.classes))
+        self.assertEqual(vector.BPNN().classify("herring"), None)
+        # Assert online learning by default (Pattern 3.6-).
+        self.assertEqual(vector.BPNN().batch, 1)
+        # Assert that BPNN weights from Pattern 3.6- are converted (lists of lists).
+        v = vector.BPNN(train=[({"purr": 1}, "cat"), ({"woof": 1}, "dog")])
+        v.classify({"purr": 1})
+        v._wi, v._ci = v._wi.tolist(), v._ci.tolist()
+        v._wo, v._co = v._wo.tolist(), v._co.tolist()
+        v._columns = None
+        v._on_load(None)
+        self.assertEqual(v.classify({"purr": 1}), "cat")
+        self.assertEqual(v.classify({"woof": 1}), "dog")
+        print("pattern.vector.BPNN.classify_many()")
 
     def test_svm(self):
         try:
@@ -993,6 +1389,24 @@ class TestClassifier(unittest.TestCase):
         self.assertTrue(P >= 0.93)
         self.assertTrue(R >= 0.93)
         self.assertTrue(F >= 0.93)
+        # Assert batch classification.
+        for kwargs in (
+          dict(kernel=vector.LINEAR),
+          dict(kernel=vector.LINEAR, solver=0),
+          dict(kernel=vector.RBF)):
+            v = vector.SVM(train=self.model[:200], type=vector.SVC, **kwargs)
+            p1 = v.classify_many(self.model[200:] + ["win money"])
+            p2 = [v.classify(d) for d in self.model[200:] + ["win money"]]
+            self.assertEqual(p1, p2)
+            p1 = v.classify_many(self.model[200:220], discrete=False)
+            p2 = [v.classify(d, discrete=False) for d in self.model[200:220]]
+            self.assertEqual(p1, p2)
+            # Assert probabilities for both classes (LIBLINEAR: logistic regression only).
+            for p in p1:
+                self.assertEqual(len(p), 1 if kwargs == dict(kernel=vector.LINEAR) else 2)
+                self.assertAlmostEqual(sum(p.values()), 1.0, places=5)
+        self.assertEqual(vector.SVM().classify_many(["herring"]), [None])
+        print("pattern.vector.SVM.classify_many()")
 
     def test_liblinear(self):
         # If LIBLINEAR can be loaded,